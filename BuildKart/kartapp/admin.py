@@ -2,7 +2,7 @@ from django.contrib import admin
 from .models import (
     Category, Brand, Product, ProductReview, 
     CartItem, Wishlist, Address, Order, OrderItem, 
-    UserProfile, Testimonial
+    UserProfile, Testimonial, ProductSalesRank
 )
 
 @admin.register(Category)
@@ -26,7 +26,8 @@ class ProductAdmin(admin.ModelAdmin):
     list_filter = ['category', 'brand', 'is_active', 'is_featured', 'created_at']
     search_fields = ['name', 'sku', 'description']
     prepopulated_fields = {'slug': ('name',)}
-    readonly_fields = ['sku', 'created_at', 'updated_at']
+    # Rating aggregates are maintained from the reviews (kartapp.ratings)
+    readonly_fields = ['sku', 'rating', 'num_reviews', 'created_at', 'updated_at']
     fieldsets = (
         ('Basic Info', {
             'fields': ('name', 'slug', 'sku', 'category', 'brand')
@@ -105,3 +106,10 @@ class TestimonialAdmin(admin.ModelAdmin):
     list_display = ['name', 'company', 'rating', 'is_active', 'created_at']
     list_filter = ['is_active', 'rating']
     search_fields = ['name', 'company', 'message']
+
+
+@admin.register(ProductSalesRank)
+class ProductSalesRankAdmin(admin.ModelAdmin):
+    list_display = ['rank', 'product', 'order_count', 'units_sold', 'updated_at']
+    search_fields = ['product__name', 'product__sku']
+    readonly_fields = ['updated_at']
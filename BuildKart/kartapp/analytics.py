@@ -0,0 +1,217 @@
+"""
+Sales analytics: daily rollups of orders, units and revenue.
+
+DailySales (per day), DailyCategorySales and DailyProductSales (per day and
+category/product) are kept up to date incrementally: checkout calls
+record_order() in the transaction that creates the order, and kartapp.signals
+takes an order out of the rollups when it is cancelled or deleted (and puts
+it back when a cancellation is undone). Reports only read the rollups, so
+their cost depends on the number of days asked for, not on the number of
+orders.
+
+An order counts on the day it was placed (local date) unless it is
+cancelled. Revenue is the sum of the order lines, before shipping and tax.
+Order lines edited by hand in the admin are not tracked, nor are orders
+created outside checkout (admin, shell, imports): run the
+rebuild_sales_rollups command for the days concerned afterwards.
+"""
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Order, OrderItem, DailySales, DailyCategorySales, DailyProductSales
+
+
+EXCLUDED_STATUSES = ('cancelled',)
+
+DEFAULT_DAYS = 30
+MAX_DAYS = 366
+TOP_LIMIT = 10
+
+ZERO = Decimal('0.00')
+ONE_DAY = datetime.timedelta(days=1)
+
+
+def counted(status):
+    return status not in EXCLUDED_STATUSES
+
+
+def order_date(order):
+    created = order.created_at
+    return timezone.localdate(created) if timezone.is_aware(created) else created.date()
+
+
+def _bump(model, key, sign, values):
+    """Add sign * values to the rollup row identified by key, creating the row if needed"""
+    changes = {field: F(field) + sign * value for field, value in values.items()}
+    if model.objects.filter(**key).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **{field: sign * value for field, value in values.items()})
+    except IntegrityError:
+        # A concurrent order created the row first
+        model.objects.filter(**key).update(**changes)
+
+
+def _drop(model, key):
+    """Delete the row once nothing is left in it, as if it had never been created"""
+    model.objects.filter(**key, orders=0).delete()
+
+
+def _apply(order, sign):
+    """Add (sign=1) or remove (sign=-1) the order's lines to/from the rollups of its day"""
+    day = order_date(order)
+    products = defaultdict(lambda: [0, ZERO])
+    categories = defaultdict(lambda: [0, ZERO])
+    lines = OrderItem.objects.filter(order=order).values_list('product_id', 'product__category_id', 'quantity', 'total')
+    for product_id, category_id, quantity, total in lines:
+        for totals in (products[product_id], categories[category_id]):
+            totals[0] += quantity
+            totals[1] += total
+
+    rows = [(DailySales, {'date': day}, {
+        'orders': 1,
+        'units': sum(units for units, _ in products.values()),
+        'revenue': sum((revenue for _, revenue in products.values()), ZERO),
+    })]
+    # Sorted, so concurrent orders update shared rows in the same order
+    for category_id in sorted(categories):
+        units, revenue = categories[category_id]
+        rows.append((DailyCategorySales, {'date': day, 'category_id': category_id}, {'orders': 1, 'units': units, 'revenue': revenue}))
+    for product_id in sorted(products):
+        units, revenue = products[product_id]
+        rows.append((DailyProductSales, {'date': day, 'product_id': product_id}, {'orders': 1, 'units': units, 'revenue': revenue}))
+
+    for model, key, values in rows:
+        _bump(model, key, sign, values)
+        if sign < 0:
+            _drop(model, key)
+
+
+def record_order(order):
+    """Add a new order to the rollups; call it in the transaction that creates the order, after its lines"""
+    if counted(order.status):
+        _apply(order, 1)
+
+
+def order_status_changed(order, previous_status):
+    if counted(previous_status) != counted(order.status):
+        _apply(order, 1 if counted(order.status) else -1)
+
+
+def order_deleted(order):
+    """Take an order out of the rollups; call it before its lines are deleted"""
+    if counted(order.status):
+        _apply(order, -1)
+
+
+# Reports
+
+def report_range(start=None, end=None):
+    """
+    Parse the start and end (YYYY-MM-DD, both inclusive) of a report.
+    Defaults to the last DEFAULT_DAYS days; raises ValueError for bad input.
+    """
+    try:
+        end = datetime.date.fromisoformat(end) if end else timezone.localdate()
+        start = datetime.date.fromisoformat(start) if start else end - (DEFAULT_DAYS - 1) * ONE_DAY
+    except ValueError:
+        raise ValueError('start and end must be YYYY-MM-DD') from None
+    if start > end:
+        raise ValueError('start is after end')
+    if (end - start).days >= MAX_DAYS:
+        raise ValueError(f'At most {MAX_DAYS} days can be reported at once')
+    return start, end
+
+
+def _top(model, key, name, start, end, limit):
+    rows = (
+        model.objects.filter(date__range=(start, end))
+        .values(key, name)
+        .annotate(order_count=Sum('orders'), unit_count=Sum('units'), revenue_total=Sum('revenue'))
+        .order_by('-revenue_total', key)[:limit]
+    )
+    return [
+        {'id': row[key], 'name': row[name], 'orders': row['order_count'], 'units': row['unit_count'], 'revenue': row['revenue_total'].quantize(ZERO)}
+        for row in rows
+    ]
+
+
+def sales_report(start, end, limit=TOP_LIMIT):
+    """Totals, the daily series (days without sales included) and the top categories and products of start..end"""
+    rows = {
+        row['date']: row
+        for row in DailySales.objects.filter(date__range=(start, end)).values('date', 'orders', 'units', 'revenue')
+    }
+    days = []
+    day = start
+    while day <= end:
+        days.append(rows.get(day) or {'date': day, 'orders': 0, 'units': 0, 'revenue': ZERO})
+        day += ONE_DAY
+
+    totals = {
+        'orders': sum(row['orders'] for row in days),
+        'units': sum(row['units'] for row in days),
+        'revenue': sum((row['revenue'] for row in days), ZERO),
+    }
+    totals['average_order_value'] = (totals['revenue'] / totals['orders']).quantize(ZERO) if totals['orders'] else ZERO
+    return {
+        'start': start,
+        'end': end,
+        'totals': totals,
+        'days': days,
+        'categories': _top(DailyCategorySales, 'category_id', 'category__name', start, end, limit),
+        'products': _top(DailyProductSales, 'product_id', 'product__name', start, end, limit),
+    }
+
+
+# Rebuilding from the orders
+
+def _local_midnight(day):
+    midnight = datetime.datetime.combine(day, datetime.time())
+    return timezone.make_aware(midnight) if settings.USE_TZ else midnight
+
+
+def rebuild(start, end):
+    """
+    Recompute the rollups of start..end (inclusive) from the orders, in one
+    transaction. Orders placed while it runs may be counted twice or not at
+    all, so run it when the shop is quiet (or for past days only).
+    """
+    orders = Order.objects.filter(
+        created_at__gte=_local_midnight(start), created_at__lt=_local_midnight(end + ONE_DAY)
+    ).exclude(status__in=EXCLUDED_STATUSES)
+    lines = OrderItem.objects.filter(order__in=orders).annotate(day=TruncDate('order__created_at'))
+    line_totals = {'orders': Count('order_id', distinct=True), 'units': Sum('quantity'), 'revenue': Sum('total')}
+
+    with transaction.atomic():
+        for model in (DailySales, DailyCategorySales, DailyProductSales):
+            model.objects.filter(date__range=(start, end)).delete()
+
+        daily = {
+            row['day']: DailySales(date=row['day'], orders=row['orders'])
+            for row in orders.annotate(day=TruncDate('created_at')).values('day').annotate(orders=Count('id'))
+        }
+        for row in lines.values('day').annotate(units=Sum('quantity'), revenue=Sum('total')):
+            daily[row['day']].units = row['units']
+            daily[row['day']].revenue = row['revenue']
+        categories = [
+            DailyCategorySales(date=row['day'], category_id=row['product__category_id'], orders=row['orders'], units=row['units'], revenue=row['revenue'])
+            for row in lines.values('day', 'product__category_id').annotate(**line_totals)
+        ]
+        products = [
+            DailyProductSales(date=row['day'], product_id=row['product_id'], orders=row['orders'], units=row['units'], revenue=row['revenue'])
+            for row in lines.values('day', 'product_id').annotate(**line_totals)
+        ]
+
+        DailySales.objects.bulk_create(daily.values())
+        DailyCategorySales.objects.bulk_create(categories)
+        DailyProductSales.objects.bulk_create(products)
+    return len(daily)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class KartappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'kartapp'
+
+    def ready(self):
+        import kartapp.signals
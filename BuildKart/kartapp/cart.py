@@ -0,0 +1,124 @@
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, Sum
+from django.utils.functional import cached_property
+
+from .models import CartItem
+
+
+FREE_SHIPPING_FROM = Decimal('5000')
+SHIPPING_CHARGE = Decimal('500')
+GST_RATE = Decimal('0.18')
+
+
+def order_totals(subtotal):
+    shipping = Decimal('0') if subtotal >= FREE_SHIPPING_FROM else SHIPPING_CHARGE
+    tax = (subtotal * GST_RATE).quantize(Decimal('0.01'))
+    return {
+        'subtotal': subtotal,
+        'shipping': shipping,
+        'tax': tax,
+        'total': subtotal + shipping + tax,
+    }
+
+
+class Cart:
+    """
+    Cart of the logged in user or of the anonymous session.
+
+    One instance is shared by everything handling a request (views, JSON
+    endpoints, the context processor), see get_cart(). Items are loaded at
+    most once with their products; count and subtotal come from the loaded
+    items or, when nobody needs the items, from a single aggregate query.
+    """
+
+    def __init__(self, request):
+        self.request = request
+
+    @property
+    def owner(self):
+        """Filter kwargs selecting this cart's rows, None for a session without key"""
+        if self.request.user.is_authenticated:
+            return {'user': self.request.user}
+        session_key = self.request.session.session_key
+        return {'session_key': session_key} if session_key else None
+
+    def _ensure_owner(self):
+        # Anonymous carts need a session key before anything can be stored
+        if not self.request.user.is_authenticated and not self.request.session.session_key:
+            self.request.session.create()
+        return self.owner
+
+    @property
+    def queryset(self):
+        owner = self.owner
+        if owner is None:
+            return CartItem.objects.none()
+        return CartItem.objects.filter(**owner)
+
+    @cached_property
+    def items(self):
+        return list(self.queryset.select_related('product'))
+
+    @cached_property
+    def _totals(self):
+        if 'items' in self.__dict__:
+            return (
+                sum(item.quantity for item in self.items),
+                sum((item.get_total_price() for item in self.items), Decimal('0')),
+            )
+        if self.owner is None:
+            return 0, Decimal('0')
+        totals = self.queryset.aggregate(
+            count=Sum('quantity'),
+            subtotal=Sum(F('quantity') * F('product__price'), output_field=DecimalField(max_digits=12, decimal_places=2)),
+        )
+        return totals['count'] or 0, totals['subtotal'] or Decimal('0')
+
+    @property
+    def count(self):
+        return self._totals[0]
+
+    @property
+    def subtotal(self):
+        return self._totals[1]
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def summary(self):
+        """Subtotal, shipping, GST and total as shown on the cart and checkout pages"""
+        return order_totals(self.subtotal)
+
+    def add(self, product, quantity):
+        owner = self._ensure_owner()
+        cart_item, created = CartItem.objects.get_or_create(
+            product=product,
+            defaults={'quantity': quantity},
+            **owner
+        )
+        if not created:
+            cart_item.quantity += quantity
+            cart_item.save()
+        self.invalidate()
+        return cart_item
+
+    def clear(self):
+        self.queryset.delete()
+        self.invalidate()
+
+    def invalidate(self):
+        """Forget the loaded items and totals after the cart changed"""
+        self.__dict__.pop('items', None)
+        self.__dict__.pop('_totals', None)
+
+
+def get_cart(request):
+    """The Cart of this request, created on first use"""
+    cart = getattr(request, '_cart', None)
+    if cart is None:
+        cart = request._cart = Cart(request)
+    return cart
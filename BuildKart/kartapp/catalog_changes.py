@@ -0,0 +1,100 @@
+"""
+Product change feed shared by the web processes.
+
+The facet index (kartapp.facets) and the in-memory search index
+(kartapp.search) are per-process copies of the product table. Whatever
+changes products records their ids in ProductChange once its transaction
+commits; the newest ProductChange id is the catalog generation. Each copy
+keeps a ChangeFeed with the generation it was built at and, before it
+answers, re-reads the products changed since then, or rebuilds when too
+much changed.
+"""
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import ProductChange
+
+
+# Past this many changes since the last sync a rebuild is cheaper than re-reading them
+MAX_INCREMENTAL = 500
+
+# Changes are deleted after this many seconds; a copy that has not synced for half of it rebuilds
+RETENTION = 60 * 60 * 24
+
+# A change id skipped by a sync may belong to a transaction that commits later, it is looked up again for this long
+GAP_TIMEOUT = 60
+
+_next_prune = 0.0
+
+
+def _write(product_ids):
+    global _next_prune
+    if product_ids is None:
+        ProductChange.objects.create(product_id=None)
+    else:
+        ProductChange.objects.bulk_create([ProductChange(product_id=product_id) for product_id in product_ids], batch_size=1000)
+
+    if time.monotonic() >= _next_prune:
+        _next_prune = time.monotonic() + 60 * 60
+        ProductChange.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=RETENTION)).delete()
+
+
+def record(product_ids):
+    """Tell every process the given products changed, once the current transaction commits"""
+    product_ids = sorted(set(product_ids))
+    if product_ids:
+        transaction.on_commit(lambda: _write(product_ids))
+
+
+def record_all():
+    """Tell every process to rebuild its indexes, e.g. after bulk inserts"""
+    transaction.on_commit(lambda: _write(None))
+
+
+class ChangeFeed:
+    """Position of one in-process copy in the change feed"""
+
+    def __init__(self):
+        self.generation = None
+        self.synced_at = None
+        self.gaps = {}  # skipped change id -> when it was first missed
+
+    def start(self):
+        """Call right before the copy is (re)built from the database"""
+        self.generation = ProductChange.objects.aggregate(last=Max('id'))['last'] or 0
+        self.synced_at = time.monotonic()
+        self.gaps = {}
+
+    def changed_products(self):
+        """
+        Ids of the products changed since the last call (or start()), None if
+        the copy has to be rebuilt instead
+        """
+        now = time.monotonic()
+        if self.synced_at is None or now - self.synced_at > RETENTION / 2:
+            return None
+        newer = Q(id__gt=self.generation)
+        if self.gaps:
+            newer |= Q(id__in=self.gaps)
+        changes = list(
+            ProductChange.objects.filter(newer).order_by('id').values_list('id', 'product_id')[:MAX_INCREMENTAL + 1]
+        )
+        if len(changes) > MAX_INCREMENTAL or any(product_id is None for _, product_id in changes):
+            return None
+
+        seen = {change_id for change_id, _ in changes}
+        generation = max(seen, default=self.generation)
+        for change_id in range(self.generation + 1, min(generation, self.generation + MAX_INCREMENTAL + 1)):
+            if change_id not in seen:
+                self.gaps.setdefault(change_id, now)
+        self.gaps = {
+            change_id: missed_at for change_id, missed_at in self.gaps.items()
+            if change_id not in seen and now - missed_at < GAP_TIMEOUT
+        }
+        self.generation = max(generation, self.generation)
+        self.synced_at = now
+        return {product_id for _, product_id in changes}
@@ -0,0 +1,118 @@
+"""
+Checkout: turns a user's cart into an order.
+
+Everything happens in one transaction. Stock is reserved with conditional
+UPDATEs (stock = stock - n WHERE stock >= n), so two checkouts racing for the
+last units cannot both succeed and stock never goes negative; order lines
+are inserted with one bulk_create. Transactions that fail on lock contention
+(e.g. "database is locked" on SQLite, deadlocks elsewhere) are retried.
+"""
+import random
+import time
+from decimal import Decimal
+
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import F
+
+from . import analytics, catalog_changes
+from .cart import order_totals
+from .facets import facet_index
+from .models import CartItem, Order, OrderItem, Product
+
+
+CHECKOUT_ATTEMPTS = 5
+RETRY_DELAY = 0.02  # seconds, doubled after every failed attempt
+
+
+class CheckoutError(Exception):
+    pass
+
+
+class EmptyCart(CheckoutError):
+    pass
+
+
+class OutOfStock(CheckoutError):
+    """Raised with the products whose stock could not cover the cart"""
+
+    def __init__(self, products):
+        self.products = products
+        super().__init__('Not enough stock for: ' + ', '.join(product.name for product in products))
+
+
+def _reserve_stock(quantities):
+    """Take quantities ({product id: units}) out of stock, raise OutOfStock if any product is short"""
+    short = []
+    # Fixed order, so concurrent checkouts lock rows the same way round
+    for product_id in sorted(quantities):
+        reserved = Product.objects.filter(id=product_id, is_active=True, stock__gte=quantities[product_id]).update(
+            stock=F('stock') - quantities[product_id]
+        )
+        if not reserved:
+            short.append(product_id)
+    if short:
+        raise OutOfStock(list(Product.objects.filter(id__in=short)))
+    Product.objects.filter(id__in=quantities, stock__lte=0, in_stock=True).update(in_stock=False)
+
+
+def _place_order(user, address, payment_method):
+    with transaction.atomic():
+        cart_items = list(CartItem.objects.filter(user=user).select_related('product').order_by('id'))
+        if not cart_items:
+            raise EmptyCart('Your cart is empty!')
+
+        quantities = {}
+        for item in cart_items:
+            quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+        _reserve_stock(quantities)
+
+        subtotal = sum((item.get_total_price() for item in cart_items), Decimal('0'))
+        totals = order_totals(subtotal)
+        order = Order.objects.create(
+            user=user,
+            shipping_address=address,
+            payment_method=payment_method,
+            subtotal=totals['subtotal'],
+            shipping_cost=totals['shipping'],
+            tax=totals['tax'],
+            total=totals['total'],
+            status='confirmed'
+        )
+        # bulk_create skips OrderItem.save(), so total is filled in here
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=item.product,
+                quantity=item.quantity,
+                price=item.product.price,
+                total=item.get_total_price(),
+            )
+            for item in cart_items
+        ])
+        CartItem.objects.filter(id__in=[item.id for item in cart_items]).delete()
+        analytics.record_order(order)
+
+        # Queryset updates send no signals, refresh the stock facets by hand
+        product_ids = list(quantities)
+        catalog_changes.record(product_ids)
+        transaction.on_commit(lambda: facet_index.update_products(product_ids))
+    return order
+
+
+def place_order(user, address, payment_method='cod'):
+    """
+    Create an order from user's cart, reserving stock and emptying the cart.
+
+    Raises EmptyCart or OutOfStock (nothing is changed then). Retries up to
+    CHECKOUT_ATTEMPTS times when the database reports contention.
+    """
+    delay = RETRY_DELAY
+    for attempt in range(1, CHECKOUT_ATTEMPTS + 1):
+        try:
+            return _place_order(user, address, payment_method)
+        except (OperationalError, IntegrityError):
+            # Lock contention, or (rarely) a duplicate random order number
+            if attempt == CHECKOUT_ATTEMPTS or transaction.get_connection().in_atomic_block:
+                raise
+            time.sleep(delay * (1 + random.random()))
+            delay *= 2
@@ -0,0 +1,315 @@
+"""
+In-memory facet index for the product list.
+
+Every active product gets a fixed position; categories, brands, stock state
+and price buckets are kept as bitmaps (Python ints, bit n = position n), so a
+filter combination is a handful of ANDs and every facet count is a popcount.
+Sort orders are kept as sorted position lists so matching ids come out already
+sorted. Each process keeps its own copy; before answering it re-reads the
+products changed in any process since it last looked (see
+kartapp.catalog_changes), kartapp.signals also updates it right away.
+"""
+import bisect
+import threading
+from collections import defaultdict
+
+from .catalog_changes import ChangeFeed
+from .models import Brand, Product
+
+
+# Bucket edges of the price histogram (the last bucket is open ended)
+PRICE_EDGES = [0, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000]
+
+SORT_KEYS = {
+    'newest': lambda row: (-row['created'], -row['id']),
+    'price_low': lambda row: (row['price'], row['id']),
+    'price_high': lambda row: (-row['price'], row['id']),
+    'rating': lambda row: (-row['rating'], row['id']),
+}
+
+
+def price_bucket(price):
+    return max(bisect.bisect_right(PRICE_EDGES, price) - 1, 0)
+
+
+def bitmap_from_positions(positions, size):
+    # Bits are set in a bytearray first, OR-ing shifted ints would copy the whole bitmap per bit
+    buffer = bytearray((size + 7) // 8)
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+class FacetResult:
+    """Ids matching a filter combination plus the facet counts around it"""
+
+    def __init__(self, ids, count, brand_counts, price_histogram, stock_counts, next_key=None, previous_key=None):
+        self.ids = ids
+        self.count = count
+        # Sort keys to continue from (see kartapp.pagination), None on the last/first page
+        self.next_key = next_key
+        self.previous_key = previous_key
+        self.brand_counts = brand_counts
+        self.price_histogram = price_histogram
+        self.stock_counts = stock_counts
+
+
+class FacetIndex:
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.ready = False
+        self.feed = ChangeFeed()
+
+    def _reset(self):
+        self.positions = {}  # product id -> position
+        self.rows = []  # position -> row dict (None once the product is gone)
+        self.all = 0
+        self.by_category = defaultdict(int)
+        self.by_brand = defaultdict(int)
+        self.in_stock = 0
+        self.by_price_bucket = defaultdict(int)
+        # Per price bucket: sorted [(price, position)] to cut partial buckets
+        self.bucket_prices = defaultdict(list)
+        self.free_positions = []
+        # Sort name -> sorted [(sort key, position)]
+        self.sort_orders = {}
+
+    def _ensure_ready(self):
+        changed = self.feed.changed_products() if self.ready else None
+        if changed is None:
+            self.rebuild()
+        elif changed:
+            self._update(changed)
+
+    @staticmethod
+    def _load(queryset):
+        rows = queryset.filter(is_active=True).values_list(
+            'id', 'category_id', 'brand_id', 'price', 'stock', 'rating', 'created_at'
+        ).order_by()
+        for product_id, category_id, brand_id, price, stock, rating, created_at in rows.iterator(chunk_size=5000):
+            yield {
+                'id': product_id,
+                'category': category_id,
+                'brand': brand_id,
+                'price': float(price),
+                'in_stock': stock > 0,
+                'rating': float(rating),
+                'created': created_at.timestamp() if created_at else 0.0,
+            }
+
+    def _set_bits(self, position, row):
+        bit = 1 << position
+        self.all |= bit
+        self.by_category[row['category']] |= bit
+        self.by_brand[row['brand']] |= bit
+        if row['in_stock']:
+            self.in_stock |= bit
+        bucket = price_bucket(row['price'])
+        self.by_price_bucket[bucket] |= bit
+        return bucket
+
+    def _clear_bits(self, position, row):
+        mask = ~(1 << position)
+        self.all &= mask
+        self.by_category[row['category']] &= mask
+        self.by_brand[row['brand']] &= mask
+        self.in_stock &= mask
+        bucket = price_bucket(row['price'])
+        self.by_price_bucket[bucket] &= mask
+        prices = self.bucket_prices[bucket]
+        del prices[bisect.bisect_left(prices, (row['price'], position))]
+        for name, order in self.sort_orders.items():
+            del order[bisect.bisect_left(order, (SORT_KEYS[name](row), position))]
+
+    def rebuild(self):
+        with self.lock:
+            self._reset()
+            self.feed.start()
+            by_category = defaultdict(list)
+            by_brand = defaultdict(list)
+            in_stock = []
+            for row in self._load(Product.objects.all()):
+                position = len(self.rows)
+                self.positions[row['id']] = position
+                self.rows.append(row)
+                by_category[row['category']].append(position)
+                by_brand[row['brand']].append(position)
+                if row['in_stock']:
+                    in_stock.append(position)
+                self.bucket_prices[price_bucket(row['price'])].append((row['price'], position))
+
+            size = len(self.rows)
+            self.all = (1 << size) - 1
+            self.in_stock = bitmap_from_positions(in_stock, size)
+            for category_id, positions in by_category.items():
+                self.by_category[category_id] = bitmap_from_positions(positions, size)
+            for brand_id, positions in by_brand.items():
+                self.by_brand[brand_id] = bitmap_from_positions(positions, size)
+            for bucket, prices in self.bucket_prices.items():
+                prices.sort()
+                self.by_price_bucket[bucket] = bitmap_from_positions((position for _, position in prices), size)
+            for name, key in SORT_KEYS.items():
+                self.sort_orders[name] = sorted((key(row), position) for position, row in enumerate(self.rows))
+            self.ready = True
+
+    def _remove(self, product_id):
+        position = self.positions.pop(product_id, None)
+        if position is None:
+            return
+        self._clear_bits(position, self.rows[position])
+        self.rows[position] = None
+        self.free_positions.append(position)
+
+    def _add(self, row):
+        position = self.free_positions.pop() if self.free_positions else len(self.rows)
+        if position == len(self.rows):
+            self.rows.append(row)
+        else:
+            self.rows[position] = row
+        self.positions[row['id']] = position
+        bucket = self._set_bits(position, row)
+        bisect.insort(self.bucket_prices[bucket], (row['price'], position))
+        for name, order in self.sort_orders.items():
+            bisect.insort(order, (SORT_KEYS[name](row), position))
+
+    def update_products(self, product_ids):
+        """Re-read the given products; inactive or deleted ones leave the index"""
+        with self.lock:
+            if not self.ready:
+                # Built on first use anyway
+                return
+            self._update(product_ids)
+
+    def _update(self, product_ids):
+        product_ids = set(product_ids)
+        for product_id in product_ids:
+            self._remove(product_id)
+        for row in self._load(Product.objects.filter(id__in=product_ids)):
+            self._add(row)
+
+    def remove_products(self, product_ids):
+        with self.lock:
+            if not self.ready:
+                return
+            for product_id in product_ids:
+                self._remove(product_id)
+
+    def _price_bitmap(self, min_price, max_price):
+        """Bitmap of products priced within [min_price, max_price] (either may be None)"""
+        low = 0.0 if min_price is None else min_price
+        high = float('inf') if max_price is None else max_price
+        first, last = price_bucket(low), price_bucket(high)
+        bitmap = 0
+        for bucket in range(first, last + 1):
+            bucket_low = PRICE_EDGES[bucket]
+            bucket_high = PRICE_EDGES[bucket + 1] if bucket + 1 < len(PRICE_EDGES) else float('inf')
+            if low <= bucket_low and bucket_high <= high:
+                # Whole bucket inside the range
+                bitmap |= self.by_price_bucket[bucket]
+            else:
+                prices = self.bucket_prices[bucket]
+                start = bisect.bisect_left(prices, (low, -1))
+                end = bisect.bisect_right(prices, (high, float('inf')))
+                bitmap |= bitmap_from_positions((position for _, position in prices[start:end]), len(self.rows))
+        return bitmap
+
+    def query(self, category_id=None, brand_id=None, min_price=None, max_price=None, in_stock=False,
+              product_ids=None, sort='newest', limit=None, after=None, before=None):
+        """
+        Filter the active products and count the facets around the filters.
+
+        Brand counts ignore the brand filter and the stock counts ignore the
+        stock filter, so the sidebar shows what picking another value would
+        give. product_ids restricts the result to e.g. search hits.
+
+        With limit, one page of ids is returned: the first one, the one right
+        after the sort key `after` or the one right before `before` (keys
+        come from FacetResult.next_key/previous_key). Finding the start is a
+        bisect, so deep pages cost the same as the first.
+        """
+        with self.lock:
+            self._ensure_ready()
+            base = self.all
+            if category_id is not None:
+                base &= self.by_category.get(category_id, 0)
+            if product_ids is not None:
+                base &= bitmap_from_positions(
+                    (self.positions[product_id] for product_id in product_ids if product_id in self.positions), len(self.rows)
+                )
+            if min_price is not None or max_price is not None:
+                base &= self._price_bitmap(min_price, max_price)
+
+            brand_bitmap = self.by_brand.get(brand_id, 0) if brand_id is not None else None
+            stocked = base & self.in_stock
+            without_brand = stocked if in_stock else base
+            matched = without_brand if brand_bitmap is None else without_brand & brand_bitmap
+            without_stock = base if brand_bitmap is None else base & brand_bitmap
+
+            brand_counts = {}
+            for brand, bitmap in self.by_brand.items():
+                count = (without_brand & bitmap).bit_count()
+                if count and brand is not None:
+                    brand_counts[brand] = count
+            price_histogram = [(matched & self.by_price_bucket[bucket]).bit_count() for bucket in range(len(PRICE_EDGES))]
+            in_stock_count = (without_stock & self.in_stock).bit_count()
+            stock_counts = {'in_stock': in_stock_count, 'out_of_stock': without_stock.bit_count() - in_stock_count}
+
+            count = matched.bit_count()
+            if sort not in SORT_KEYS:
+                sort = 'newest'
+            page, has_next, has_previous = self._page(matched, sort, limit, after, before)
+            ids = [self.rows[position]['id'] for position in page]
+            key = SORT_KEYS[sort]
+            next_key = list(key(self.rows[page[-1]])) if has_next and page else None
+            previous_key = list(key(self.rows[page[0]])) if has_previous and page else None
+        return FacetResult(ids, count, brand_counts, price_histogram, stock_counts, next_key, previous_key)
+
+    def _page(self, matched, sort, limit, after, before):
+        """(positions of one page in sort order, has next page, has previous page)"""
+        if not matched:
+            return [], False, False
+        order = self.sort_orders[sort]
+        # Byte lookups instead of shifting the whole bitmap for every position
+        bits = matched.to_bytes((len(self.rows) + 7) // 8, 'little')
+        wanted = len(order) if limit is None else limit + 1
+
+        page = []
+        if before is not None:
+            index = bisect.bisect_left(order, (tuple(before), -1)) - 1
+            while index >= 0 and len(page) < wanted:
+                position = order[index][1]
+                if bits[position >> 3] >> (position & 7) & 1:
+                    page.append(position)
+                index -= 1
+            has_previous = len(page) > (limit or len(order))
+            page = page[:limit][::-1]
+            return page, True, has_previous
+
+        index = bisect.bisect_right(order, (tuple(after), float('inf'))) if after is not None else 0
+        while index < len(order) and len(page) < wanted:
+            position = order[index][1]
+            if bits[position >> 3] >> (position & 7) & 1:
+                page.append(position)
+            index += 1
+        has_next = limit is not None and len(page) > limit
+        return page[:limit], has_next, after is not None
+
+
+facet_index = FacetIndex()
+
+
+def brand_facets(brand_counts):
+    """[(brand, count)] for the active brands in brand_counts, by name"""
+    brands = Brand.objects.filter(is_active=True, id__in=brand_counts).order_by('name')
+    return [(brand, brand_counts[brand.id]) for brand in brands]
+
+
+def price_facets(price_histogram):
+    """[(low, high or None, count)] for the non-empty price buckets"""
+    facets = []
+    for bucket, count in enumerate(price_histogram):
+        if count:
+            high = PRICE_EDGES[bucket + 1] if bucket + 1 < len(PRICE_EDGES) else None
+            facets.append((PRICE_EDGES[bucket], high, count))
+    return facets
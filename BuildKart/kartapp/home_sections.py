@@ -0,0 +1,124 @@
+"""
+Cached homepage sections.
+
+Each section of the homepage is cached separately so that a change to one
+model only rebuilds the sections that depend on it (see kartapp.signals).
+The cache is shared by all web processes (CACHES in settings), so a change
+made in one of them invalidates the sections for every other.
+Best sellers only change when refresh_sales_rank() runs.
+The cached values are lists of model instances, not rendered HTML, because
+the product cards contain per-user CSRF tokens.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import Category, Product, OrderItem, Testimonial, ProductSalesRank
+
+
+CACHE_PREFIX = 'kartapp:home:'
+DEFAULT_TIMEOUT = 60 * 15
+
+BEST_SELLER_COUNT = 8
+
+
+def _category_products(slug):
+    return lambda: list(Product.objects.filter(category__slug=slug, is_active=True).select_related('category', 'brand')[:4])
+
+
+def _best_sellers():
+    """Top products from the precomputed sales rank, topped up with the newest products"""
+    ranked = list(
+        Product.objects.filter(is_active=True, sales_rank__isnull=False)
+        .select_related('category', 'brand')
+        .order_by('sales_rank__rank')[:BEST_SELLER_COUNT]
+    )
+    if len(ranked) < BEST_SELLER_COUNT:
+        ranked += list(
+            Product.objects.filter(is_active=True, sales_rank__isnull=True)
+            .select_related('category', 'brand')[:BEST_SELLER_COUNT - len(ranked)]
+        )
+    return ranked
+
+
+# Section name -> function building its value
+SECTIONS = {
+    'categories': lambda: list(Category.objects.filter(is_active=True)[:8]),
+    'featured_products': lambda: list(Product.objects.filter(is_active=True, is_featured=True).select_related('category', 'brand')[:12]),
+    'best_sellers': _best_sellers,
+    'testimonials': lambda: list(Testimonial.objects.filter(is_active=True)[:5]),
+    'cement_products': _category_products('cement'),
+    'steel_products': _category_products('steel'),
+    'bricks_products': _category_products('bricks'),
+}
+
+# Model -> sections that have to be rebuilt when it changes
+SECTION_DEPENDENCIES = {
+    Category: ['categories', 'cement_products', 'steel_products', 'bricks_products', 'active_categories'],
+    Product: ['featured_products', 'best_sellers', 'cement_products', 'steel_products', 'bricks_products'],
+    Testimonial: ['testimonials'],
+}
+
+
+def _key(name):
+    return CACHE_PREFIX + name
+
+
+def get_home_sections():
+    """Return {section name: list} for the homepage, building only missing sections"""
+    cached = cache.get_many([_key(name) for name in SECTIONS])
+    sections = {}
+    missing = {}
+    for name, build in SECTIONS.items():
+        key = _key(name)
+        if key in cached:
+            sections[name] = cached[key]
+        else:
+            sections[name] = missing[key] = build()
+    if missing:
+        cache.set_many(missing, getattr(settings, 'HOME_SECTION_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+    return sections
+
+
+def get_active_categories():
+    """All active categories (menus on every page), cached until a Category changes"""
+    key = _key('active_categories')
+    categories = cache.get(key)
+    if categories is None:
+        categories = list(Category.objects.filter(is_active=True))
+        cache.set(key, categories, getattr(settings, 'HOME_SECTION_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+    return categories
+
+
+def invalidate_sections(names):
+    cache.delete_many([_key(name) for name in names])
+
+
+def invalidate_for_model(model):
+    names = SECTION_DEPENDENCIES.get(model)
+    if names:
+        invalidate_sections(names)
+
+
+def refresh_sales_rank():
+    """
+    Rebuild ProductSalesRank from all order items in one grouped query.
+
+    Meant to run periodically (cron) instead of aggregating every order on
+    each homepage hit. Returns the number of ranked products.
+    """
+    rows = OrderItem.objects.values('product').annotate(
+        order_count=Count('order', distinct=True),
+        units_sold=Sum('quantity'),
+    ).order_by('-order_count', '-units_sold', 'product')
+
+    ranks = [
+        ProductSalesRank(product_id=row['product'], rank=position, order_count=row['order_count'], units_sold=row['units_sold'] or 0)
+        for position, row in enumerate(rows, start=1)
+    ]
+    with transaction.atomic():
+        ProductSalesRank.objects.all().delete()
+        ProductSalesRank.objects.bulk_create(ranks, batch_size=1000)
+    invalidate_sections(['best_sellers'])
+    return len(ranks)
@@ -0,0 +1,202 @@
+"""
+Image derivatives: resized copies and WebP variants of uploaded images.
+
+For every stored original (e.g. products/cement.jpg) a few fixed widths are
+rendered in the original's format (JPEG, or PNG for images with alpha) and as
+WebP. They are stored next to the original under content-hash names, e.g.
+products/cement.320w.3f2a9c1b04de.webp, and listed in a small JSON manifest
+(products/cement.jpg.derivatives.json). The manifest is written last, so its
+presence means the derivatives are complete.
+
+New uploads are processed by a background thread pool (see kartapp.signals),
+existing media by the build_image_derivatives command. Templates use the
+kartapp_images tags, which fall back to the original until the manifest exists.
+
+Nothing here imports models, so generate_derivatives() also runs in the worker
+processes of build_image_derivatives.
+"""
+import hashlib
+import io
+import json
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+
+logger = logging.getLogger(__name__)
+
+# (model, image field) pairs that get derivatives
+IMAGE_FIELDS = [
+    ('kartapp.Product', 'image'),
+    ('kartapp.Category', 'image'),
+    ('kartapp.Brand', 'logo'),
+]
+
+DEFAULT_WIDTHS = (160, 320, 640, 1024)
+DEFAULT_WORKERS = 2
+
+MANIFEST_SUFFIX = '.derivatives.json'
+CACHE_PREFIX = 'kartapp:images:'
+CACHE_TIMEOUT = 60 * 60 * 24
+# Missing manifests are cached briefly, the background worker may finish any moment
+MISSING_TIMEOUT = 60
+
+ENCODERS = {
+    'jpeg': ('jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'png': ('png', {'optimize': True}),
+    'webp': ('webp', {'quality': 80, 'method': 4}),
+}
+
+
+def get_widths():
+    return tuple(sorted(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', DEFAULT_WIDTHS)))
+
+
+def manifest_name(name):
+    return name + MANIFEST_SUFFIX
+
+
+def _cache_key(name):
+    # Storage names may contain characters memcached does not accept in keys
+    return CACHE_PREFIX + hashlib.md5(name.encode()).hexdigest()
+
+
+def _encode(image, fmt):
+    extension, options = ENCODERS[fmt]
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt.upper(), **options)
+    return extension, buffer.getvalue()
+
+
+def _open(name):
+    """The stored image as a loaded, upright PIL image, None when missing or not an image"""
+    try:
+        with default_storage.open(name, 'rb') as source:
+            image = Image.open(io.BytesIO(source.read()))
+            image.load()
+    except (OSError, Image.DecompressionBombError):
+        return None
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+    return image.convert('RGBA' if has_alpha else 'RGB'), has_alpha
+
+
+def read_manifest(name):
+    try:
+        with default_storage.open(manifest_name(name), 'rb') as manifest:
+            return json.loads(manifest.read())
+    except (OSError, ValueError):
+        return None
+
+
+def generate_derivatives(name, force=False):
+    """
+    Render and store the derivatives of one stored image.
+
+    Returns the manifest, or None when the original is missing or cannot be
+    read as an image. Existing derivatives are kept unless force is set.
+    """
+    if not force:
+        manifest = read_manifest(name)
+        if manifest is not None:
+            return manifest
+
+    opened = _open(name)
+    if opened is None:
+        return None
+    image, has_alpha = opened
+
+    directory, filename = posixpath.split(name)
+    stem = filename.rsplit('.', 1)[0]
+    formats = ['png' if has_alpha else 'jpeg']
+    if features.check('webp'):
+        formats.append('webp')
+
+    # Widths wider than the original would only upscale; the original width takes their place
+    widths = [width for width in get_widths() if width < image.width]
+    if image.width <= get_widths()[-1]:
+        widths.append(image.width)
+    variants = {fmt: [] for fmt in formats}
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt in formats:
+            extension, data = _encode(resized, fmt)
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            derivative = posixpath.join(directory, f'{stem}.{width}w.{digest}.{extension}')
+            # Same name means same content, an existing file can be reused as is
+            if not default_storage.exists(derivative):
+                derivative = default_storage.save(derivative, ContentFile(data))
+            variants[fmt].append([width, derivative])
+
+    manifest = {
+        'source': name,
+        'width': image.width,
+        'height': image.height,
+        'fallback': formats[0],
+        'variants': variants,
+    }
+    if default_storage.exists(manifest_name(name)):
+        default_storage.delete(manifest_name(name))
+    default_storage.save(manifest_name(name), ContentFile(json.dumps(manifest).encode()))
+    cache.set(_cache_key(name), manifest, CACHE_TIMEOUT)
+    return manifest
+
+
+def get_derivatives(name):
+    """Manifest of a stored image for rendering, None until its derivatives exist"""
+    if not name:
+        return None
+    key = _cache_key(name)
+    manifest = cache.get(key)
+    if manifest is None:
+        manifest = read_manifest(name) or {}
+        cache.set(key, manifest, CACHE_TIMEOUT if manifest else MISSING_TIMEOUT)
+    return manifest or None
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', DEFAULT_WORKERS),
+                thread_name_prefix='image-derivatives',
+            )
+        return _executor
+
+
+def _generate_logged(name):
+    try:
+        generate_derivatives(name)
+    except Exception:
+        logger.exception('Could not generate derivatives for %s', name)
+
+
+def schedule_derivatives(names):
+    """
+    Generate derivatives for the given stored names in the background.
+
+    With IMAGE_DERIVATIVE_WORKERS = 0 they are generated right away instead.
+    """
+    names = [name for name in names if name]
+    if not getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', DEFAULT_WORKERS):
+        for name in names:
+            _generate_logged(name)
+        return
+    executor = _get_executor()
+    for name in names:
+        executor.submit(_generate_logged, name)
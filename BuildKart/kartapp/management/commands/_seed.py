@@ -0,0 +1,321 @@
+"""Bulk seeding shared by seed_products --scale and the benchmark commands."""
+import random
+from array import array
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from kartapp.cart import order_totals
+from kartapp.models import Category, Brand, Product, Order, OrderItem, CartItem, ProductReview
+
+
+BENCH_CATEGORIES = ['cement', 'steel', 'bricks', 'sand', 'tools']
+BENCH_BRANDS = ['UltraTech', 'Ambuja', 'Birla', 'Tata', 'JSW', 'Kalinga', 'Vindhya', 'Swan']
+BENCH_MATERIALS = ['ppc', 'opc', 'tmt', 'bar', 'red', 'fly ash', 'hollow', 'solid', 'river', 'crushed', 'hammer', 'trowel', 'wire', 'mesh']
+BENCH_GRADES = ['43 grade', '53 grade', 'fe500', 'fe550d', 'premium', 'standard', 'heavy duty']
+
+
+def bulk_insert(model, rows, batch_size=5000):
+    """
+    bulk_create rows (any iterable, e.g. a generator) one batch at a time.
+
+    bulk_create itself turns its argument into a list, so feeding it a
+    generator directly would still hold every row in memory.
+    """
+    iterator = iter(rows)
+    count = 0
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return count
+        model.objects.bulk_create(batch)
+        count += len(batch)
+
+
+def insert_rows(model, fields, rows, batch_size=5000):
+    """
+    INSERT rows (tuples of values for `fields`) with executemany, batch by batch.
+
+    For load test volumes: bulk_create spends most of its time building model
+    instances and preparing every value separately. The values here must
+    already be something the database driver takes (int, str, bool, Decimal,
+    None). Columns not in `fields` get their default, auto_now(_add) columns
+    the current time, both prepared once.
+    """
+    connection = connections[router.db_for_write(model)]
+    opts = model._meta
+    now = timezone.now()
+    columns = [opts.get_field(name).column for name in fields]
+    constants = []
+    for field in opts.concrete_fields:
+        if field.primary_key or field.column in columns:
+            continue
+        value = now if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False) else field.get_default()
+        columns.append(field.column)
+        constants.append(field.get_db_prep_save(value, connection))
+    constants = tuple(constants)
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        connection.ops.quote_name(opts.db_table),
+        ', '.join(connection.ops.quote_name(column) for column in columns),
+        ', '.join(['%s'] * len(columns)),
+    )
+
+    iterator = iter(rows)
+    count = 0
+    with connection.cursor() as cursor:
+        while True:
+            batch = [row + constants for row in islice(iterator, batch_size)]
+            if not batch:
+                return count
+            cursor.executemany(sql, batch)
+            count += len(batch)
+
+
+def _get_categories():
+    categories = []
+    for slug in BENCH_CATEGORIES:
+        category, _ = Category.objects.get_or_create(slug=slug, defaults={'name': slug.title()})
+        categories.append(category)
+    return categories
+
+
+def _get_brands():
+    brands = []
+    for name in BENCH_BRANDS:
+        brand, _ = Brand.objects.get_or_create(slug='bench-' + name.lower(), defaults={'name': name})
+        brands.append(brand)
+    return brands
+
+
+def seed_catalogue(products, prefix='bench', batch_size=2000):
+    """
+    Bulk-insert `products` generated products and return their categories.
+
+    Rows are built lazily and inserted with bulk_create, so Product.save()
+    and the post_save signals do not run (sku and original_price are set here).
+    """
+    categories = _get_categories()
+    brands = _get_brands()
+
+    def rows():
+        for i in range(products):
+            category = categories[i % len(categories)]
+            brand = brands[(i // 3) % len(brands)]
+            material = BENCH_MATERIALS[(i * 5) % len(BENCH_MATERIALS)]
+            grade = BENCH_GRADES[(i * 3) % len(BENCH_GRADES)]
+            price = Decimal(100 + (i * 37) % 9900)
+            yield Product(
+                name=f'{brand.name} {material.title()} {category.name} {grade.title()} {i}',
+                slug=f'{prefix}-product-{i}',
+                sku=f'{prefix.upper()}{i:08d}',
+                category=category,
+                brand=brand,
+                short_description=f'{material.title()} {category.name.lower()} by {brand.name}',
+                description=f'{brand.name} {material} {category.name.lower()}, {grade}, for residential and commercial construction.',
+                price=price,
+                original_price=price,
+                stock=(i * 13) % 200,
+                in_stock=(i * 13) % 200 > 0,
+                is_featured=i % 50 == 0,
+            )
+
+    bulk_insert(Product, rows(), batch_size)
+    return categories
+
+
+def seed_orders(orders, prefix='bench', items_per_order=3, batch_size=2000):
+    """Bulk-insert `orders` orders with a few lines each, spread over the seeded products"""
+    user, _ = User.objects.get_or_create(username=f'{prefix}-user')
+    order_list = Order.objects.bulk_create(
+        [Order(user=user, order_number=f'{prefix.upper()}{i:010d}', subtotal=0, total=0) for i in range(orders)],
+        batch_size=batch_size,
+    )
+    product_ids = list(Product.objects.filter(sku__startswith=prefix.upper()).values_list('id', flat=True)[:2000])
+    OrderItem.objects.bulk_create((
+        OrderItem(order=order, product_id=product_ids[(i * 7 + j) % len(product_ids)], quantity=1 + j, price=100, total=100 * (1 + j))
+        for i, order in enumerate(order_list)
+        for j in range(items_per_order)
+    ), batch_size=batch_size)
+    return order_list
+
+
+
+class ScaleSeeder:
+    """
+    Deterministic load-test data for seed_products --scale N.
+
+    N products plus categories, brands, users, carts, orders and reviews in
+    proportion (see counts). The same scale and seed always give the same
+    rows. Rows are generated lazily and inserted batch by batch, so memory
+    stays flat apart from the product and user id arrays.
+    """
+    ORDER_STATUSES = [status for status, _ in Order.STATUS_CHOICES]
+    PAYMENT_METHODS = [method for method, _ in Order.PAYMENT_METHODS]
+    UNITS = [unit for unit, _ in Product.UNIT_CHOICES]
+
+    def __init__(self, scale, orders=None, prefix='load', seed=42, batch_size=5000):
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.counts = {
+            'categories': max(5, scale // 2000),
+            'brands': max(10, scale // 500),
+            'products': scale,
+            'users': max(10, scale // 10),
+            'carts': max(5, scale // 20),
+            'orders': scale if orders is None else orders,
+            'reviews': scale,
+        }
+
+    def exists(self):
+        return Product.objects.filter(slug__startswith=f'{self.prefix}-product-').exists()
+
+    def _ids(self, queryset):
+        return array('q', queryset.order_by('id').values_list('id', flat=True).iterator(chunk_size=self.batch_size))
+
+    def categories(self):
+        for i in range(self.counts['categories']):
+            yield Category(name=f'Category {i}', slug=f'{self.prefix}-category-{i}', description=f'Load test category {i}')
+
+    def brands(self):
+        for i in range(self.counts['brands']):
+            yield Brand(name=f'Brand {i}', slug=f'{self.prefix}-brand-{i}')
+
+    PRODUCT_FIELDS = [
+        'name', 'slug', 'sku', 'category_id', 'brand_id', 'short_description', 'description', 'specifications',
+        'price', 'original_price', 'unit', 'stock', 'in_stock', 'is_featured',
+    ]
+
+    def products(self, category_ids, brand_ids):
+        rng = self.random
+        for i in range(self.counts['products']):
+            price = Decimal(rng.randint(20, 20000))
+            stock = rng.choice((0, rng.randint(1, 5000)))
+            material = rng.choice(BENCH_MATERIALS).title()
+            grade = rng.choice(BENCH_GRADES)
+            yield (
+                f'{material} {grade.title()} {i}',
+                f'{self.prefix}-product-{i}',
+                f'{self.prefix.upper()}{i:09d}',
+                rng.choice(category_ids),
+                rng.choice(brand_ids) if rng.random() < 0.9 else None,
+                f'{material} {grade}',
+                f'{material} {grade} for residential and commercial construction. Item {i}.',
+                f'Grade: {grade} | Material: {material}',
+                price,
+                price,
+                rng.choice(self.UNITS),
+                stock,
+                stock > 0,
+                rng.random() < 0.02,
+            )
+
+    def users(self):
+        # Hashing is slow, every load test user shares the password "loadtest"
+        password = make_password('loadtest')
+        for i in range(self.counts['users']):
+            yield f'{self.prefix}-user-{i}', f'{self.prefix}-user-{i}@example.com', password
+
+    def cart_items(self, user_ids, product_ids):
+        rng = self.random
+        for user_id in user_ids[:self.counts['carts']]:
+            for product_id in sorted(set(rng.choice(product_ids) for _ in range(rng.randint(1, 4)))):
+                yield user_id, product_id, rng.randint(1, 10)
+
+    ORDER_FIELDS = ['user_id', 'order_number', 'payment_method', 'status', 'subtotal', 'shipping_cost', 'tax', 'total']
+    ORDER_ITEM_FIELDS = ['order_id', 'product_id', 'quantity', 'price', 'total']
+
+    def orders(self, user_ids, product_ids, prices):
+        """Yield (order row, [(product_id, quantity, price, total)]) pairs"""
+        rng = self.random
+        for i in range(self.counts['orders']):
+            items = []
+            subtotal = Decimal('0')
+            for index in sorted(set(rng.randrange(len(product_ids)) for _ in range(rng.randint(1, 4)))):
+                quantity = rng.randint(1, 20)
+                price = Decimal(prices[index])
+                items.append((product_ids[index], quantity, price, price * quantity))
+                subtotal += price * quantity
+            totals = order_totals(subtotal)
+            order = (
+                rng.choice(user_ids),
+                f'{self.prefix.upper()}{i:010d}',
+                rng.choice(self.PAYMENT_METHODS),
+                rng.choice(self.ORDER_STATUSES),
+                totals['subtotal'],
+                totals['shipping'],
+                totals['tax'],
+                totals['total'],
+            )
+            yield order, items
+
+    def reviews(self, user_ids, product_ids):
+        rng = self.random
+        for i in range(self.counts['reviews']):
+            rating = rng.choices((1, 2, 3, 4, 5), weights=(1, 1, 3, 6, 8))[0]
+            yield rng.choice(product_ids), rng.choice(user_ids), rating, f'Rated {rating}', f'Load test review {i}.', rng.random() < 0.5
+
+    def _insert_orders(self, pairs):
+        """Insert orders a batch at a time, then their items with the new order ids"""
+        iterator = iter(pairs)
+        count = 0
+        while True:
+            batch = list(islice(iterator, self.batch_size))
+            if not batch:
+                return count
+            insert_rows(Order, self.ORDER_FIELDS, (order for order, _ in batch), self.batch_size)
+            numbers = [order[1] for order, _ in batch]
+            order_ids = dict(
+                Order.objects.filter(order_number__gte=numbers[0], order_number__lte=numbers[-1]).values_list('order_number', 'id')
+            )
+            items = (
+                (order_ids[order[1]],) + item
+                for order, order_items in batch
+                for item in order_items
+            )
+            insert_rows(OrderItem, self.ORDER_ITEM_FIELDS, items, self.batch_size * 4)
+            count += len(batch)
+
+    def run(self, log=lambda message: None):
+        """Insert everything, calling log(message) after every step; returns {name: rows inserted}"""
+        inserted = {}
+        with transaction.atomic():
+            inserted['categories'] = bulk_insert(Category, self.categories(), self.batch_size)
+            inserted['brands'] = bulk_insert(Brand, self.brands(), self.batch_size)
+            category_ids = self._ids(Category.objects.filter(slug__startswith=f'{self.prefix}-category-'))
+            brand_ids = self._ids(Brand.objects.filter(slug__startswith=f'{self.prefix}-brand-'))
+            log(f"{inserted['categories']} categories, {inserted['brands']} brands")
+
+            inserted['products'] = insert_rows(Product, self.PRODUCT_FIELDS, self.products(category_ids, brand_ids), self.batch_size)
+            log(f"{inserted['products']} products")
+
+        products = Product.objects.filter(slug__startswith=f'{self.prefix}-product-').order_by('id')
+        product_ids = array('q')
+        prices = array('q')
+        for product_id, price in products.values_list('id', 'price').iterator(chunk_size=self.batch_size):
+            product_ids.append(product_id)
+            prices.append(int(price))
+
+        with transaction.atomic():
+            inserted['users'] = insert_rows(User, ['username', 'email', 'password'], self.users(), self.batch_size)
+            user_ids = self._ids(User.objects.filter(username__startswith=f'{self.prefix}-user-'))
+            inserted['cart items'] = insert_rows(
+                CartItem, ['user_id', 'product_id', 'quantity'], self.cart_items(user_ids, product_ids), self.batch_size
+            )
+            log(f"{inserted['users']} users, {inserted['cart items']} cart items")
+
+        with transaction.atomic():
+            inserted['orders'] = self._insert_orders(self.orders(user_ids, product_ids, prices))
+            log(f"{inserted['orders']} orders")
+
+        with transaction.atomic():
+            inserted['reviews'] = insert_rows(
+                ProductReview, ['product_id', 'user_id', 'rating', 'title', 'review', 'is_verified'],
+                self.reviews(user_ids, product_ids), self.batch_size
+            )
+            log(f"{inserted['reviews']} reviews")
+        return inserted
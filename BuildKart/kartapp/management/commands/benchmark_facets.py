@@ -0,0 +1,73 @@
+import itertools
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from kartapp.facets import FacetIndex
+from kartapp.models import Brand, Product
+from ._seed import seed_catalogue
+
+
+def orm_filter(category_id, brand_id, min_price, max_price, in_stock):
+    """The ORM filter chain and brand subquery product_list ran before the facet index"""
+    products = Product.objects.filter(is_active=True)
+    if category_id:
+        products = products.filter(category_id=category_id)
+    if brand_id:
+        products = products.filter(brand_id=brand_id)
+    if min_price is not None:
+        products = products.filter(price__gte=min_price)
+    if max_price is not None:
+        products = products.filter(price__lte=max_price)
+    if in_stock:
+        products = products.filter(stock__gt=0)
+    brands = list(Brand.objects.filter(is_active=True, products__in=products).distinct())
+    return products.count(), brands
+
+
+class Command(BaseCommand):
+    help = 'Seeds a catalogue, checks facet index results against the ORM and compares their latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=50000, help='Number of products to seed (default: 50000)')
+
+    def handle(self, *args, **options):
+        # Everything seeded is rolled back afterwards
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['products']} products...")
+            categories = seed_catalogue(options['products'])
+            brand_ids = list(Brand.objects.filter(products__category__in=categories).values_list('id', flat=True).distinct()[:3])
+
+            index = FacetIndex()
+            start = time.perf_counter()
+            index.rebuild()
+            self.stdout.write('Facet index built in %.0f ms' % ((time.perf_counter() - start) * 1000))
+
+            combinations = list(itertools.product(
+                [None, categories[0].id],
+                [None] + brand_ids[:2],
+                [(None, None), (500, None), (120, 3000)],
+                [False, True],
+            ))
+            orm_timings, index_timings = [], []
+            for category_id, brand_id, (min_price, max_price), in_stock in combinations:
+                start = time.perf_counter()
+                expected_count, _ = orm_filter(category_id, brand_id, min_price, max_price, in_stock)
+                orm_timings.append((time.perf_counter() - start) * 1000)
+
+                start = time.perf_counter()
+                result = index.query(category_id=category_id, brand_id=brand_id, min_price=min_price,
+                                     max_price=max_price, in_stock=in_stock, limit=24)
+                index_timings.append((time.perf_counter() - start) * 1000)
+
+                if result.count != expected_count:
+                    raise CommandError('Facet index found %d products, the ORM %d (category=%s brand=%s price=%s-%s in_stock=%s)' % (
+                        result.count, expected_count, category_id, brand_id, min_price, max_price, in_stock))
+
+            self.stdout.write('%d filter combinations, same counts from both' % len(combinations))
+            self.stdout.write('orm filters + brand subquery  median %8.3f ms, max %8.3f ms' % (statistics.median(orm_timings), max(orm_timings)))
+            self.stdout.write('facet index + all facets      median %8.3f ms, max %8.3f ms' % (statistics.median(index_timings), max(index_timings)))
+
+            transaction.set_rollback(True)
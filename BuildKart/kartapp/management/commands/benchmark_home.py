@@ -0,0 +1,74 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+
+from kartapp.models import Category, Product, Testimonial
+from kartapp.home_sections import SECTIONS, get_home_sections, invalidate_sections, refresh_sales_rank
+from ._seed import seed_catalogue, seed_orders
+
+
+def legacy_home_sections():
+    """The homepage queries as they were before the section cache"""
+    return {
+        'categories': list(Category.objects.filter(is_active=True)[:8]),
+        'featured_products': list(Product.objects.filter(is_active=True, is_featured=True)[:12]),
+        'best_sellers': list(Product.objects.filter(is_active=True).annotate(
+            order_count=Count('orderitem')
+        ).order_by('-order_count')[:8]),
+        'testimonials': list(Testimonial.objects.filter(is_active=True)[:5]),
+        'cement_products': list(Product.objects.filter(category__slug='cement', is_active=True)[:4]),
+        'steel_products': list(Product.objects.filter(category__slug='steel', is_active=True)[:4]),
+        'bricks_products': list(Product.objects.filter(category__slug='bricks', is_active=True)[:4]),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Seeds a large catalogue and compares the old homepage queries with the cached sections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=50000, help='Number of products to seed (default: 50000)')
+        parser.add_argument('--orders', type=int, default=5000, help='Number of orders to seed (default: 5000)')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per variant (default: 5)')
+
+    def measure(self, build, repeat):
+        # Returns (best time in ms, query count of the last run)
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                build()
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best, len(queries)
+
+    def report(self, label, result):
+        elapsed, query_count = result
+        self.stdout.write('%-24s %3d queries, %9.2f ms' % (label, query_count, elapsed))
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        # Everything seeded is rolled back afterwards
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['products']} products and {options['orders']} orders...")
+            seed_catalogue(options['products'])
+            seed_orders(options['orders'])
+
+            self.report('before (live queries)', self.measure(legacy_home_sections, repeat))
+
+            start = time.perf_counter()
+            ranked = refresh_sales_rank()
+            self.stdout.write('refresh_sales_rank:      %d products ranked in %.2f ms' % (ranked, (time.perf_counter() - start) * 1000))
+
+            def cold():
+                invalidate_sections(SECTIONS)
+                get_home_sections()
+
+            self.report('after, cold cache', self.measure(cold, repeat))
+            self.report('after, warm cache', self.measure(get_home_sections, repeat))
+
+            transaction.set_rollback(True)
+
+        invalidate_sections(SECTIONS)
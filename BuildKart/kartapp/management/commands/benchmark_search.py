@@ -0,0 +1,77 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from kartapp.models import Product
+from kartapp.search import InvertedIndexBackend, SQLiteFTS5Backend
+from ._seed import seed_catalogue
+
+
+QUERIES = ['cement', 'ultratech ppc', 'tata tmt fe500', 'steel bar', 'hollow bricks', 'river sand', 'kalinga', 'premium']
+# Keystroke-by-keystroke and misspelt queries, as typed into the search box
+AUTOCOMPLETE_QUERIES = ['c', 'ce', 'cem', 'ceme', 'tata st', 'jsw tm', 'ultratec', 'cemnt', 'amubja', 'hamer']
+
+
+def orm_search(query, limit=20):
+    """The icontains query the search views ran before the search backends"""
+    return list(Product.objects.filter(
+        Q(name__icontains=query) |
+        Q(brand__name__icontains=query) |
+        Q(category__name__icontains=query) |
+        Q(description__icontains=query),
+        is_active=True
+    ).values_list('id', flat=True)[:limit])
+
+
+class Command(BaseCommand):
+    help = 'Seeds a catalogue and compares search latency of the old ORM query and the search backends'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=50000, help='Number of products to seed (default: 50000)')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs of every query (default: 5)')
+
+    def measure(self, label, search, queries, repeat):
+        timings = []
+        hits = 0
+        for query in queries:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = search(query)
+                timings.append((time.perf_counter() - start) * 1000)
+            hits += len(result)
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write('%-28s median %8.3f ms, p95 %8.3f ms, %5d hits' % (label, statistics.median(timings), p95, hits))
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        backends = [InvertedIndexBackend()]
+        if SQLiteFTS5Backend.is_supported():
+            backends.append(SQLiteFTS5Backend())
+        else:
+            self.stdout.write('SQLite FTS5 is not available, skipping the fts5 backend.')
+
+        # Everything seeded (including the FTS5 table contents) is rolled back afterwards
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['products']} products...")
+            seed_catalogue(options['products'])
+
+            for backend in backends:
+                start = time.perf_counter()
+                backend.rebuild()
+                self.stdout.write('%-28s built in %.0f ms' % (backend.name, (time.perf_counter() - start) * 1000))
+
+            self.stdout.write('Search (top 20):')
+            self.measure('orm icontains', orm_search, QUERIES, repeat)
+            for backend in backends:
+                self.measure(backend.name, lambda query: backend.search(query, limit=20), QUERIES, repeat)
+
+            self.stdout.write('Autocomplete (prefix + typos, top 8):')
+            self.measure('orm icontains', lambda query: orm_search(query, limit=8), AUTOCOMPLETE_QUERIES, repeat)
+            for backend in backends:
+                self.measure(backend.name, lambda query: backend.autocomplete(query, limit=8), AUTOCOMPLETE_QUERIES, repeat)
+
+            transaction.set_rollback(True)
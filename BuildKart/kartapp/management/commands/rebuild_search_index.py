@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from kartapp.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the product search index of the configured backend'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        start = time.perf_counter()
+        backend.rebuild()
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the {backend.name} search index in {elapsed:.0f} ms.'))
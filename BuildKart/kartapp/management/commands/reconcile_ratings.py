@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from kartapp import catalog_changes
+from kartapp.models import Product
+from kartapp.ratings import find_drift
+
+
+class Command(BaseCommand):
+    help = 'Recomputes product rating aggregates from the reviews and reports products that had drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the drift')
+
+    def handle(self, *args, **options):
+        drifted = 0
+        fixed = []
+        with transaction.atomic():
+            for product_id, name, stored, expected in find_drift():
+                drifted += 1
+                if drifted <= 20 or options['verbosity'] > 1:
+                    self.stdout.write(
+                        f'{product_id} {name}: {stored[1]} reviews, sum {stored[0]}, rating {stored[2]}'
+                        f' -> {expected[1]} reviews, sum {expected[0]}, rating {expected[2]}'
+                    )
+                if not options['dry_run']:
+                    rating_sum, num_reviews, rating = expected
+                    Product.objects.filter(pk=product_id).update(rating_sum=rating_sum, num_reviews=num_reviews, rating=rating)
+                    fixed.append(product_id)
+            # The web processes re-read these for their facet index
+            catalog_changes.record(fixed)
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('All product ratings match their reviews.'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{drifted} products have drifted (not fixed, --dry-run).'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Fixed {drifted} products.'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from kartapp.home_sections import refresh_sales_rank
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the best-seller ranking used by the homepage (run periodically, e.g. from cron)'
+
+    def handle(self, *args, **options):
+        ranked = refresh_sales_rank()
+        self.stdout.write(self.style.SUCCESS(f'Ranked {ranked} products.'))
@@ -1,11 +1,26 @@
-from django.core.management.base import BaseCommand
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from kartapp import catalog_changes
 from kartapp.models import Category, Brand, Product, Testimonial
 
+from ._seed import ScaleSeeder
+
 
 class Command(BaseCommand):
-    help = 'Seeds the database with sample products for BuildKart'
+    help = 'Seeds the database with sample products for BuildKart (--scale N generates load test data instead)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, help='Generate N products plus proportional categories, brands, users, carts, orders and reviews')
+        parser.add_argument('--orders', type=int, help='Number of orders with --scale (default: N)')
+        parser.add_argument('--prefix', default='load', help='Slug/username prefix of the generated rows (default: load)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed, the same seed gives the same data (default: 42)')
+        parser.add_argument('--batch-size', type=int, default=5000)
 
     def handle(self, *args, **options):
+        if options['scale']:
+            return self.seed_scale(options)
+
         self.stdout.write('Seeding database with sample data...')
         
         # Create Categories
@@ -68,8 +83,6 @@ class Command(BaseCommand):
                 'discount_percentage': 10,
                 'unit': 'bag',
                 'stock': 500,
-                'rating': 4.5,
-                'num_reviews': 128,
                 'is_featured': True,
             },
             {
@@ -84,8 +97,6 @@ class Command(BaseCommand):
                 'discount_percentage': 8,
                 'unit': 'bag',
                 'stock': 450,
-                'rating': 4.3,
-                'num_reviews': 95,
                 'is_featured': True,
             },
             {
@@ -100,8 +111,6 @@ class Command(BaseCommand):
                 'discount_percentage': 5,
                 'unit': 'bag',
                 'stock': 400,
-                'rating': 4.4,
-                'num_reviews': 76,
                 'is_featured': False,
             },
             {
@@ -116,8 +125,6 @@ class Command(BaseCommand):
                 'discount_percentage': 12,
                 'unit': 'bag',
                 'stock': 380,
-                'rating': 4.2,
-                'num_reviews': 64,
                 'is_featured': False,
             },
             
@@ -134,8 +141,6 @@ class Command(BaseCommand):
                 'discount_percentage': 0,
                 'unit': 'cubic_feet',
                 'stock': 1000,
-                'rating': 4.1,
-                'num_reviews': 45,
                 'is_featured': True,
             },
             {
@@ -150,8 +155,6 @@ class Command(BaseCommand):
                 'discount_percentage': 5,
                 'unit': 'ton',
                 'stock': 500,
-                'rating': 4.4,
-                'num_reviews': 38,
                 'is_featured': False,
             },
             {
@@ -166,8 +169,6 @@ class Command(BaseCommand):
                 'discount_percentage': 0,
                 'unit': 'cubic_feet',
                 'stock': 800,
-                'rating': 3.9,
-                'num_reviews': 22,
                 'is_featured': False,
             },
             
@@ -184,8 +185,6 @@ class Command(BaseCommand):
                 'discount_percentage': 8,
                 'unit': 'piece',
                 'stock': 50000,
-                'rating': 4.0,
-                'num_reviews': 156,
                 'is_featured': True,
             },
             {
@@ -200,8 +199,6 @@ class Command(BaseCommand):
                 'discount_percentage': 10,
                 'unit': 'piece',
                 'stock': 25000,
-                'rating': 4.6,
-                'num_reviews': 89,
                 'is_featured': True,
             },
             {
@@ -216,8 +213,6 @@ class Command(BaseCommand):
                 'discount_percentage': 5,
                 'unit': 'piece',
                 'stock': 30000,
-                'rating': 4.2,
-                'num_reviews': 67,
                 'is_featured': False,
             },
             
@@ -234,8 +229,6 @@ class Command(BaseCommand):
                 'discount_percentage': 8,
                 'unit': 'ton',
                 'stock': 200,
-                'rating': 4.7,
-                'num_reviews': 234,
                 'is_featured': True,
             },
             {
@@ -250,8 +243,6 @@ class Command(BaseCommand):
                 'discount_percentage': 10,
                 'unit': 'ton',
                 'stock': 150,
-                'rating': 4.8,
-                'num_reviews': 189,
                 'is_featured': True,
             },
             {
@@ -266,8 +257,6 @@ class Command(BaseCommand):
                 'discount_percentage': 5,
                 'unit': 'ton',
                 'stock': 180,
-                'rating': 4.5,
-                'num_reviews': 145,
                 'is_featured': False,
             },
             {
@@ -282,8 +271,6 @@ class Command(BaseCommand):
                 'discount_percentage': 3,
                 'unit': 'kg',
                 'stock': 500,
-                'rating': 4.1,
-                'num_reviews': 34,
                 'is_featured': False,
             },
             
@@ -300,8 +287,6 @@ class Command(BaseCommand):
                 'discount_percentage': 5,
                 'unit': 'cubic_meter',
                 'stock': 300,
-                'rating': 4.3,
-                'num_reviews': 56,
                 'is_featured': False,
             },
             {
@@ -316,8 +301,6 @@ class Command(BaseCommand):
                 'discount_percentage': 5,
                 'unit': 'cubic_meter',
                 'stock': 250,
-                'rating': 4.2,
-                'num_reviews': 42,
                 'is_featured': False,
             },
             {
@@ -332,8 +315,6 @@ class Command(BaseCommand):
                 'discount_percentage': 3,
                 'unit': 'cubic_meter',
                 'stock': 280,
-                'rating': 4.4,
-                'num_reviews': 38,
                 'is_featured': False,
             },
             
@@ -350,8 +331,6 @@ class Command(BaseCommand):
                 'discount_percentage': 8,
                 'unit': 'piece',
                 'stock': 40000,
-                'rating': 4.3,
-                'num_reviews': 78,
                 'is_featured': False,
             },
             {
@@ -366,8 +345,6 @@ class Command(BaseCommand):
                 'discount_percentage': 5,
                 'unit': 'piece',
                 'stock': 35000,
-                'rating': 4.1,
-                'num_reviews': 45,
                 'is_featured': False,
             },
             {
@@ -382,8 +359,6 @@ class Command(BaseCommand):
                 'discount_percentage': 10,
                 'unit': 'piece',
                 'stock': 50000,
-                'rating': 4.5,
-                'num_reviews': 92,
                 'is_featured': True,
             },
             
@@ -400,8 +375,6 @@ class Command(BaseCommand):
                 'discount_percentage': 15,
                 'unit': 'piece',
                 'stock': 500,
-                'rating': 4.4,
-                'num_reviews': 67,
                 'is_featured': True,
             },
             {
@@ -416,8 +389,6 @@ class Command(BaseCommand):
                 'discount_percentage': 10,
                 'unit': 'piece',
                 'stock': 100,
-                'rating': 4.5,
-                'num_reviews': 45,
                 'is_featured': False,
             },
             {
@@ -432,8 +403,6 @@ class Command(BaseCommand):
                 'discount_percentage': 8,
                 'unit': 'piece',
                 'stock': 200,
-                'rating': 4.3,
-                'num_reviews': 34,
                 'is_featured': False,
             },
             {
@@ -448,8 +417,6 @@ class Command(BaseCommand):
                 'discount_percentage': 5,
                 'unit': 'piece',
                 'stock': 400,
-                'rating': 4.2,
-                'num_reviews': 56,
                 'is_featured': False,
             },
             {
@@ -464,8 +431,6 @@ class Command(BaseCommand):
                 'discount_percentage': 10,
                 'unit': 'piece',
                 'stock': 600,
-                'rating': 4.1,
-                'num_reviews': 89,
                 'is_featured': False,
             },
         ]
@@ -527,3 +492,23 @@ class Command(BaseCommand):
         self.stdout.write(f'Brands: {len(brands)}')
         self.stdout.write(f'Products: {Product.objects.count()}')
         self.stdout.write(f'Testimonials: {Testimonial.objects.count()}')
+
+    def seed_scale(self, options):
+        seeder = ScaleSeeder(
+            options['scale'],
+            orders=options['orders'],
+            prefix=options['prefix'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+        )
+        if seeder.exists():
+            raise CommandError(f"Products with prefix '{options['prefix']}' already exist, use another --prefix")
+
+        counts = ', '.join(f'{count} {name}' for name, count in seeder.counts.items())
+        self.stdout.write(f'Generating {counts}...')
+        started = time.perf_counter()
+        seeder.run(log=lambda message: self.stdout.write(f'  {message} ({time.perf_counter() - started:.1f}s)'))
+        # Bulk inserts send no signals, the web processes rebuild their facet and search indexes
+        catalog_changes.record_all()
+        self.stdout.write(self.style.SUCCESS(f'Load test data generated in {time.perf_counter() - started:.1f}s'))
+        self.stdout.write('Run reconcile_ratings, refresh_sales_rank and rebuild_search_index to update the derived tables.')
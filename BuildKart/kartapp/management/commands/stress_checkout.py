@@ -0,0 +1,93 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from kartapp.checkout import place_order, OutOfStock
+from kartapp.models import Address, CartItem, Category, Order, OrderItem, Product
+
+
+class Command(BaseCommand):
+    help = ('Runs many simultaneous checkouts of one product and checks that it is never oversold. '
+            'Works on the configured database and deletes everything it created afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--buyers', type=int, default=300, help='Number of buyers checking out (default: 300)')
+        parser.add_argument('--stock', type=int, default=100, help='Initial stock of the product (default: 100)')
+        parser.add_argument('--quantity', type=int, default=1, help='Units in every cart (default: 1)')
+        parser.add_argument('--workers', type=int, default=16, help='Concurrent checkout threads (default: 16)')
+
+    def setup(self, buyers, stock, quantity):
+        category, _ = Category.objects.get_or_create(slug='stress-test', defaults={'name': 'Stress Test', 'is_active': False})
+        product = Product.objects.create(
+            name='Stress Test Cement', slug='stress-test-cement', category=category,
+            short_description='Stress test', description='Stress test', price=Decimal('350.00'), stock=stock,
+        )
+        User.objects.bulk_create([User(username=f'stress-buyer-{i}') for i in range(buyers)])
+        users = list(User.objects.filter(username__startswith='stress-buyer-'))
+        Address.objects.bulk_create([
+            Address(user=user, name=user.username, phone='0000000000', address='Test', city='Pune', state='MH', pincode='411001')
+            for user in users
+        ])
+        CartItem.objects.bulk_create([CartItem(user=user, product=product, quantity=quantity) for user in users])
+        addresses = {address.user_id: address for address in Address.objects.filter(user__in=users)}
+        return category, product, [(user, addresses[user.id]) for user in users]
+
+    def cleanup(self, category, product):
+        Order.objects.filter(user__username__startswith='stress-buyer-').delete()
+        User.objects.filter(username__startswith='stress-buyer-').delete()
+        product.delete()
+        category.delete()
+
+    def handle(self, *args, **options):
+        buyers, stock, quantity = options['buyers'], options['stock'], options['quantity']
+        if User.objects.filter(username__startswith='stress-buyer-').exists():
+            raise CommandError('Leftover stress-buyer-* users found, delete them first.')
+
+        category, product, checkouts = self.setup(buyers, stock, quantity)
+        results = {'placed': 0, 'out_of_stock': 0, 'failed': 0}
+        lock = threading.Lock()
+
+        def checkout(user_and_address):
+            user, address = user_and_address
+            try:
+                place_order(user, address)
+                outcome = 'placed'
+            except OutOfStock:
+                outcome = 'out_of_stock'
+            except Exception as e:
+                self.stderr.write(f'{user.username}: {e!r}')
+                outcome = 'failed'
+            finally:
+                connection.close()
+            with lock:
+                results[outcome] += 1
+
+        try:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                list(pool.map(checkout, checkouts))
+            elapsed = time.perf_counter() - start
+
+            product.refresh_from_db()
+            sold = OrderItem.objects.filter(product=product).count()
+            expected = min(buyers, stock // quantity)
+            self.stdout.write(
+                f"{buyers} checkouts with {options['workers']} workers in {elapsed:.2f} s: "
+                f"{results['placed']} placed, {results['out_of_stock']} out of stock, {results['failed']} failed"
+            )
+            self.stdout.write(f"Throughput: {results['placed'] / elapsed:.1f} orders/s; stock left: {product.stock}")
+
+            if product.stock < 0:
+                raise CommandError(f'Stock went negative: {product.stock}')
+            if stock - product.stock != results['placed'] * quantity or sold != results['placed']:
+                raise CommandError(f"Stock and orders disagree: {stock - product.stock} units taken, {sold} order lines, {results['placed']} orders")
+            if results['placed'] != expected:
+                raise CommandError(f"Expected {expected} orders, got {results['placed']}")
+            self.stdout.write(self.style.SUCCESS('No overselling.'))
+        finally:
+            self.cleanup(category, product)
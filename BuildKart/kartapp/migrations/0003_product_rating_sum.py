@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-18 20:05
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_rating_aggregates(apps, schema_editor):
+    """Initial rating_sum, num_reviews and rating from the existing reviews"""
+    Product = apps.get_model('kartapp', 'Product')
+    ProductReview = apps.get_model('kartapp', 'ProductReview')
+    # Products without reviews may carry made-up num_reviews/rating values (e.g. from seed_products)
+    Product.objects.exclude(id__in=ProductReview.objects.values('product')).update(rating_sum=0, num_reviews=0, rating=0)
+    rows = ProductReview.objects.values('product').annotate(total=Sum('rating'), count=Count('id')).order_by()
+    products = []
+    for row in rows:
+        rating = (Decimal(row['total']) / row['count']).quantize(Decimal('0.01'), ROUND_HALF_UP)
+        products.append(Product(id=row['product'], rating_sum=row['total'], num_reviews=row['count'], rating=rating))
+    Product.objects.bulk_update(products, ['rating_sum', 'num_reviews', 'rating'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kartapp', '0002_productsalesrank'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-rating', 'id'], name='kartapp_product_rating_idx'),
+        ),
+        migrations.RunPython(fill_rating_aggregates, migrations.RunPython.noop),
+    ]
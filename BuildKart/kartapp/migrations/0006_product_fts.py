@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-18 22:55
+
+from django.db import migrations, OperationalError, transaction
+
+
+FTS_TABLE = 'kartapp_product_fts'
+VOCAB_TABLE = 'kartapp_product_fts_vocab'
+
+
+def create_product_fts(apps, schema_editor):
+    """FTS5 tables for kartapp.search.SQLiteFTS5Backend, filled with the active products; skipped without FTS5"""
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        try:
+            with transaction.atomic(using=connection.alias):
+                cursor.execute(
+                    'CREATE VIRTUAL TABLE IF NOT EXISTS %s USING fts5(name, brand, category, description, tokenize="unicode61")'
+                    % FTS_TABLE
+                )
+        except OperationalError:
+            # SQLite built without FTS5, the in-memory search backend is used
+            return
+        cursor.execute('CREATE VIRTUAL TABLE IF NOT EXISTS %s USING fts5vocab(%s, row)' % (VOCAB_TABLE, FTS_TABLE))
+        cursor.execute('DELETE FROM %s' % FTS_TABLE)
+        cursor.execute(
+            'INSERT INTO %s (rowid, name, brand, category, description) '
+            "SELECT p.id, p.name, COALESCE(b.name, ''), COALESCE(c.name, ''), COALESCE(p.description, '') "
+            'FROM kartapp_product p '
+            'LEFT JOIN kartapp_brand b ON b.id = p.brand_id '
+            'LEFT JOIN kartapp_category c ON c.id = p.category_id '
+            'WHERE p.is_active' % FTS_TABLE
+        )
+
+
+def drop_product_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS %s' % VOCAB_TABLE)
+        cursor.execute('DROP TABLE IF EXISTS %s' % FTS_TABLE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kartapp', '0005_product_change'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_product_fts, drop_product_fts),
+    ]
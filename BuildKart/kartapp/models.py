@@ -87,6 +87,8 @@ class Product(models.Model):
     # Ratings
     rating = models.DecimalField(max_digits=3, decimal_places=2, default=0)
     num_reviews = models.IntegerField(default=0)
+    # Sum of all review ratings, rating = rating_sum / num_reviews (kept up to date by kartapp.ratings)
+    rating_sum = models.PositiveIntegerField(default=0)
     
     # Delivery
     delivery_days = models.IntegerField(default=3)
@@ -110,6 +112,9 @@ class Product(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-rating', 'id'], name='kartapp_product_rating_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -315,3 +320,81 @@ class Testimonial(models.Model):
     
     def __str__(self):
         return self.name
+
+
+class ProductSalesRank(models.Model):
+    """Best-seller ranking, refreshed periodically by the refresh_sales_rank command"""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='sales_rank')
+    rank = models.PositiveIntegerField(db_index=True)
+    order_count = models.PositiveIntegerField(default=0)
+    units_sold = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['rank']
+    
+    def __str__(self):
+        return f"#{self.rank} {self.product.name}"
+
+
+class ProductChange(models.Model):
+    """
+    Products whose search or facet data changed, read by every web process
+    to refresh its in-memory indexes (see kartapp.catalog_changes)
+    """
+    # Not a foreign key, deleted products are recorded too; None means every product
+    product_id = models.BigIntegerField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Product {self.product_id or 'all'} changed at {self.created_at}"
+
+
+
+class DailySales(models.Model):
+    """Shop-wide sales per day, kept up to date by kartapp.analytics"""
+    date = models.DateField(unique=True)
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        ordering = ['date']
+        verbose_name_plural = 'Daily sales'
+    
+    def __str__(self):
+        return f"Sales on {self.date}"
+
+
+class DailyCategorySales(models.Model):
+    """Sales per category per day (orders counts orders with at least one product of the category)"""
+    date = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='daily_sales')
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        ordering = ['date']
+        unique_together = ('date', 'category')
+        verbose_name_plural = 'Daily category sales'
+    
+    def __str__(self):
+        return f"{self.category.name} on {self.date}"
+
+
+class DailyProductSales(models.Model):
+    """Sales per product per day"""
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        ordering = ['date']
+        unique_together = ('date', 'product')
+        verbose_name_plural = 'Daily product sales'
+    
+    def __str__(self):
+        return f"{self.product.name} on {self.date}"
@@ -0,0 +1,61 @@
+"""
+Keyset (seek) pagination cursors for the product list.
+
+A cursor is the sort key of the last (or first) product of a page, encoded
+for the URL. The next page starts right after that key instead of skipping
+OFFSET rows, so deep pages cost the same as the first one and a page does
+not shift when products are added in front of it.
+"""
+import base64
+import json
+
+
+PER_PAGE = 24
+
+# Fields the product list needs (see components/product_card.html); the long
+# description/specifications text is left in the database
+LISTING_FIELDS = [
+    'id', 'name', 'slug', 'image', 'price', 'original_price', 'discount_percentage',
+    'stock', 'in_stock', 'rating', 'num_reviews', 'delivery_days', 'is_bulk_available',
+]
+
+
+def encode_cursor(values):
+    data = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(token, length=None):
+    """Values of a cursor, None when token is empty or not a valid cursor"""
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or (length is not None and len(values) != length):
+        return None
+    return values
+
+
+def decode_sort_key(token):
+    """Facet index sort key ([number, number], see kartapp.facets.SORT_KEYS) from a cursor"""
+    values = decode_cursor(token, length=2)
+    if values is None or not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+        return None
+    return values
+
+
+def page_urls(request, next_cursor, previous_cursor):
+    """Query strings for the next/previous page links, keeping the other filters"""
+    urls = {}
+    for name, cursor in (('next', next_cursor), ('previous', previous_cursor)):
+        if cursor is None:
+            urls[name] = None
+            continue
+        params = request.GET.copy()
+        params.pop('after', None)
+        params.pop('before', None)
+        params['after' if name == 'next' else 'before'] = cursor
+        urls[name] = '?' + params.urlencode()
+    return urls['next'], urls['previous']
@@ -0,0 +1,80 @@
+"""
+Product rating aggregates kept in sync with ProductReview.
+
+Product.rating_sum and Product.num_reviews are adjusted with F() expressions
+whenever a review is created, changed or deleted (see kartapp.signals), and
+Product.rating is recomputed from them in the same UPDATE. Listings and the
+rating sort read the stored column instead of averaging reviews.
+
+Queryset update()/bulk_create() on reviews skip the signals; the
+reconcile_ratings command recomputes everything from the reviews.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, FloatField, Sum, Value, When
+from django.db.models.functions import Cast, Round
+
+from . import catalog_changes
+from .models import Product, ProductReview
+from .facets import facet_index
+
+
+def average(rating_sum, num_reviews):
+    if not num_reviews:
+        return Decimal('0')
+    return (Decimal(rating_sum) / num_reviews).quantize(Decimal('0.01'), ROUND_HALF_UP)
+
+
+def apply_review_delta(product_id, rating_delta, count_delta):
+    """Add rating_delta to the product's rating sum and count_delta to its review count, atomically"""
+    new_sum = F('rating_sum') + rating_delta
+    new_count = F('num_reviews') + count_delta
+    # The right hand sides all see the old row, so the average uses the new values computed above
+    rating = Case(
+        When(num_reviews=-count_delta, then=Value(0.0)),
+        default=Round(Cast(new_sum, FloatField()) / new_count, 2),
+        output_field=DecimalField(max_digits=3, decimal_places=2),
+    )
+    Product.objects.filter(pk=product_id).update(rating_sum=new_sum, num_reviews=new_count, rating=rating)
+    # update() sends no signals, the facet index sorts by rating
+    catalog_changes.record([product_id])
+    transaction.on_commit(lambda: facet_index.update_products([product_id]))
+
+
+def review_saved(previous, review):
+    """previous: (product_id, rating) before the save, None for a new review"""
+    if previous is None:
+        apply_review_delta(review.product_id, review.rating, 1)
+        return
+    product_id, rating = previous
+    if product_id != review.product_id:
+        apply_review_delta(product_id, -rating, -1)
+        apply_review_delta(review.product_id, review.rating, 1)
+    elif rating != review.rating:
+        apply_review_delta(product_id, review.rating - rating, 0)
+
+
+def review_deleted(review):
+    apply_review_delta(review.product_id, -review.rating, -1)
+
+
+def expected_aggregates():
+    """{product id: (rating sum, review count)} from all reviews, one grouped query"""
+    rows = ProductReview.objects.values('product').annotate(total=Sum('rating'), count=Count('id')).order_by()
+    return {row['product']: (row['total'], row['count']) for row in rows}
+
+
+def find_drift(batch_size=5000):
+    """
+    Yield (product id, name, stored, expected) for every product whose stored
+    aggregates are off; stored and expected are (rating sum, count, rating).
+    """
+    expected = expected_aggregates()
+    rows = Product.objects.values_list('id', 'name', 'rating_sum', 'num_reviews', 'rating').order_by('id')
+    for product_id, name, rating_sum, num_reviews, rating in rows.iterator(chunk_size=batch_size):
+        expected_sum, expected_count = expected.get(product_id, (0, 0))
+        expected_rating = average(expected_sum, expected_count)
+        # The database rounds a float average, allow it to be one cent off
+        if rating_sum != expected_sum or num_reviews != expected_count or abs(rating - expected_rating) > Decimal('0.01'):
+            yield product_id, name, (rating_sum, num_reviews, rating), (expected_sum, expected_count, expected_rating)
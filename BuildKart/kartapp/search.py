@@ -0,0 +1,368 @@
+"""
+Product search backends.
+
+Two interchangeable backends index active products by name, brand, category
+and description (weighted in that order) and return ranked product ids:
+
+* InvertedIndexBackend - an in-process inverted index, built lazily from the
+  database. Works on any database, but every process keeps its own copy and
+  catches up with the changes made elsewhere (see kartapp.catalog_changes).
+* SQLiteFTS5Backend - an FTS5 virtual table stored next to the other tables,
+  created by migration 0006 when the database is SQLite with FTS5 compiled in,
+  and then used automatically.
+
+The KARTAPP_SEARCH_BACKEND setting picks one ('memory', 'fts5' or 'auto',
+the default). kartapp.signals keeps the index in sync with Product, Brand and
+Category changes.
+"""
+import bisect
+import re
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+from .catalog_changes import ChangeFeed
+from .models import Product
+
+
+# Field -> weight of a match in that field
+FIELD_WEIGHTS = {
+    'name': 5.0,
+    'brand': 3.0,
+    'category': 2.0,
+    'description': 1.0,
+}
+
+# Matches through a prefix or a typo count for less than exact matches
+PREFIX_FACTOR = 0.6
+FUZZY_FACTOR = 0.4
+
+# A single letter matches most of the catalogue, suggestions start at two
+AUTOCOMPLETE_MIN_LENGTH = 2
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+def within_one_edit(a, b):
+    """True when a and b differ by at most one insertion, deletion, substitution or swap of neighbours"""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        if a[i + 1:] == b[i + 1:]:
+            return True
+        # Neighbouring letters swapped ("amubja" for "ambuja")
+        return i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+    return a[i:] == b[i + 1:]
+
+
+def fuzzy_terms(token, vocabulary, prefix=False):
+    """
+    Terms of vocabulary one edit away from token (for prefix tokens: terms
+    starting with something one edit away from it).
+
+    Callers pass only the terms sharing the token's first letter; typos in
+    the first letter are rare and scanning the whole vocabulary is not cheap.
+    """
+    if len(token) < 3:
+        # Too short to guess what was meant
+        return []
+    matches = []
+    for term in vocabulary:
+        if prefix:
+            if any(within_one_edit(token, term[:length]) for length in (len(token) - 1, len(token), len(token) + 1)):
+                matches.append(term)
+        elif within_one_edit(token, term):
+            matches.append(term)
+    return matches
+
+
+def product_documents(queryset):
+    """Yield (id, {field: text}) for the active products of queryset"""
+    rows = queryset.filter(is_active=True).values_list(
+        'id', 'name', 'brand__name', 'category__name', 'description'
+    ).order_by()
+    for product_id, name, brand, category, description in rows.iterator(chunk_size=2000):
+        yield product_id, {
+            'name': name,
+            'brand': brand or '',
+            'category': category or '',
+            'description': description or '',
+        }
+
+
+class InvertedIndexBackend:
+    """In-process inverted index: term -> {product id: weight}"""
+    name = 'memory'
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.postings = {}
+        self.doc_terms = {}
+        self.terms = []  # sorted vocabulary, for prefix lookups
+        self.ready = False
+        self.feed = ChangeFeed()
+
+    def _ensure_ready(self):
+        changed = self.feed.changed_products() if self.ready else None
+        if changed is None:
+            self.rebuild()
+        elif changed:
+            self._update(changed)
+
+    def _add(self, product_id, fields, keep_sorted=True):
+        weights = {}
+        for field, text in fields.items():
+            for token in set(tokenize(text)):
+                weights[token] = weights.get(token, 0.0) + FIELD_WEIGHTS[field]
+        for token, weight in weights.items():
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = {}
+                if keep_sorted:
+                    bisect.insort(self.terms, token)
+            posting[product_id] = weight
+        self.doc_terms[product_id] = tuple(weights)
+
+    def _remove(self, product_id):
+        for token in self.doc_terms.pop(product_id, ()):
+            posting = self.postings[token]
+            posting.pop(product_id, None)
+            if not posting:
+                del self.postings[token]
+                del self.terms[bisect.bisect_left(self.terms, token)]
+
+    def rebuild(self):
+        with self.lock:
+            self.postings = {}
+            self.doc_terms = {}
+            self.feed.start()
+            for product_id, fields in product_documents(Product.objects.all()):
+                self._add(product_id, fields, keep_sorted=False)
+            self.terms = sorted(self.postings)
+            self.ready = True
+
+    def index_products(self, product_ids):
+        """(Re)index the given products; inactive or deleted ones are dropped"""
+        with self.lock:
+            if not self.ready:
+                # The first search builds everything anyway
+                return
+            self._update(product_ids)
+
+    def _update(self, product_ids):
+        product_ids = set(product_ids)
+        for product_id in product_ids:
+            self._remove(product_id)
+        for product_id, fields in product_documents(Product.objects.filter(id__in=product_ids)):
+            self._add(product_id, fields)
+
+    def remove_products(self, product_ids):
+        with self.lock:
+            for product_id in product_ids:
+                self._remove(product_id)
+
+    def _prefix_terms(self, token):
+        start = bisect.bisect_left(self.terms, token)
+        end = bisect.bisect_left(self.terms, token + '\uffff')
+        return self.terms[start:end]
+
+    def _token_scores(self, token, prefix, fuzzy):
+        scores = {}
+
+        def collect(terms, factor):
+            for term in terms:
+                for product_id, weight in self.postings[term].items():
+                    score = weight * factor
+                    if score > scores.get(product_id, 0.0):
+                        scores[product_id] = score
+
+        if token in self.postings:
+            collect([token], 1.0)
+        if prefix:
+            collect([term for term in self._prefix_terms(token) if term != token], PREFIX_FACTOR)
+        if not scores and fuzzy:
+            collect(fuzzy_terms(token, self._prefix_terms(token[0]), prefix=prefix), FUZZY_FACTOR)
+        return scores
+
+    def search(self, query, limit=None, prefix=True, fuzzy=False):
+        """
+        Return ids of the active products matching every word of query, best first.
+
+        With prefix=True the last word also matches longer terms ("cem" finds
+        "cement"); with fuzzy=True words without any match are retried with
+        one typo allowed.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        with self.lock:
+            self._ensure_ready()
+            total = None
+            for position, token in enumerate(tokens):
+                scores = self._token_scores(token, prefix and position == len(tokens) - 1, fuzzy)
+                if total is None:
+                    total = scores
+                else:
+                    total = {product_id: score + scores[product_id] for product_id, score in total.items() if product_id in scores}
+                if not total:
+                    return []
+        ranked = sorted(total, key=lambda product_id: (-total[product_id], product_id))
+        return ranked[:limit] if limit else ranked
+
+    def autocomplete(self, query, limit=10):
+        if len(query.strip()) < AUTOCOMPLETE_MIN_LENGTH:
+            return []
+        return self.search(query, limit=limit, prefix=True, fuzzy=True)
+
+
+class SQLiteFTS5Backend:
+    """
+    Search through an FTS5 table whose rowid is the product id. The table is
+    shared by all processes, so every change is indexed once by the process
+    that made it.
+    """
+    name = 'fts5'
+    table = 'kartapp_product_fts'
+    vocab_table = 'kartapp_product_fts_vocab'
+
+    @classmethod
+    def is_supported(cls):
+        """True if migration 0006 created the FTS5 tables (SQLite with FTS5 only)"""
+        if connection.vendor != 'sqlite':
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [cls.table])
+            return cursor.fetchone() is not None
+
+    def _insert(self, cursor, documents):
+        batch = []
+        sql = 'INSERT INTO %s (rowid, %s) VALUES (%%s, %s)' % (
+            self.table, ', '.join(FIELD_WEIGHTS), ', '.join(['%s'] * len(FIELD_WEIGHTS))
+        )
+        for product_id, fields in documents:
+            batch.append([product_id] + [fields[field] for field in FIELD_WEIGHTS])
+            if len(batch) >= 1000:
+                cursor.executemany(sql, batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+
+    def _delete(self, cursor, product_ids):
+        product_ids = list(product_ids)
+        for start in range(0, len(product_ids), 500):
+            chunk = product_ids[start:start + 500]
+            cursor.execute(
+                'DELETE FROM %s WHERE rowid IN (%s)' % (self.table, ', '.join(['%s'] * len(chunk))), chunk
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM %s' % self.table)
+            self._insert(cursor, product_documents(Product.objects.all()))
+
+    def index_products(self, product_ids):
+        product_ids = set(product_ids)
+        with connection.cursor() as cursor:
+            self._delete(cursor, product_ids)
+            self._insert(cursor, product_documents(Product.objects.filter(id__in=product_ids)))
+
+    def remove_products(self, product_ids):
+        with connection.cursor() as cursor:
+            self._delete(cursor, product_ids)
+
+    def _has_terms(self, cursor, token, prefix):
+        if prefix:
+            cursor.execute('SELECT 1 FROM %s WHERE term >= %%s AND term < %%s LIMIT 1' % self.vocab_table, [token, token + '\uffff'])
+        else:
+            cursor.execute('SELECT 1 FROM %s WHERE term = %%s' % self.vocab_table, [token])
+        return cursor.fetchone() is not None
+
+    def _fuzzy_terms(self, cursor, token, prefix):
+        cursor.execute(
+            'SELECT term FROM %s WHERE term >= %%s AND term < %%s AND length(term) >= %%s' % self.vocab_table,
+            [token[0], token[0] + '\uffff', len(token) - 1],
+        )
+        return fuzzy_terms(token, [row[0] for row in cursor.fetchall()], prefix=prefix)
+
+    def _match_expression(self, cursor, tokens, prefix, fuzzy):
+        parts = []
+        for position, token in enumerate(tokens):
+            is_prefix = prefix and position == len(tokens) - 1
+            if fuzzy and not self._has_terms(cursor, token, is_prefix):
+                terms = self._fuzzy_terms(cursor, token, is_prefix)
+                if not terms:
+                    return None
+                parts.append('(%s)' % ' OR '.join('"%s"%s' % (term, '*' if is_prefix else '') for term in terms))
+            else:
+                parts.append('"%s"%s' % (token, '*' if is_prefix else ''))
+        return ' AND '.join(parts)
+
+    def search(self, query, limit=None, prefix=True, fuzzy=False):
+        """Same contract as InvertedIndexBackend.search, ranked by bm25 with the field weights"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        weights = ', '.join(str(weight) for weight in FIELD_WEIGHTS.values())
+        with connection.cursor() as cursor:
+            expression = self._match_expression(cursor, tokens, prefix, fuzzy)
+            if expression is None:
+                return []
+            sql = 'SELECT rowid FROM {table} WHERE {table} MATCH %s ORDER BY bm25({table}, {weights}), rowid'.format(
+                table=self.table, weights=weights
+            )
+            params = [expression]
+            if limit:
+                sql += ' LIMIT %s'
+                params.append(limit)
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+    def autocomplete(self, query, limit=10):
+        if len(query.strip()) < AUTOCOMPLETE_MIN_LENGTH:
+            return []
+        return self.search(query, limit=limit, prefix=True, fuzzy=True)
+
+
+BACKENDS = {
+    InvertedIndexBackend.name: InvertedIndexBackend,
+    SQLiteFTS5Backend.name: SQLiteFTS5Backend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend():
+    """Return the process-wide search backend chosen by KARTAPP_SEARCH_BACKEND"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                name = getattr(settings, 'KARTAPP_SEARCH_BACKEND', 'auto')
+                if name == 'auto':
+                    name = SQLiteFTS5Backend.name if SQLiteFTS5Backend.is_supported() else InvertedIndexBackend.name
+                _backend = BACKENDS[name]()
+    return _backend
+
+
+def search_products(query, limit=None):
+    return get_search_backend().search(query, limit=limit)
+
+
+def ordered_products(product_ids, queryset=None):
+    """Products with the given ids, in the order of the ids"""
+    queryset = Product.objects.all() if queryset is None else queryset
+    products = queryset.in_bulk(product_ids)
+    return [products[product_id] for product_id in product_ids if product_id in products]
@@ -0,0 +1,106 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .models import Category, Brand, Product, ProductReview, Order, Testimonial
+from .home_sections import invalidate_for_model
+from .search import get_search_backend
+from .facets import facet_index
+from .images import IMAGE_FIELDS, schedule_derivatives
+from . import analytics, catalog_changes, ratings
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Testimonial)
+@receiver(post_delete, sender=Testimonial)
+def invalidate_home_sections(sender, **kwargs):
+    """Drop the cached homepage sections that depend on the changed model"""
+    invalidate_for_model(sender)
+
+
+def _reindex_products(product_ids):
+    catalog_changes.record(product_ids)
+    get_search_backend().index_products(product_ids)
+    facet_index.update_products(product_ids)
+
+
+def _unindex_products(product_ids):
+    catalog_changes.record(product_ids)
+    get_search_backend().remove_products(product_ids)
+    facet_index.remove_products(product_ids)
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    """Reindex a saved product (search and facets) once its transaction commits"""
+    product_id = instance.pk
+    transaction.on_commit(lambda: _reindex_products([product_id]))
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    product_id = instance.pk
+    transaction.on_commit(lambda: _unindex_products([product_id]))
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Category)
+def reindex_related_products(sender, instance, created, **kwargs):
+    """Brand and category names are indexed with every product that uses them"""
+    if created:
+        return
+    product_ids = list(instance.products.values_list('id', flat=True))
+    if product_ids:
+        catalog_changes.record(product_ids)
+        transaction.on_commit(lambda: get_search_backend().index_products(product_ids))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Brand)
+def queue_image_derivatives(sender, instance, **kwargs):
+    """Render thumbnails of new uploads in the background (images that already have them are skipped)"""
+    name = getattr(instance, dict(IMAGE_FIELDS)[sender._meta.label]).name
+    if name:
+        transaction.on_commit(lambda: schedule_derivatives([name]))
+
+
+@receiver(pre_save, sender=ProductReview)
+def remember_review_rating(sender, instance, **kwargs):
+    """Keep the stored product and rating of an edited review for the aggregate delta"""
+    instance._previous_rating = None
+    if instance.pk:
+        instance._previous_rating = sender.objects.filter(pk=instance.pk).values_list('product_id', 'rating').first()
+
+
+@receiver(post_save, sender=ProductReview)
+def update_rating_on_save(sender, instance, **kwargs):
+    ratings.review_saved(getattr(instance, '_previous_rating', None), instance)
+
+
+@receiver(post_delete, sender=ProductReview)
+def update_rating_on_delete(sender, instance, **kwargs):
+    ratings.review_deleted(instance)
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_status(sender, instance, **kwargs):
+    instance._previous_status = None
+    if instance.pk:
+        instance._previous_status = sender.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=Order)
+def update_sales_on_status_change(sender, instance, created, **kwargs):
+    """Cancelling an order takes it out of the sales rollups, undoing the cancellation puts it back"""
+    previous = getattr(instance, '_previous_status', None)
+    if not created and previous is not None:
+        analytics.order_status_changed(instance, previous)
+
+
+@receiver(pre_delete, sender=Order)
+def update_sales_on_delete(sender, instance, **kwargs):
+    analytics.order_deleted(instance)
@@ -0,0 +1,54 @@
+"""
+Template tags for responsive product, category and brand images.
+
+    {% load kartapp_images %}
+    {% responsive_image product.image alt=product.name sizes="(max-width: 576px) 50vw, 240px" %}
+
+Until the derivatives of an image exist (see kartapp.images) the original is
+rendered as before.
+"""
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+from kartapp.images import get_derivatives
+
+register = template.Library()
+
+
+def _srcset(variants):
+    return ', '.join(f'{default_storage.url(name)} {width}w' for width, name in variants)
+
+
+@register.simple_tag
+def srcset(image, fmt=None):
+    """srcset value for an image field ('' until its derivatives exist); fmt 'webp' picks the WebP variants"""
+    manifest = get_derivatives(image.name if image else None)
+    if manifest is None:
+        return ''
+    return _srcset(manifest['variants'].get(fmt or manifest['fallback'], []))
+
+
+@register.simple_tag
+def responsive_image(image, alt='', sizes='100vw', css_class='', loading='lazy', style=''):
+    """<picture> with a WebP source and a srcset <img>, or a plain <img> of the original"""
+    if not image:
+        return ''
+    manifest = get_derivatives(image.name)
+    if manifest is None:
+        return format_html('<img src="{}" alt="{}" class="{}" style="{}" loading="{}">', image.url, alt, css_class, style, loading)
+
+    fallback = manifest['variants'][manifest['fallback']]
+    webp = manifest['variants'].get('webp')
+    width, largest = fallback[-1]
+    height = round(manifest['height'] * width / manifest['width'])
+    img = format_html(
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" class="{}" style="{}" loading="{}">',
+        default_storage.url(largest), _srcset(fallback), sizes, width, height, alt, css_class, style, loading,
+    )
+    if not webp:
+        return img
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">{}</picture>',
+        _srcset(webp), sizes, img,
+    )
@@ -1,5 +1,6 @@
 from django.urls import path
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from . import views
 
 urlpatterns = [
@@ -13,6 +14,7 @@ urlpatterns = [
     
     # Search - Protected
     path('search/', login_required(views.search), name='search'),
+    path('search/suggest/', login_required(views.search_suggest), name='search_suggest'),
     
     # Cart - Protected
     path('cart/', login_required(views.cart), name='cart'),
@@ -37,6 +39,10 @@ urlpatterns = [
     path('address/delete/<int:address_id>/', login_required(views.delete_address), name='delete_address'),
     path('profile/', login_required(views.profile), name='profile'),
     
+    # Sales analytics - Staff only
+    path('analytics/sales/', staff_member_required(views.sales_dashboard), name='sales_dashboard'),
+    path('analytics/sales/data/', login_required(views.sales_api), name='sales_api'),
+    
     # Auth
     path('login/', views.login_view, name='login'),
     path('register/', views.register, name='register'),
@@ -5,12 +5,20 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
+from django.urls import reverse
 from django.db.models import Q, Avg, Count
 from .models import (
     Category, Brand, Product, ProductReview, CartItem, 
     Wishlist, Address, Order, OrderItem, UserProfile, Testimonial
 )
 from .forms import UserProfileForm, AddressForm
+from .home_sections import get_home_sections, get_active_categories
+from .search import get_search_backend, search_products, ordered_products
+from .facets import facet_index, brand_facets, price_facets
+from .cart import get_cart
+from .checkout import place_order, OutOfStock, EmptyCart
+from .analytics import report_range, sales_report
+from .pagination import PER_PAGE, LISTING_FIELDS, encode_cursor, decode_sort_key, page_urls
 import random
 
 
@@ -23,34 +31,15 @@ def home_redirect(request):
 
 def home(request):
     """Homepage with categories, featured products, testimonials"""
-    categories = Category.objects.filter(is_active=True)[:8]
-    featured_products = Product.objects.filter(is_active=True, is_featured=True)[:12]
-    best_sellers = Product.objects.filter(is_active=True).annotate(
-        order_count=Count('orderitem')
-    ).order_by('-order_count')[:8]
-    testimonials = Testimonial.objects.filter(is_active=True)[:5]
-    
-    # Get products by category
-    cement_products = Product.objects.filter(category__slug='cement', is_active=True)[:4]
-    steel_products = Product.objects.filter(category__slug='steel', is_active=True)[:4]
-    bricks_products = Product.objects.filter(category__slug='bricks', is_active=True)[:4]
-    
-    context = {
-        'categories': categories,
-        'featured_products': featured_products,
-        'best_sellers': best_sellers,
-        'testimonials': testimonials,
-        'cement_products': cement_products,
-        'steel_products': steel_products,
-        'bricks_products': bricks_products,
-    }
+    # Every section is cached separately and invalidated by kartapp.signals
+    context = get_home_sections()
     return render(request, 'kartapp/home.html', context)
 
 
 def product_list(request, category_slug=None):
     """Product listing with filters"""
     category = None
-    categories = Category.objects.filter(is_active=True)
+    categories = get_active_categories()
     
     # Get filter parameters
     search_query = request.GET.get('q', '')
@@ -60,55 +49,54 @@ def product_list(request, category_slug=None):
     max_price = request.GET.get('max_price', '')
     in_stock = request.GET.get('in_stock', '')
     
-    products = Product.objects.filter(is_active=True)
-    
     # Category filter
     if category_slug:
         category = get_object_or_404(Category, slug=category_slug)
-        products = products.filter(category=category)
-    
-    # Search filter
-    if search_query:
-        products = products.filter(
-            Q(name__icontains=search_query) | 
-            Q(brand__name__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
     
-    # Brand filter
-    if brand_filter:
-        products = products.filter(brand__slug=brand_filter)
-    
-    # Price filter
-    if min_price:
-        products = products.filter(price__gte=float(min_price))
-    if max_price:
-        products = products.filter(price__lte=float(max_price))
-    
-    # Stock filter
-    if in_stock:
-        products = products.filter(stock__gt=0)
-    
-    # Sorting
-    if sort_by == 'price_low':
-        products = products.order_by('price')
-    elif sort_by == 'price_high':
-        products = products.order_by('-price')
-    elif sort_by == 'rating':
-        products = products.order_by('-rating')
-    else:
-        products = products.order_by('-created_at')
+    # Search filter: every hit, the facet index sorts them and pages with the keyset cursor
+    search_ids = search_products(search_query) if search_query else None
     
-    # Get brands for filter
-    brands = Brand.objects.filter(is_active=True, products__in=products).distinct()
+    # Brand filter (an unknown slug matches nothing)
+    brand_id = None
+    if brand_filter:
+        brand_id = Brand.objects.filter(slug=brand_filter).values_list('id', flat=True).first() or 0
+    
+    # Category, brand, price and stock filters, sorting and facet counts all come from the facet index
+    result = facet_index.query(
+        category_id=category.id if category else None,
+        brand_id=brand_id,
+        min_price=_parse_price(min_price),
+        max_price=_parse_price(max_price),
+        in_stock=bool(in_stock),
+        product_ids=search_ids,
+        sort=sort_by,
+        limit=PER_PAGE,
+        after=decode_sort_key(request.GET.get('after')),
+        before=decode_sort_key(request.GET.get('before')),
+    )
+    products = ordered_products(result.ids, Product.objects.only(*LISTING_FIELDS))
+    next_url, previous_url = page_urls(
+        request,
+        encode_cursor(result.next_key) if result.next_key else None,
+        encode_cursor(result.previous_key) if result.previous_key else None,
+    )
     
     context = {
         'products': products,
+        'product_count': result.count,
+        'next_url': next_url,
+        'previous_url': previous_url,
         'categories': categories,
         'category': category,
-        'brands': brands,
+        'brands': brand_facets(result.brand_counts),
+        'price_facets': price_facets(result.price_histogram),
+        'stock_counts': result.stock_counts,
         'search_query': search_query,
         'sort_by': sort_by,
+        'brand_filter': brand_filter,
+        'min_price': min_price,
+        'max_price': max_price,
+        'in_stock': in_stock,
     }
     return render(request, 'kartapp/product_list.html', context)
 
@@ -154,52 +142,23 @@ def add_to_cart(request, product_id):
             'message': 'Sorry, required quantity not available in stock'
         })
     
-    if request.user.is_authenticated:
-        cart_item, created = CartItem.objects.get_or_create(
-            user=request.user,
-            product=product,
-            defaults={'quantity': quantity}
-        )
-        if not created:
-            cart_item.quantity += quantity
-            cart_item.save()
-    else:
-        session_key = request.session.session_key
-        if not session_key:
-            request.session.create()
-            session_key = request.session.session_key
-        
-        cart_item, created = CartItem.objects.get_or_create(
-            session_key=session_key,
-            product=product,
-            defaults={'quantity': quantity}
-        )
-        if not created:
-            cart_item.quantity += quantity
-            cart_item.save()
+    cart = get_cart(request)
+    cart.add(product, quantity)
     
-    cart_count = get_cart_count(request)
     return JsonResponse({
         'success': True, 
         'message': f'{product.name} added to cart!',
-        'cart_count': cart_count
+        'cart_count': cart.count
     })
 
 
 def cart(request):
     """Shopping cart page"""
-    cart_items = get_cart_items(request)
-    subtotal = sum(item.get_total_price() for item in cart_items)
-    shipping = 0 if subtotal >= 5000 else 500
-    tax = (subtotal * 0.18)  # 18% GST
-    total = subtotal + shipping + tax
+    cart = get_cart(request)
     
     context = {
-        'cart_items': cart_items,
-        'subtotal': subtotal,
-        'shipping': shipping,
-        'tax': tax,
-        'total': total,
+        'cart_items': cart.items,
+        **cart.summary(),
     }
     return render(request, 'kartapp/cart.html', context)
 
@@ -207,7 +166,7 @@ def cart(request):
 @require_POST
 def update_cart(request, item_id):
     """Update cart item quantity"""
-    cart_item = get_object_or_404(CartItem, id=item_id)
+    cart_item = get_object_or_404(get_cart(request).queryset.select_related('product'), id=item_id)
     quantity = int(request.POST.get('quantity', 1))
     
     if quantity < 1:
@@ -227,7 +186,7 @@ def update_cart(request, item_id):
 @require_POST
 def remove_from_cart(request, item_id):
     """Remove item from cart"""
-    cart_item = get_object_or_404(CartItem, id=item_id)
+    cart_item = get_object_or_404(get_cart(request).queryset, id=item_id)
     cart_item.delete()
     messages.success(request, 'Item removed from cart!')
     return redirect('cart')
@@ -236,17 +195,13 @@ def remove_from_cart(request, item_id):
 @login_required
 def checkout(request):
     """Checkout page"""
-    cart_items = CartItem.objects.filter(user=request.user)
+    cart = get_cart(request)
+    cart_items = cart.items
     
-    if not cart_items.exists():
+    if not cart_items:
         messages.warning(request, 'Your cart is empty!')
         return redirect('cart')
     
-    subtotal = sum(item.get_total_price() for item in cart_items)
-    shipping = 0 if subtotal >= 5000 else 500
-    tax = (subtotal * 0.18)
-    total = subtotal + shipping + tax
-    
     addresses = Address.objects.filter(user=request.user)
     
     if request.method == 'POST':
@@ -259,43 +214,23 @@ def checkout(request):
             messages.error(request, 'Please select a shipping address!')
             return redirect('checkout')
         
-        # Create order
-        order = Order.objects.create(
-            user=request.user,
-            shipping_address=address,
-            payment_method=payment_method,
-            subtotal=subtotal,
-            shipping_cost=shipping,
-            tax=tax,
-            total=total,
-            status='confirmed'
-        )
-        
-        # Create order items
-        for item in cart_items:
-            OrderItem.objects.create(
-                order=order,
-                product=item.product,
-                quantity=item.quantity,
-                price=item.product.price,
-                total=item.get_total_price()
-            )
-            # Reduce stock
-            item.product.stock -= item.quantity
-            item.product.save()
-        
-        # Clear cart
-        cart_items.delete()
+        # Stock is reserved, the order created and the cart emptied in one transaction
+        try:
+            order = place_order(request.user, address, payment_method)
+        except OutOfStock as e:
+            names = ', '.join(product.name for product in e.products)
+            messages.error(request, f'Sorry, not enough stock left for: {names}')
+            return redirect('cart')
+        except EmptyCart:
+            messages.warning(request, 'Your cart is empty!')
+            return redirect('cart')
         
         messages.success(request, f'Order placed successfully! Order #{order.order_number}')
         return redirect('order_confirmation', order_id=order.id)
     
     context = {
         'cart_items': cart_items,
-        'subtotal': subtotal,
-        'shipping': shipping,
-        'tax': tax,
-        'total': total,
+        **cart.summary(),
         'addresses': addresses,
     }
     return render(request, 'kartapp/checkout.html', context)
@@ -503,13 +438,10 @@ def search(request):
     products = []
     
     if query:
-        products = Product.objects.filter(
-            Q(name__icontains=query) |
-            Q(brand__name__icontains=query) |
-            Q(category__name__icontains=query) |
-            Q(description__icontains=query),
-            is_active=True
-        )[:20]
+        products = ordered_products(
+            search_products(query, limit=20),
+            Product.objects.filter(is_active=True).select_related('category', 'brand'),
+        )
     
     context = {
         'query': query,
@@ -518,25 +450,47 @@ def search(request):
     return render(request, 'kartapp/search.html', context)
 
 
-# Helper functions
-def get_cart_items(request):
-    if request.user.is_authenticated:
-        return CartItem.objects.filter(user=request.user)
-    else:
-        session_key = request.session.session_key
-        if not session_key:
-            request.session.create()
-            session_key = request.session.session_key
-        return CartItem.objects.filter(session_key=session_key)
+def search_suggest(request):
+    """Autocomplete suggestions for the search box (typo tolerant)"""
+    query = request.GET.get('q', '')
+    product_ids = get_search_backend().autocomplete(query, limit=8) if query else []
+    products = ordered_products(product_ids, Product.objects.filter(is_active=True).only('id', 'name', 'price'))
+    return JsonResponse({
+        'results': [
+            {'id': product.id, 'name': product.name, 'price': str(product.price), 'url': reverse('product_detail', args=[product.id])}
+            for product in products
+        ]
+    })
 
 
-def get_cart_count(request):
-    cart_items = get_cart_items(request)
-    return sum(item.quantity for item in cart_items)
+def sales_dashboard(request):
+    """Sales analytics for staff: totals, daily sales and top categories/products of a date range"""
+    try:
+        start, end = report_range(request.GET.get('start'), request.GET.get('end'))
+    except ValueError as error:
+        messages.error(request, f'Invalid date range: {error}')
+        start, end = report_range()
+    report = sales_report(start, end)
+    best_day = max((day['revenue'] for day in report['days']), default=0)
+    for day in report['days']:
+        day['share'] = int(day['revenue'] * 100 / best_day) if best_day else 0
+    return render(request, 'kartapp/sales_dashboard.html', {'report': report, 'title': 'Sales analytics'})
+
+
+def sales_api(request):
+    """The sales report as JSON: ?start=YYYY-MM-DD&end=YYYY-MM-DD (default: the last 30 days)"""
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Staff only'}, status=403)
+    try:
+        start, end = report_range(request.GET.get('start'), request.GET.get('end'))
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    return JsonResponse(sales_report(start, end))
 
 
-def cart_context(request):
-    """Context processor for cart"""
-    cart_count = get_cart_count(request)
-    cart_total = sum(item.get_total_price() for item in get_cart_items(request))
-    return {'cart_count': cart_count, 'cart_total': cart_total}
+# Helper functions
+def _parse_price(value):
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
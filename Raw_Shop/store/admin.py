@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Category, Order,Product,Cart,CartItem,OrderItem
+from django.utils import timezone
+from .models import Category, Order,Product,Cart,CartItem,OrderItem,OutboxEmail
 
 # Register your models here.
 admin.site.register(Category)
@@ -7,4 +8,17 @@ admin.site.register(Product)
 admin.site.register(Cart)
 admin.site.register(CartItem)
 admin.site.register(Order)
-admin.site.register(OrderItem)
\ No newline at end of file
+admin.site.register(OrderItem)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'order', 'recipient', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'kind']
+    search_fields = ['recipient', 'order__id']
+    readonly_fields = ['claimed_by', 'claimed_at', 'last_error', 'created_at', 'sent_at']
+    actions = ['retry_now']
+
+    @admin.action(description='Retry selected emails now')
+    def retry_now(self, request, queryset):
+        queryset.exclude(status='sent').update(status='pending', next_attempt_at=timezone.now(), attempts=0)
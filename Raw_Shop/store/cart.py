@@ -0,0 +1,100 @@
+"""
+Cart pricing for the cart, checkout and order views.
+
+A cart is priced with one query: the lines come with their product
+(select_related), each line's total is annotated and the grand total rides
+along as a window sum. Priced carts are cached per cart between page views;
+the cart views call invalidate() after changing a cart and store.signals
+does so for carts holding a product whose price changed. Orders are always
+priced from the database, never from the cache.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Sum, Window
+
+from . import analytics
+from .models import CartItem, Order, OrderItem
+from .money import ZERO, to_money
+from .utils import send_order_confirmation_email
+
+
+CACHE_PREFIX = 'store:cart:'
+DEFAULT_TIMEOUT = 60 * 30
+
+
+class PricedCart:
+    """Cart lines (CartItems with .item_total and their product) plus the totals"""
+
+    def __init__(self, lines):
+        # SQLite hands back computed decimals unrounded
+        for line in lines:
+            line.item_total = to_money(line.item_total)
+        self.lines = lines
+        self.total = to_money(lines[0].cart_total) if lines else ZERO
+        self.count = sum(line.quantity for line in lines)
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __bool__(self):
+        return bool(self.lines)
+
+
+def _key(cart_id):
+    return f'{CACHE_PREFIX}{cart_id}'
+
+
+def price_cart(cart):
+    """Price the cart from the database, one query regardless of the number of lines"""
+    line_total = F('quantity') * F('product__price')
+    lines = list(
+        CartItem.objects.filter(cart=cart)
+        .select_related('product')
+        .annotate(item_total=line_total, cart_total=Window(Sum(line_total)))
+        .order_by('id')
+    )
+    return PricedCart(lines)
+
+
+def get_priced_cart(cart):
+    """The priced cart for display, from the cache when nothing changed since the last page view"""
+    key = _key(cart.id)
+    priced = cache.get(key)
+    if priced is None:
+        priced = price_cart(cart)
+        cache.set(key, priced, getattr(settings, 'CART_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+    return priced
+
+
+def invalidate(*cart_ids):
+    cache.delete_many([_key(cart_id) for cart_id in cart_ids])
+
+
+def create_order(user, cart, address_form=None):
+    """
+    Turn the cart into an order in one transaction: the order, its lines
+    (one bulk insert), the address, emptying the cart and queueing the
+    confirmation email. Returns None when the cart is empty.
+    """
+    with transaction.atomic():
+        priced = price_cart(cart)
+        if not priced:
+            return None
+        order = Order.objects.create(user=user, total_price=priced.total)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product_id=line.product_id, quantity=line.quantity, price=line.product.price)
+            for line in priced
+        ])
+        if address_form is not None:
+            address = address_form.save(commit=False)
+            address.order = order
+            address.save()
+        CartItem.objects.filter(cart=cart).delete()
+        analytics.record_order(order)
+        send_order_confirmation_email(user, order)
+    invalidate(cart.id)
+    return order
@@ -0,0 +1,53 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from store.images import IMAGE_FIELDS, generate_derivatives
+
+
+def _build(name, force):
+    """Worker process entry point: (name, manifest or None, error or None)"""
+    try:
+        return name, generate_derivatives(name, force=force), None
+    except Exception as error:
+        return name, None, str(error)
+
+
+class Command(BaseCommand):
+    help = 'Back-fills thumbnails and WebP variants for existing product images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes (default: CPU count)')
+        parser.add_argument('--force', action='store_true', help='Regenerate images that already have derivatives')
+
+    def handle(self, *args, **options):
+        names = set()
+        for label, field in IMAGE_FIELDS:
+            model = apps.get_model(label)
+            names.update(model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).values_list(field, flat=True))
+        names = sorted(names)
+        self.stdout.write(f'{len(names)} images, {options["workers"]} workers')
+
+        # Workers only touch the storage; forked copies of open connections must not be shared
+        connections.close_all()
+        started = time.perf_counter()
+        done = missing = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            for name, manifest, error in pool.map(partial(_build, force=options['force']), names, chunksize=4):
+                if error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                elif manifest is None:
+                    missing += 1
+                    self.stderr.write(f'{name}: missing or not an image')
+                else:
+                    done += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{done} images processed in {time.perf_counter() - started:.1f}s ({missing} missing, {failed} failed)'
+        ))
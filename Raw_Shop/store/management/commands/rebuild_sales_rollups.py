@@ -0,0 +1,36 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from store.analytics import ONE_DAY, order_date, rebuild
+from store.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the daily sales rollups from the orders (backfill, or repair after creating or editing orders outside checkout)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=datetime.date.fromisoformat, help='First day, YYYY-MM-DD (default: the first order)')
+        parser.add_argument('--end', type=datetime.date.fromisoformat, help='Last day, YYYY-MM-DD (default: today)')
+        parser.add_argument('--chunk-days', type=int, default=31, help='Days rebuilt per transaction (default: 31)')
+
+    def handle(self, *args, **options):
+        start = options['start']
+        if start is None:
+            first = Order.objects.order_by('created_at').first()
+            if first is None:
+                self.stdout.write('No orders.')
+                return
+            start = order_date(first)
+        end = options['end'] or timezone.localdate()
+        if start > end:
+            raise CommandError('--start is after --end')
+
+        days_with_sales = 0
+        chunk = max(options['chunk_days'], 1) * ONE_DAY
+        while start <= end:
+            chunk_end = min(start + chunk - ONE_DAY, end)
+            days_with_sales += rebuild(start, chunk_end)
+            start = chunk_end + ONE_DAY
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the sales rollups, {days_with_sales} days with sales.'))
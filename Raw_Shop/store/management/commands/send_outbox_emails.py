@@ -0,0 +1,107 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from store.outbox import claim, renew_lease, build_message, send_messages, mark_sent, mark_failed
+
+
+class Command(BaseCommand):
+    help = 'Sends queued order emails (run continuously, or with --once from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Sending processes, 0 sends from this process (default: 2)')
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Rows claimed at a time, small enough to send within the 10 minute lease (default: 100)',
+        )
+        parser.add_argument('--interval', type=float, default=5, help='Seconds to wait when the outbox is empty (default: 5)')
+        parser.add_argument('--once', action='store_true', help='Exit once nothing is due')
+
+    def handle(self, *args, **options):
+        self.workers = options['workers']
+        self.pool = None
+        # Worker processes only talk to the mail server; they must not share the parent's connections
+        connections.close_all()
+        try:
+            while True:
+                sent, failed = self.process_batch(options['batch_size'], max(self.workers, 1))
+                if sent or failed:
+                    self.stdout.write(f'{sent} sent, {failed} failed')
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['interval'])
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+
+    def get_pool(self):
+        """The worker pool, started on first use and again after it broke; None with --workers 0"""
+        if self.workers and self.pool is None:
+            # Spawned workers start without the app registry, store.outbox imports models
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=django.setup)
+        return self.pool
+
+    def send_shares(self, shares):
+        """Error text or None per message of every share, sent by the pool or by this process"""
+        messages = [[message for _, message in share] for share in shares]
+        pool = self.get_pool()
+        if pool is None:
+            return [send_messages(share) for share in messages]
+        try:
+            return list(pool.map(send_messages, messages))
+        except BrokenProcessPool:
+            # A worker died, start a new pool for the next batch
+            self.pool.shutdown(wait=False)
+            self.pool = None
+            raise
+
+    def process_batch(self, batch_size, chunks):
+        """Claim, build and send one batch; returns (sent, failed)"""
+        emails = claim(batch_size)
+        if not emails:
+            return 0, 0
+        token = emails[0].claimed_by
+
+        built = []
+        failed = 0
+        for outbox_email in emails:
+            try:
+                built.append((outbox_email, build_message(outbox_email)))
+            except Exception as error:
+                failed += 1
+                self.report_failure(outbox_email, f'{type(error).__name__}: {error}')
+
+        # One share of the batch per worker, each sent over its own connection
+        shares = [built[i::chunks] for i in range(chunks)]
+        shares = [share for share in shares if share]
+        # Building may have taken a while, sending gets the whole lease
+        renew_lease(token)
+        try:
+            results = self.send_shares(shares)
+        except Exception as error:
+            # Nothing is known to be sent: release the claim and count the attempt for every row
+            for outbox_email, _ in built:
+                failed += 1
+                self.report_failure(outbox_email, f'{type(error).__name__}: {error}')
+            return 0, failed
+
+        sent_ids = []
+        for share, errors in zip(shares, results):
+            for (outbox_email, _), error in zip(share, errors):
+                if error is None:
+                    sent_ids.append(outbox_email.id)
+                else:
+                    failed += 1
+                    self.report_failure(outbox_email, error)
+        mark_sent(sent_ids, token)
+        return len(sent_ids), failed
+
+    def report_failure(self, outbox_email, error):
+        gave_up = mark_failed(outbox_email, error)
+        message = f'{outbox_email}: {error}'
+        self.stderr.write(message + (' (giving up)' if gave_up else ' (will retry)'))
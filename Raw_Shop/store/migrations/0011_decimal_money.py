@@ -0,0 +1,116 @@
+# Generated by Django 5.2 on 2026-10-18 20:45
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models, transaction
+
+
+BATCH_SIZE = 2000
+
+# (model, float field) pairs moved to DecimalFields
+MONEY_FIELDS = [
+    ('product', 'price'),
+    ('order', 'total_price'),
+    ('orderitem', 'price'),
+]
+
+
+def _to_decimal(value):
+    # str() first so e.g. 0.1 becomes 0.10 and not 0.1000000000000000055...
+    return Decimal(str(value)).quantize(Decimal('0.01'), ROUND_HALF_UP)
+
+
+def copy_to_decimal(apps, schema_editor):
+    """Fill the new decimal columns from the float ones, one primary key range per transaction"""
+    for model_name, field in MONEY_FIELDS:
+        model = apps.get_model('store', model_name)
+        target = field + '_decimal'
+        last_id = 0
+        while True:
+            rows = list(model.objects.filter(id__gt=last_id).order_by('id').values_list('id', field)[:BATCH_SIZE])
+            if not rows:
+                break
+            with transaction.atomic():
+                model.objects.bulk_update(
+                    [model(id=row_id, **{target: _to_decimal(value)}) for row_id, value in rows],
+                    [target],
+                )
+            last_id = rows[-1][0]
+
+
+def copy_to_float(apps, schema_editor):
+    for model_name, field in MONEY_FIELDS:
+        model = apps.get_model('store', model_name)
+        for row_id, value in model.objects.values_list('id', field + '_decimal').iterator(chunk_size=BATCH_SIZE):
+            model.objects.filter(id=row_id).update(**{field: float(value)})
+
+
+class Migration(migrations.Migration):
+
+    # Every batch of the data copy commits on its own
+    atomic = False
+
+    dependencies = [
+        ('store', '0010_outboxemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='price_decimal',
+            field=models.DecimalField(decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='total_price_decimal',
+            field=models.DecimalField(decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='price_decimal',
+            field=models.DecimalField(decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.RunPython(copy_to_decimal, copy_to_float),
+        migrations.RemoveField(
+            model_name='product',
+            name='price',
+        ),
+        migrations.RemoveField(
+            model_name='order',
+            name='total_price',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='price',
+        ),
+        migrations.RenameField(
+            model_name='product',
+            old_name='price_decimal',
+            new_name='price',
+        ),
+        migrations.RenameField(
+            model_name='order',
+            old_name='total_price_decimal',
+            new_name='total_price',
+        ),
+        migrations.RenameField(
+            model_name='orderitem',
+            old_name='price_decimal',
+            new_name='price',
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=10),
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 5.2 on 2026-10-18 21:40
+
+from decimal import Decimal, ROUND_HALF_UP
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def to_money(value):
+    return Decimal(value).quantize(Decimal('0.01'), ROUND_HALF_UP)
+
+
+def fill_sales_rollups(apps, schema_editor):
+    """Rollups of the orders placed so far (what rebuild_sales_rollups does, for every day)"""
+    Order = apps.get_model('store', 'Order')
+    OrderItem = apps.get_model('store', 'OrderItem')
+    DailySales = apps.get_model('store', 'DailySales')
+    DailyCategorySales = apps.get_model('store', 'DailyCategorySales')
+    DailyProductSales = apps.get_model('store', 'DailyProductSales')
+
+    orders = Order.objects.exclude(status='Cancelled')
+    lines = OrderItem.objects.filter(order__in=orders).annotate(day=TruncDate('order__created_at'))
+    line_totals = {'orders': Count('order_id', distinct=True), 'units': Sum('quantity'), 'revenue': Sum(F('price') * F('quantity'))}
+
+    daily = {
+        row['day']: DailySales(date=row['day'], orders=row['orders'])
+        for row in orders.annotate(day=TruncDate('created_at')).values('day').annotate(orders=Count('id'))
+    }
+    for row in lines.values('day').annotate(units=line_totals['units'], revenue=line_totals['revenue']):
+        daily[row['day']].units = row['units']
+        daily[row['day']].revenue = to_money(row['revenue'])
+    DailySales.objects.bulk_create(daily.values(), batch_size=1000)
+    DailyCategorySales.objects.bulk_create(
+        (
+            DailyCategorySales(date=row['day'], category_id=row['product__Category_id'], orders=row['orders'], units=row['units'], revenue=to_money(row['revenue']))
+            for row in lines.values('day', 'product__Category_id').annotate(**line_totals)
+        ),
+        batch_size=1000,
+    )
+    DailyProductSales.objects.bulk_create(
+        (
+            DailyProductSales(date=row['day'], product_id=row['product_id'], orders=row['orders'], units=row['units'], revenue=to_money(row['revenue']))
+            for row in lines.values('day', 'product_id').annotate(**line_totals)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0011_decimal_money'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('orders', models.IntegerField(default=0)),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name_plural': 'Daily sales',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyCategorySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('orders', models.IntegerField(default=0)),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='store.category')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily category sales',
+                'ordering': ['date'],
+                'unique_together': {('date', 'category')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('orders', models.IntegerField(default=0)),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='store.product')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily product sales',
+                'ordering': ['date'],
+                'unique_together': {('date', 'product')},
+            },
+        ),
+        migrations.RunPython(fill_sales_rollups, migrations.RunPython.noop),
+    ]
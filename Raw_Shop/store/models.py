@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 # Create your models here.
 
@@ -22,7 +23,7 @@ Books	    | Novel, Textbook'''
 class Product(models.Model):
     Category=models.ForeignKey(Category,on_delete=models.CASCADE)
     name=models.CharField(max_length=100)
-    price=models.FloatField()
+    price=models.DecimalField(max_digits=10,decimal_places=2)
     description=models.TextField()
     image=models.ImageField()
     stock=models.IntegerField()
@@ -46,7 +47,7 @@ class CartItem(models.Model):
 class Order(models.Model):
     STATUS_CHOICES=(('Pending','Pending'),('Shipped','Shipped'),('Delivered','Delivered'),('Cancelled','Cancelled'))
     user=models.ForeignKey(User,on_delete=models.CASCADE)
-    total_price=models.FloatField()
+    total_price=models.DecimalField(max_digits=12,decimal_places=2)
     status=models.CharField(max_length=20,choices=STATUS_CHOICES,default='Pending')
     created_at=models.DateTimeField(auto_now_add=True)
     def __str__(self):
@@ -56,7 +57,7 @@ class OrderItem(models.Model):
     order=models.ForeignKey(Order,on_delete=models.CASCADE)
     product=models.ForeignKey(Product,on_delete=models.CASCADE)
     quantity=models.PositiveIntegerField()
-    price=models.FloatField()
+    price=models.DecimalField(max_digits=10,decimal_places=2)
     def __str__(self):
         return f"{self.product.name}*{self.quantity} in Order #{self.order.id}"
     
@@ -94,3 +95,81 @@ class Wishlist(models.Model):
     
     def __str__(self):
         return f"{self.product.name} in {self.user.username}'s wishlist"
+
+
+#EMAIL OUTBOX
+class OutboxEmail(models.Model):
+    """
+    An order email waiting to be sent by the send_outbox_emails worker.
+
+    Rows are created in the same transaction as the order (see store.utils),
+    so a rolled back checkout never sends mail and a committed one always does.
+    """
+    KIND_CHOICES = (('order_confirmation', 'Order confirmation'), ('order_status', 'Order status'))
+    STATUS_CHOICES = (('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed'))
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    order = models.ForeignKey(Order, on_delete=models.CASCADE)
+    recipient = models.EmailField()
+    # Kind specific values captured when queued, e.g. the new order status
+    data = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # Worker batch that is sending the row, and since when
+    claimed_by = models.CharField(max_length=32, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'], name='store_outbox_due_idx')]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for Order #{self.order_id} ({self.status})"
+
+
+#SALES ROLLUPS (kept up to date by store.analytics)
+class DailySales(models.Model):
+    date=models.DateField(unique=True)
+    orders=models.IntegerField(default=0)
+    units=models.IntegerField(default=0)
+    revenue=models.DecimalField(max_digits=14,decimal_places=2,default=0)
+
+    class Meta:
+        ordering=['date']
+        verbose_name_plural='Daily sales'
+
+    def __str__(self):
+        return f"Sales on {self.date}"
+
+class DailyCategorySales(models.Model):
+    date=models.DateField()
+    category=models.ForeignKey(Category,on_delete=models.CASCADE)
+    orders=models.IntegerField(default=0)
+    units=models.IntegerField(default=0)
+    revenue=models.DecimalField(max_digits=14,decimal_places=2,default=0)
+
+    class Meta:
+        ordering=['date']
+        unique_together=('date','category')
+        verbose_name_plural='Daily category sales'
+
+    def __str__(self):
+        return f"{self.category.name} on {self.date}"
+
+class DailyProductSales(models.Model):
+    date=models.DateField()
+    product=models.ForeignKey(Product,on_delete=models.CASCADE)
+    orders=models.IntegerField(default=0)
+    units=models.IntegerField(default=0)
+    revenue=models.DecimalField(max_digits=14,decimal_places=2,default=0)
+
+    class Meta:
+        ordering=['date']
+        unique_together=('date','product')
+        verbose_name_plural='Daily product sales'
+
+    def __str__(self):
+        return f"{self.product.name} on {self.date}"
@@ -0,0 +1,31 @@
+"""
+Money amounts: Decimal rupees with two decimal places.
+
+Prices and totals are stored in DecimalFields (see store.models) so sums are
+exact, both in Python and when aggregated by the database.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+
+MAX_DIGITS = 12
+DECIMAL_PLACES = 2
+CENT = Decimal('0.01')
+ZERO = Decimal('0.00')
+
+
+def to_money(value):
+    """Decimal rounded to paise; floats go through str() so 0.1 stays 0.10"""
+    if value is None:
+        return None
+    if isinstance(value, float):
+        value = str(value)
+    return Decimal(value).quantize(CENT, ROUND_HALF_UP)
+
+
+def line_total(price, quantity):
+    return to_money(price * quantity)
+
+
+def format_money(value):
+    """'₹1,234.50'"""
+    return f'₹{to_money(value):,}'
@@ -0,0 +1,118 @@
+"""
+Sending of queued OutboxEmail rows (see store.utils and send_outbox_emails).
+
+A batch of due rows is claimed by writing a random token into claimed_by
+with a conditional UPDATE, so several workers never send the same row. The
+claiming process builds the messages; sending happens in worker processes,
+each pushing its share of the batch through one SMTP connection. Failed rows
+go back to pending with an exponential backoff until they run out of
+attempts. Rows whose worker died are claimable again after the lease; the
+lease is renewed right before sending, and every status update is
+conditional on the claim token, so a worker whose lease ran out cannot
+overwrite the outcome of the worker that claimed the rows after it.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import mail
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboxEmail
+from .utils import build_order_confirmation_email, build_order_status_email
+
+
+BUILDERS = {
+    'order_confirmation': build_order_confirmation_email,
+    'order_status': build_order_status_email,
+}
+
+DEFAULT_MAX_ATTEMPTS = 6
+DEFAULT_RETRY_DELAY = 60  # seconds, doubled after every failed attempt
+MAX_RETRY_DELAY = 60 * 60
+LEASE = timedelta(minutes=10)
+
+
+def retry_delay(attempts):
+    base = getattr(settings, 'OUTBOX_RETRY_DELAY', DEFAULT_RETRY_DELAY)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), MAX_RETRY_DELAY))
+
+
+def _due(now):
+    return Q(status='pending', next_attempt_at__lte=now) | Q(status='sending', claimed_at__lt=now - LEASE)
+
+
+def claim(batch_size):
+    """Claim up to batch_size due rows for this worker and return them"""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    ids = list(OutboxEmail.objects.filter(_due(now)).order_by('next_attempt_at', 'id').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+    # The condition is checked again by the UPDATE, rows another worker claimed meanwhile are skipped
+    OutboxEmail.objects.filter(_due(now), id__in=ids).update(status='sending', claimed_by=token, claimed_at=now)
+    return list(OutboxEmail.objects.filter(claimed_by=token, status='sending').select_related('order__user'))
+
+
+def renew_lease(token):
+    """Restart the lease of the rows still claimed with token, returns how many there are"""
+    return OutboxEmail.objects.filter(claimed_by=token, status='sending').update(claimed_at=timezone.now())
+
+
+def build_message(outbox_email):
+    return BUILDERS[outbox_email.kind](outbox_email.order, outbox_email.recipient, outbox_email.data)
+
+
+def send_messages(messages):
+    """
+    Send messages over one connection of the configured backend.
+
+    Runs in the worker processes. Returns an error text or None per message;
+    a failed message does not stop the others.
+    """
+    connection = mail.get_connection()
+    results = []
+    try:
+        connection.open()
+    except Exception as error:
+        return [f'{type(error).__name__}: {error}'] * len(messages)
+    try:
+        for message in messages:
+            try:
+                connection.send_messages([message])
+                results.append(None)
+            except Exception as error:
+                results.append(f'{type(error).__name__}: {error}')
+                # The connection may be unusable now, start a fresh one for the rest
+                connection.close()
+                try:
+                    connection.open()
+                except Exception:
+                    pass
+    finally:
+        connection.close()
+    return results
+
+
+def mark_sent(ids, token):
+    OutboxEmail.objects.filter(id__in=ids, claimed_by=token, status='sending').update(
+        status='sent', sent_at=timezone.now(), claimed_by='', last_error='',
+    )
+
+
+def mark_failed(outbox_email, error):
+    """
+    Schedule a retry with backoff, or give up after OUTBOX_MAX_ATTEMPTS.
+    Does nothing if the row is no longer claimed by the token it was claimed with.
+    """
+    attempts = outbox_email.attempts + 1
+    max_attempts = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+    OutboxEmail.objects.filter(id=outbox_email.id, claimed_by=outbox_email.claimed_by, status='sending').update(
+        status='failed' if attempts >= max_attempts else 'pending',
+        attempts=attempts,
+        next_attempt_at=timezone.now() + retry_delay(attempts),
+        claimed_by='',
+        last_error=error,
+    )
+    return attempts >= max_attempts
@@ -0,0 +1,138 @@
+"""
+Keyset (seek) pagination for product listings.
+
+Instead of OFFSET, a page starts right after the sort values of the last row
+of the previous page (the cursor in the URL), so deep pages cost the same as
+the first one and pages do not shift when rows are added in front of them.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+PER_PAGE = 24
+
+
+def encode_cursor(values):
+    data = json.dumps(values, separators=(',', ':'), default=str).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(token, length):
+    """List of `length` values from a cursor, None when the token is not a valid cursor"""
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    return values
+
+
+class KeysetPage:
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    Paginate queryset by ordering, e.g. ['-price', 'id'].
+
+    The primary key is appended to the ordering when missing so every row has
+    a unique position. The ordering fields must not be NULL.
+    """
+
+    def __init__(self, queryset, ordering, per_page=PER_PAGE):
+        ordering = list(ordering)
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering.append('id')
+        self.queryset = queryset
+        self.ordering = ordering
+        self.fields = [field.lstrip('-') for field in ordering]
+        self.per_page = per_page
+
+    def _seek(self, values, forward):
+        """Q matching the rows after (forward) or before the row with these sort values"""
+        condition = Q()
+        equal = Q()
+        for field, direction, value in zip(self.fields, self.ordering, values):
+            descending = direction.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def _values(self, obj):
+        return [getattr(obj, field) for field in self.fields]
+
+    def _to_python(self, values):
+        model = self.queryset.model
+        field_objects = [model._meta.pk if field == 'pk' else model._meta.get_field(field) for field in self.fields]
+        try:
+            return [field.to_python(value) for field, value in zip(field_objects, values)]
+        except (ValidationError, TypeError, ValueError):
+            return None
+
+    def page(self, after=None, before=None):
+        """
+        One page: the first, the one after cursor `after` or the one before
+        cursor `before` (cursors come from the previous page's next_cursor and
+        previous_cursor).
+        """
+        after = after and decode_cursor(after, len(self.fields))
+        before = before and decode_cursor(before, len(self.fields))
+        after = after and self._to_python(after)
+        before = before and self._to_python(before)
+
+        if before:
+            reverse = [field[1:] if field.startswith('-') else '-' + field for field in self.ordering]
+            rows = list(self.queryset.filter(self._seek(before, forward=False)).order_by(*reverse)[:self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next = True
+        else:
+            queryset = self.queryset.filter(self._seek(after, forward=True)) if after else self.queryset
+            rows = list(queryset.order_by(*self.ordering)[:self.per_page + 1])
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = bool(after)
+
+        next_cursor = encode_cursor(self._values(rows[-1])) if has_next and rows else None
+        previous_cursor = encode_cursor(self._values(rows[0])) if has_previous and rows else None
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def page_urls(request, page):
+    """Query strings for the next/previous page links, keeping the other GET parameters"""
+    urls = []
+    for name, cursor in (('after', page.next_cursor), ('before', page.previous_cursor)):
+        if cursor is None:
+            urls.append(None)
+            continue
+        params = request.GET.copy()
+        params.pop('after', None)
+        params.pop('before', None)
+        params[name] = cursor
+        urls.append('?' + params.urlencode())
+    return urls
@@ -1,9 +1,58 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserProfile
+from .models import UserProfile, Product, Order, CartItem
+from . import analytics, cart as cart_pricing
+from .images import schedule_derivatives
+from .utils import send_order_status_email
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
         UserProfile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=Product)
+def queue_image_derivatives(sender, instance, **kwargs):
+    """Render thumbnails of new uploads in the background (images that already have them are skipped)"""
+    name = instance.image.name
+    if name:
+        transaction.on_commit(lambda: schedule_derivatives([name]))
+
+
+@receiver(post_save, sender=Product)
+def invalidate_priced_carts(sender, instance, created, **kwargs):
+    """Cached cart totals of carts holding the product are stale after a price change"""
+    if not created:
+        cart_ids = list(CartItem.objects.filter(product=instance).values_list('cart_id', flat=True))
+        if cart_ids:
+            cart_pricing.invalidate(*cart_ids)
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_status(sender, instance, **kwargs):
+    instance._previous_status = None
+    if instance.pk:
+        instance._previous_status = sender.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=Order)
+def queue_order_status_email(sender, instance, created, **kwargs):
+    """Queue a status mail when an existing order's status changes (e.g. in the admin)"""
+    previous = getattr(instance, '_previous_status', None)
+    if not created and previous is not None and previous != instance.status:
+        send_order_status_email(instance)
+
+
+@receiver(post_save, sender=Order)
+def update_sales_on_status_change(sender, instance, created, **kwargs):
+    """Cancelling an order takes it out of the sales rollups, undoing the cancellation puts it back"""
+    previous = getattr(instance, '_previous_status', None)
+    if not created and previous is not None:
+        analytics.order_status_changed(instance, previous)
+
+
+@receiver(pre_delete, sender=Order)
+def update_sales_on_delete(sender, instance, **kwargs):
+    analytics.order_deleted(instance)
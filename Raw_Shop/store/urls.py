@@ -34,4 +34,8 @@ urlpatterns = [
     # Profile
     path("profile/", profile_view, name="profile"),
     path("dashboard/", dashboard, name="dashboard"),
+
+    # Sales analytics (staff only)
+    path("analytics/sales/", sales_dashboard, name="sales_dashboard"),
+    path("analytics/sales/data/", sales_api, name="sales_api"),
 ]
@@ -2,11 +2,32 @@ from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
 
+from .models import OrderItem, OutboxEmail
+from .money import format_money
 
-def send_order_confirmation_email(user, order, items):
+
+# Order emails are not sent from the request: the send_* functions only add an
+# OutboxEmail row (in the caller's transaction) and the send_outbox_emails
+# worker builds the messages below and sends them.
+
+def send_order_confirmation_email(user, order, items=None):
+    """Queue the order confirmation; call it in the transaction that creates the order"""
+    if user.email:
+        OutboxEmail.objects.create(kind='order_confirmation', order=order, recipient=user.email)
+
+
+def send_order_status_email(order):
+    """Queue a status update mail with the order's current status"""
+    if order.user.email:
+        OutboxEmail.objects.create(kind='order_status', order=order, recipient=order.user.email, data={'status': order.status})
+
+
+def build_order_confirmation_email(order, recipient, data):
+    user = order.user
+    items = OrderItem.objects.filter(order=order).select_related('product')
     subject = f"Order Confirmation - Order #{order.id}"
     from_email = settings.EMAIL_HOST_USER
-    to = [user.email]
+    to = [recipient]
 
     # Plain text (fallback)
     text_content = f"""
@@ -15,14 +36,14 @@ Hello {user.username},
 Your order has been placed successfully 🎉
 
 Order ID: {order.id}
-Total Amount: ₹{order.total_price}
+Total Amount: {format_money(order.total_price)}
 
 Thank you for shopping with us!
 """
 
     # HTML content
     html_content = render_to_string(
-        'emails/order_confirmation.html',
+        'order_confirmations.html',
         {
             'user': user,
             'order': order,
@@ -32,25 +53,27 @@ Thank you for shopping with us!
 
     email = EmailMultiAlternatives(subject, text_content, from_email, to)
     email.attach_alternative(html_content, "text/html")
-    email.send()
+    return email
 
 
-def send_order_status_email(order):
+def build_order_status_email(order, recipient, data):
     user = order.user
+    # The status the order had when the mail was queued, not the current one
+    order.status = data.get('status', order.status)
 
     subject = f"Order #{order.id} Status Updated"
     from_email = settings.EMAIL_HOST_USER
-    to = [user.email]
+    to = [recipient]
 
     text_content = f"""
 Hello {user.username},
 
 Your order #{order.id} status is now {order.status}.
-Total Amount: ₹{order.total_price}
+Total Amount: {format_money(order.total_price)}
 """
 
     html_content = render_to_string(
-        'emails/order_status_email.html',
+        'order_status_email.html',
         {
             'user': user,
             'order': order
@@ -59,4 +82,4 @@ Total Amount: ₹{order.total_price}
 
     email = EmailMultiAlternatives(subject, text_content, from_email, to)
     email.attach_alternative(html_content, "text/html")
-    email.send()
+    return email
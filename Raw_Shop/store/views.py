@@ -8,8 +8,12 @@ Views are organized by functionality: Authentication, Products, Cart, Orders, Wi
 # Django imports
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import login, logout, authenticate
 from django.contrib import messages
+from django.db import transaction
+from django.db.models.functions import Substr
+from django.http import JsonResponse
 
 # Local imports - Models
 from store.models import (
@@ -20,6 +24,32 @@ from store.models import (
 # Local imports - Forms
 from store.forms import CheckoutForm, SignUpForm, LoginForm, UserProfileForm
 
+# Local imports - Pagination
+from store.pagination import KeysetPaginator, page_urls
+
+# Local imports - Emails (queued, sent by the send_outbox_emails worker)
+from store.utils import send_order_confirmation_email
+
+# Local imports - Cart pricing
+from store import cart as cart_pricing
+from store.money import line_total
+
+# Local imports - Sales analytics
+from store.analytics import record_order, report_range, sales_report
+
+
+# Sort options of the product list -> ordering
+PRODUCT_SORTS = {
+    'default': ['id'],
+    'newest': ['-id'],
+    'price_low': ['price'],
+    'price_high': ['-price'],
+    'name': ['name'],
+}
+
+# Enough text for the 20-word description preview on the product cards
+DESCRIPTION_PREVIEW_LENGTH = 300
+
 
 # ============================================================================
 # AUTHENTICATION VIEWS
@@ -108,7 +138,10 @@ def logout_page(request):
 @login_required
 def product_list(request):
     """
-    Display all products with category filtering.
+    Display products with category filtering, sorting and keyset pagination.
+    
+    Only the fields shown on the product cards are loaded, and the description
+    is cut to a short preview in the database.
     """
     products = Product.objects.all()
     categories = Category.objects.all()
@@ -123,10 +156,26 @@ def product_list(request):
         except ValueError:
             selected_category = None
     
+    sort_by = request.GET.get('sort', 'default')
+    if sort_by not in PRODUCT_SORTS:
+        sort_by = 'default'
+    
+    # Keyset pagination: deep pages cost the same as the first one
+    listing = products.only('id', 'name', 'price', 'image', 'stock').annotate(
+        description_preview=Substr('description', 1, DESCRIPTION_PREVIEW_LENGTH)
+    )
+    page = KeysetPaginator(listing, PRODUCT_SORTS[sort_by]).page(
+        after=request.GET.get('after'), before=request.GET.get('before')
+    )
+    next_url, previous_url = page_urls(request, page)
+    
     return render(request, 'product_list.html', {
-        'products': products,
+        'products': page.object_list,
         'categories': categories,
-        'selected_category': selected_category
+        'selected_category': selected_category,
+        'sort_by': sort_by,
+        'next_url': next_url,
+        'previous_url': previous_url,
     })
 
 
@@ -169,6 +218,7 @@ def add_to_cart(request, product_id):
         cart_item.quantity += 1
         cart_item.save()
 
+    cart_pricing.invalidate(cart.id)
     return redirect('cart_detail')
 
 
@@ -176,17 +226,11 @@ def add_to_cart(request, product_id):
 def view_cart(request):
     """Display user's cart with items and total price."""
     cart, _ = Cart.objects.get_or_create(user=request.user)
-    cart_items = CartItem.objects.filter(cart=cart)
-
-    # Calculate item totals
-    for item in cart_items:
-        item.item_total = item.product.price * item.quantity
-
-    total = sum(item.item_total for item in cart_items)
+    priced = cart_pricing.get_priced_cart(cart)
 
     return render(request, 'cart.html', {
-        'cart_items': cart_items,
-        'total': total
+        'cart_items': priced.lines,
+        'total': priced.total
     })
 
 
@@ -197,7 +241,7 @@ def update_cart(request, item_id, action):
     - 'inc': Increase quantity
     - 'dec': Decrease quantity (delete if becomes 0)
     """
-    item = get_object_or_404(CartItem, id=item_id)
+    item = get_object_or_404(CartItem, id=item_id, cart__user=request.user)
 
     if action == 'inc':
         item.quantity += 1
@@ -205,17 +249,21 @@ def update_cart(request, item_id, action):
         item.quantity -= 1
         if item.quantity == 0:
             item.delete()
+            cart_pricing.invalidate(item.cart_id)
             return redirect('cart_detail')
 
     item.save()
+    # After the save, a page view in between would cache the old cart again
+    cart_pricing.invalidate(item.cart_id)
     return redirect('cart_detail')
 
 
 @login_required
 def remove_from_cart(request, item_id):
     """Remove an item from cart."""
-    item = get_object_or_404(CartItem, id=item_id)
+    item = get_object_or_404(CartItem, id=item_id, cart__user=request.user)
     item.delete()
+    cart_pricing.invalidate(item.cart_id)
     return redirect('cart_detail')
 
 
@@ -227,30 +275,11 @@ def remove_from_cart(request, item_id):
 def place_order(request):
     """Place order from cart items (without address)."""
     cart = get_object_or_404(Cart, user=request.user)
-    cart_items = CartItem.objects.filter(cart=cart)
 
-    if not cart_items.exists():
+    # Order, order items and emptying the cart in one transaction
+    order = cart_pricing.create_order(request.user, cart)
+    if order is None:
         return redirect('cart_detail')
-
-    # Calculate total price
-    total_price = sum(item.product.price * item.quantity for item in cart_items)
-
-    # Create order
-    order = Order.objects.create(
-        user=request.user,
-        total_price=total_price
-    )
-
-    # Create order items and clear cart
-    for item in cart_items:
-        OrderItem.objects.create(
-            order=order,
-            product=item.product,
-            quantity=item.quantity,
-            price=item.product.price
-        )
-
-    cart_items.delete()
     return redirect('order_success', order_id=order.id)
 
 
@@ -258,7 +287,7 @@ def place_order(request):
 def order_success(request, order_id):
     """Display order confirmation page."""
     order = get_object_or_404(Order, id=order_id, user=request.user)
-    items = OrderItem.objects.filter(order=order)
+    items = OrderItem.objects.filter(order=order).select_related('product')
     return render(request, 'order_success.html', {'order': order, 'items': items})
 
 
@@ -278,38 +307,20 @@ def checkout(request):
     - Create order with address
     """
     cart = get_object_or_404(Cart, user=request.user)
-    cart_items = CartItem.objects.filter(cart=cart)
+    priced = cart_pricing.get_priced_cart(cart)
     
-    if not cart_items.exists():
+    if not priced:
         return redirect('cart_detail')
     
-    total_price = sum(item.product.price * item.quantity for item in cart_items)
+    total_price = priced.total
     
     if request.method == 'POST':
         form = CheckoutForm(request.POST)
         if form.is_valid():
-            # Create order
-            order = Order.objects.create(
-                user=request.user,
-                total_price=total_price
-            )
-            
-            # Save address
-            address = form.save(commit=False)
-            address.order = order
-            address.save()
-            
-            # Create order items
-            for item in cart_items:
-                OrderItem.objects.create(
-                    order=order,
-                    product=item.product,
-                    quantity=item.quantity,
-                    price=item.product.price
-                )
-            
-            # Clear cart
-            cart_items.delete()
+            # Priced again from the database inside the order transaction
+            order = cart_pricing.create_order(request.user, cart, address_form=form)
+            if order is None:
+                return redirect('cart_detail')
             return redirect('order_success', order_id=order.id)
     else:
         form = CheckoutForm()
@@ -386,7 +397,7 @@ def buy_now(request, product_id):
     quantity = int(request.POST.get('quantity', 1))
     quantity = max(1, min(quantity, product.stock))
     
-    total_price = product.price * quantity
+    total_price = line_total(product.price, quantity)
     
     # Pre-fill form with user profile data
     initial_data = {}
@@ -404,24 +415,27 @@ def buy_now(request, product_id):
     if request.method == 'POST':
         form = CheckoutForm(request.POST)
         if form.is_valid():
-            # Create order
-            order = Order.objects.create(
-                user=request.user,
-                total_price=total_price
-            )
-            
-            # Create order item
-            OrderItem.objects.create(
-                order=order,
-                product=product,
-                quantity=quantity,
-                price=product.price
-            )
-            
-            # Save address
-            address = form.save(commit=False)
-            address.order = order
-            address.save()
+            with transaction.atomic():
+                # Create order
+                order = Order.objects.create(
+                    user=request.user,
+                    total_price=total_price
+                )
+                
+                # Create order item
+                OrderItem.objects.create(
+                    order=order,
+                    product=product,
+                    quantity=quantity,
+                    price=product.price
+                )
+                
+                # Save address
+                address = form.save(commit=False)
+                address.order = order
+                address.save()
+                record_order(order)
+                send_order_confirmation_email(request.user, order)
             
             # Update user profile with new address
             try:
@@ -497,3 +511,37 @@ def dashboard(request):
         'addresses_count': addresses_count,
         'cart_items_count': cart_items_count
     })
+
+
+# ============================================================================
+# SALES ANALYTICS VIEWS (staff only)
+# ============================================================================
+
+@staff_member_required
+def sales_dashboard(request):
+    """
+    Sales analytics for staff, read from the daily rollups.
+    - Totals, daily sales and top categories/products of ?start=&end=
+    """
+    try:
+        start, end = report_range(request.GET.get('start'), request.GET.get('end'))
+    except ValueError as error:
+        messages.error(request, f'Invalid date range: {error}')
+        start, end = report_range()
+    report = sales_report(start, end)
+    best_day = max((day['revenue'] for day in report['days']), default=0)
+    for day in report['days']:
+        day['share'] = int(day['revenue'] * 100 / best_day) if best_day else 0
+    return render(request, 'sales_dashboard.html', {'report': report, 'title': 'Sales analytics'})
+
+
+@login_required
+def sales_api(request):
+    """The sales report as JSON: ?start=YYYY-MM-DD&end=YYYY-MM-DD (default: the last 30 days)"""
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Staff only'}, status=403)
+    try:
+        start, end = report_range(request.GET.get('start'), request.GET.get('end'))
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    return JsonResponse(sales_report(start, end))
@@ -0,0 +1,196 @@
+"""Deterministic bulk load-test data for seed_products --scale."""
+import random
+from array import array
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from constructionapp.models import Category, Product, CartItem, Order, OrderItem
+
+
+UNITS = ['bag', 'kg', 'ton', 'cft', 'piece', 'sheet', 'meter']
+GRADES = ['OPC 53', 'PPC', 'TMT Fe500', 'Fe550D', 'River', 'M-Sand', 'Red Clay', 'Fly Ash', '20mm', '40mm', 'Premium', 'Standard']
+
+
+def insert_rows(model, fields, rows, batch_size=5000):
+    """
+    INSERT rows (tuples of values for `fields`) with executemany, batch by batch.
+
+    For load test volumes: bulk_create spends most of its time building model
+    instances and preparing every value separately. The values here must
+    already be something the database driver takes (int, str, bool, Decimal,
+    None). Columns not in `fields` get their default, auto_now(_add) columns
+    the current time, both prepared once.
+    """
+    connection = connections[router.db_for_write(model)]
+    opts = model._meta
+    now = timezone.now()
+    columns = [opts.get_field(name).column for name in fields]
+    constants = []
+    for field in opts.concrete_fields:
+        if field.primary_key or field.column in columns:
+            continue
+        value = now if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False) else field.get_default()
+        columns.append(field.column)
+        constants.append(field.get_db_prep_save(value, connection))
+    constants = tuple(constants)
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        connection.ops.quote_name(opts.db_table),
+        ', '.join(connection.ops.quote_name(column) for column in columns),
+        ', '.join(['%s'] * len(columns)),
+    )
+
+    iterator = iter(rows)
+    count = 0
+    with connection.cursor() as cursor:
+        while True:
+            batch = [row + constants for row in islice(iterator, batch_size)]
+            if not batch:
+                return count
+            cursor.executemany(sql, batch)
+            count += len(batch)
+
+
+class ScaleSeeder:
+    """
+    Deterministic load-test data for seed_products --scale N.
+
+    N products plus categories, users, carts and orders in proportion (see
+    counts). The same scale and seed always give the same rows. Rows are
+    generated lazily and inserted batch by batch, so memory stays flat apart
+    from the product and user id arrays.
+    """
+    CATEGORIES = [category for category, _ in Product.CATEGORY_CHOICES]
+    ORDER_STATUSES = [status for status, _ in Order.STATUS_CHOICES]
+
+    PRODUCT_FIELDS = ['name', 'slug', 'category', 'sub_category', 'description', 'price', 'unit', 'stock', 'is_available']
+    ORDER_FIELDS = ['user_id', 'order_number', 'status', 'total_amount', 'shipping_address', 'phone', 'email']
+    ORDER_ITEM_FIELDS = ['order_id', 'product_id', 'quantity', 'price']
+
+    def __init__(self, scale, orders=None, prefix='load', seed=42, batch_size=5000):
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.counts = {
+            'categories': max(5, scale // 2000),
+            'products': scale,
+            'users': max(10, scale // 10),
+            'carts': max(5, scale // 20),
+            'orders': scale if orders is None else orders,
+        }
+
+    def exists(self):
+        return Product.objects.filter(slug__startswith=f'{self.prefix}-product-').exists()
+
+    def _ids(self, queryset):
+        return array('q', queryset.order_by('id').values_list('id', flat=True).iterator(chunk_size=self.batch_size))
+
+    def categories(self):
+        for i in range(self.counts['categories']):
+            yield f'Category {i}', f'{self.prefix}-category-{i}', f'Load test category {i}'
+
+    def products(self):
+        rng = self.random
+        for i in range(self.counts['products']):
+            category = rng.choice(self.CATEGORIES)
+            grade = rng.choice(GRADES)
+            stock = rng.choice((0, rng.randint(1, 5000)))
+            yield (
+                f'{category.title()} {grade} {i}',
+                f'{self.prefix}-product-{i}',
+                category,
+                grade.upper(),
+                f'{grade} {category} for residential and commercial construction. Item {i}.',
+                Decimal(rng.randint(20, 20000)),
+                rng.choice(UNITS),
+                stock,
+                stock > 0,
+            )
+
+    def users(self):
+        # Hashing is slow, every load test user shares the password "loadtest"
+        password = make_password('loadtest')
+        for i in range(self.counts['users']):
+            yield f'{self.prefix}-user-{i}', f'{self.prefix}-user-{i}@example.com', password
+
+    def cart_items(self, user_ids, product_ids):
+        rng = self.random
+        for user_id in user_ids[:self.counts['carts']]:
+            for product_id in sorted(set(rng.choice(product_ids) for _ in range(rng.randint(1, 4)))):
+                yield user_id, product_id, rng.randint(1, 10)
+
+    def orders(self, user_ids, product_ids, prices):
+        """Yield (order row, [(product_id, quantity, price)]) pairs"""
+        rng = self.random
+        for i in range(self.counts['orders']):
+            items = []
+            total = Decimal('0')
+            for index in sorted(set(rng.randrange(len(product_ids)) for _ in range(rng.randint(1, 4)))):
+                quantity = rng.randint(1, 20)
+                price = Decimal(prices[index])
+                items.append((product_ids[index], quantity, price))
+                total += price * quantity
+            user_index = rng.randrange(len(user_ids))
+            order = (
+                user_ids[user_index],
+                f'{self.prefix.upper()}{i:010d}',
+                rng.choice(self.ORDER_STATUSES),
+                total,
+                f'{user_index} Load Test Road, Pune',
+                f'9{rng.randint(0, 999999999):09d}',
+                f'{self.prefix}-user-{user_index}@example.com',
+            )
+            yield order, items
+
+    def _insert_orders(self, pairs):
+        """Insert orders a batch at a time, then their items with the new order ids"""
+        iterator = iter(pairs)
+        count = 0
+        while True:
+            batch = list(islice(iterator, self.batch_size))
+            if not batch:
+                return count
+            insert_rows(Order, self.ORDER_FIELDS, (order for order, _ in batch), self.batch_size)
+            numbers = [order[1] for order, _ in batch]
+            order_ids = dict(
+                Order.objects.filter(order_number__gte=numbers[0], order_number__lte=numbers[-1]).values_list('order_number', 'id')
+            )
+            items = (
+                (order_ids[order[1]],) + item
+                for order, order_items in batch
+                for item in order_items
+            )
+            insert_rows(OrderItem, self.ORDER_ITEM_FIELDS, items, self.batch_size * 4)
+            count += len(batch)
+
+    def run(self, log=lambda message: None):
+        """Insert everything, calling log(message) after every step; returns {name: rows inserted}"""
+        inserted = {}
+        with transaction.atomic():
+            inserted['categories'] = insert_rows(Category, ['name', 'slug', 'description'], self.categories(), self.batch_size)
+            inserted['products'] = insert_rows(Product, self.PRODUCT_FIELDS, self.products(), self.batch_size)
+            log(f"{inserted['categories']} categories, {inserted['products']} products")
+
+        products = Product.objects.filter(slug__startswith=f'{self.prefix}-product-').order_by('id')
+        product_ids = array('q')
+        prices = array('q')
+        for product_id, price in products.values_list('id', 'price').iterator(chunk_size=self.batch_size):
+            product_ids.append(product_id)
+            prices.append(int(price))
+
+        with transaction.atomic():
+            inserted['users'] = insert_rows(User, ['username', 'email', 'password'], self.users(), self.batch_size)
+            user_ids = self._ids(User.objects.filter(username__startswith=f'{self.prefix}-user-'))
+            inserted['cart items'] = insert_rows(
+                CartItem, ['user_id', 'product_id', 'quantity'], self.cart_items(user_ids, product_ids), self.batch_size
+            )
+            log(f"{inserted['users']} users, {inserted['cart items']} cart items")
+
+        with transaction.atomic():
+            inserted['orders'] = self._insert_orders(self.orders(user_ids, product_ids, prices))
+            log(f"{inserted['orders']} orders")
+        return inserted
@@ -1,11 +1,25 @@
-from django.core.management.base import BaseCommand
+import time
+
+from django.core.management.base import BaseCommand, CommandError
 from constructionapp.models import Product
 
+from ._seed import ScaleSeeder
+
 
 class Command(BaseCommand):
-    help = 'Seed the database with sample products'
+    help = 'Seed the database with sample products (--scale N generates load test data instead)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, help='Generate N products plus proportional categories, users, carts and orders')
+        parser.add_argument('--orders', type=int, help='Number of orders with --scale (default: N)')
+        parser.add_argument('--prefix', default='load', help='Slug/username prefix of the generated rows (default: load)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed, the same seed gives the same data (default: 42)')
+        parser.add_argument('--batch-size', type=int, default=5000)
 
     def handle(self, *args, **kwargs):
+        if kwargs['scale']:
+            return self.seed_scale(kwargs)
+
         # Clear existing products
         Product.objects.all().delete()
         
@@ -269,3 +283,20 @@ class Command(BaseCommand):
             Product.objects.create(**product_data)
         
         self.stdout.write(self.style.SUCCESS(f'Successfully created {len(products)} products'))
+
+    def seed_scale(self, options):
+        seeder = ScaleSeeder(
+            options['scale'],
+            orders=options['orders'],
+            prefix=options['prefix'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+        )
+        if seeder.exists():
+            raise CommandError(f"Products with prefix '{options['prefix']}' already exist, use another --prefix")
+
+        counts = ', '.join(f'{count} {name}' for name, count in seeder.counts.items())
+        self.stdout.write(f'Generating {counts}...')
+        started = time.perf_counter()
+        seeder.run(log=lambda message: self.stdout.write(f'  {message} ({time.perf_counter() - started:.1f}s)'))
+        self.stdout.write(self.style.SUCCESS(f'Load test data generated in {time.perf_counter() - started:.1f}s'))
@@ -7,9 +7,22 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from .models import Category, Product, CartItem, Order, OrderItem, UserProfile
 from .forms import UserProfileForm
+from store.pagination import KeysetPaginator, page_urls
 import json
 
 
+# Sort options of the product list -> ordering
+PRODUCT_SORTS = {
+    'name': ['name'],
+    'newest': ['-created_at'],
+    'price_low': ['price'],
+    'price_high': ['-price'],
+}
+
+# Fields used by components/product_card.html
+PRODUCT_CARD_FIELDS = ['id', 'name', 'category', 'unit', 'price', 'image', 'stock', 'is_available', 'created_at']
+
+
 def home(request):
     # Get all available products for display
     cement_products = Product.objects.filter(category='cement', is_available=True)[:6]
@@ -51,8 +64,21 @@ def product_list(request, category=None):
     
     categories = Category.objects.filter(is_active=True)
     
+    sort_by = request.GET.get('sort', 'name')
+    if sort_by not in PRODUCT_SORTS:
+        sort_by = 'name'
+    
+    # Keyset pagination: deep pages cost the same as the first one
+    paginator = KeysetPaginator(products.only(*PRODUCT_CARD_FIELDS), PRODUCT_SORTS[sort_by])
+    page = paginator.page(after=request.GET.get('after'), before=request.GET.get('before'))
+    next_url, previous_url = page_urls(request, page)
+    
     context = {
-        'products': products,
+        'products': page.object_list,
+        'product_count': products.count(),
+        'next_url': next_url,
+        'previous_url': previous_url,
+        'sort_by': sort_by,
         'categories': categories,
         'current_category': category,
         'category_name': category_name,
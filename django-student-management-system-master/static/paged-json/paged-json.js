@@ -0,0 +1,33 @@
+/*
+ * Loads every page of a keyset-paginated JSON endpoint (json_stream.py).
+ * The server returns at most one page per request and sets the
+ * X-Next-Cursor header while more rows exist; this follows it and
+ * resolves with all rows concatenated.
+ *
+ *   getAllPages(url, {subject: subject}).done(function(rows){ ... }).fail(...)
+ */
+function getAllPages(url, data) {
+    var deferred = $.Deferred();
+    var rows = [];
+
+    function fetchPage(cursor) {
+        var params = $.extend({}, data);
+        if (cursor) {
+            params.cursor = cursor;
+        }
+        $.ajax({url: url, type: 'GET', data: params})
+            .done(function(page, status, xhr) {
+                rows = rows.concat(page);
+                var next = xhr.getResponseHeader('X-Next-Cursor');
+                if (next) {
+                    fetchPage(next);
+                } else {
+                    deferred.resolve(rows);
+                }
+            })
+            .fail(deferred.reject);
+    }
+
+    fetchPage(null);
+    return deferred.promise();
+}
@@ -1,5 +1,5 @@
-from django.shortcuts import render, redirect
-from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
+from django.shortcuts import render, redirect, get_object_or_404
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse, FileResponse
 from django.contrib import messages
 from django.core.files.storage import FileSystemStorage #To upload Profile Picture
 from django.urls import reverse
@@ -9,82 +9,13 @@ import json
 
 from student_management_app.models import CustomUser, Staffs, Courses, Subjects, Students, SessionYearModel, FeedBackStudent, FeedBackStaffs, LeaveReportStudent, LeaveReportStaff, Attendance, AttendanceReport
 from .forms import AddStudentForm, EditStudentForm
+from .dashboard import get_admin_dashboard
+from . import results, json_stream
 
 
 def admin_home(request):
-    all_student_count = Students.objects.all().count()
-    subject_count = Subjects.objects.all().count()
-    course_count = Courses.objects.all().count()
-    staff_count = Staffs.objects.all().count()
-
-    # Total Subjects and students in Each Course
-    course_all = Courses.objects.all()
-    course_name_list = []
-    subject_count_list = []
-    student_count_list_in_course = []
-
-    for course in course_all:
-        subjects = Subjects.objects.filter(course_id=course.id).count()
-        students = Students.objects.filter(course_id=course.id).count()
-        course_name_list.append(course.course_name)
-        subject_count_list.append(subjects)
-        student_count_list_in_course.append(students)
-    
-    subject_all = Subjects.objects.all()
-    subject_list = []
-    student_count_list_in_subject = []
-    for subject in subject_all:
-        course = Courses.objects.get(id=subject.course_id.id)
-        student_count = Students.objects.filter(course_id=course.id).count()
-        subject_list.append(subject.subject_name)
-        student_count_list_in_subject.append(student_count)
-    
-    # For Saffs
-    staff_attendance_present_list=[]
-    staff_attendance_leave_list=[]
-    staff_name_list=[]
-
-    staffs = Staffs.objects.all()
-    for staff in staffs:
-        subject_ids = Subjects.objects.filter(staff_id=staff.admin.id)
-        attendance = Attendance.objects.filter(subject_id__in=subject_ids).count()
-        leaves = LeaveReportStaff.objects.filter(staff_id=staff.id, leave_status=1).count()
-        staff_attendance_present_list.append(attendance)
-        staff_attendance_leave_list.append(leaves)
-        staff_name_list.append(staff.admin.first_name)
-
-    # For Students
-    student_attendance_present_list=[]
-    student_attendance_leave_list=[]
-    student_name_list=[]
-
-    students = Students.objects.all()
-    for student in students:
-        attendance = AttendanceReport.objects.filter(student_id=student.id, status=True).count()
-        absent = AttendanceReport.objects.filter(student_id=student.id, status=False).count()
-        leaves = LeaveReportStudent.objects.filter(student_id=student.id, leave_status=1).count()
-        student_attendance_present_list.append(attendance)
-        student_attendance_leave_list.append(leaves+absent)
-        student_name_list.append(student.admin.first_name)
-
-
-    context={
-        "all_student_count": all_student_count,
-        "subject_count": subject_count,
-        "course_count": course_count,
-        "staff_count": staff_count,
-        "course_name_list": course_name_list,
-        "subject_count_list": subject_count_list,
-        "student_count_list_in_course": student_count_list_in_course,
-        "subject_list": subject_list,
-        "student_count_list_in_subject": student_count_list_in_subject,
-        "staff_attendance_present_list": staff_attendance_present_list,
-        "staff_attendance_leave_list": staff_attendance_leave_list,
-        "staff_name_list": staff_name_list,
-        "student_attendance_present_list": student_attendance_present_list,
-        "student_attendance_leave_list": student_attendance_leave_list,
-        "student_name_list": student_name_list,
-    }
+    # All chart series come from a constant number of grouped queries (or the stored snapshot)
+    context = get_admin_dashboard()
     return render(request, "hod_template/home_content.html", context)
 
 
@@ -710,44 +641,45 @@ def admin_view_attendance(request):
 
 @csrf_exempt
 def admin_get_attendance_dates(request):
-    # Getting Values from Ajax POST 'Fetch Student'
-    subject_id = request.POST.get("subject")
-    session_year = request.POST.get("session_year_id")
-
-    # Students enroll to Course, Course has Subjects
-    # Getting all data from subject model based on subject_id
-    subject_model = Subjects.objects.get(id=subject_id)
-
-    session_model = SessionYearModel.objects.get(id=session_year)
-
-    # students = Students.objects.filter(course_id=subject_model.course_id, session_year_id=session_model)
-    attendance = Attendance.objects.filter(subject_id=subject_model, session_year_id=session_model)
-
-    # Only Passing Student Id and Student Name Only
-    list_data = []
+    # Getting Values from Ajax 'Fetch Attendance Date'
+    data = json_stream.request_data(request)
+    subject_id = data.get("subject")
+    session_year = data.get("session_year_id")
 
-    for attendance_single in attendance:
-        data_small={"id":attendance_single.id, "attendance_date":str(attendance_single.attendance_date), "session_year_id":attendance_single.session_year_id.id}
-        list_data.append(data_small)
-
-    return JsonResponse(json.dumps(list_data), content_type="application/json", safe=False)
+    attendance = Attendance.objects.filter(subject_id=subject_id, session_year_id=session_year)
+    return json_stream.paginated_json_response(
+        request, attendance, ("attendance_date", "session_year_id"),
+        lambda row: {"id": row["id"], "attendance_date": str(row["attendance_date"]), "session_year_id": row["session_year_id"]},
+    )
 
 
 @csrf_exempt
 def admin_get_attendance_student(request):
-    # Getting Values from Ajax POST 'Fetch Student'
-    attendance_date = request.POST.get('attendance_date')
-    attendance = Attendance.objects.get(id=attendance_date)
-
-    attendance_data = AttendanceReport.objects.filter(attendance_id=attendance)
-    # Only Passing Student Id and Student Name Only
-    list_data = []
-
-    for student in attendance_data:
-        data_small={"id":student.student_id.admin.id, "name":student.student_id.admin.first_name+" "+student.student_id.admin.last_name, "status":student.status}
-        list_data.append(data_small)
-
-    return JsonResponse(json.dumps(list_data), content_type="application/json", safe=False)
+    # Getting Values from Ajax 'Fetch Student'
+    attendance_id = json_stream.request_data(request).get('attendance_date')
+
+    attendance_data = AttendanceReport.objects.filter(attendance_id=attendance_id)
+    # Only Passing Student Id, Student Name and Status
+    return json_stream.paginated_json_response(
+        request, attendance_data, ("student_id__admin", "student_id__admin__first_name", "student_id__admin__last_name", "status"),
+        lambda row: {"id": row["student_id__admin"], "name": row["student_id__admin__first_name"]+" "+row["student_id__admin__last_name"], "status": row["status"]},
+        updated_fields=("updated_at", "student_id__updated_at"),
+    )
+
+
+def admin_export_results(request, course_id):
+    # Result sheet of a course as CSV (streamed) or XLSX (?format=xlsx)
+    course = get_object_or_404(Courses, id=course_id)
+    filename = "results_%s" % course.id
+
+    if request.GET.get("format") == "xlsx":
+        output = results.write_result_sheet_xlsx(course.id)
+        return FileResponse(output, as_attachment=True, filename=filename + ".xlsx",
+                            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+    response = StreamingHttpResponse(results.stream_result_sheet_csv(course.id), content_type="text/csv")
+    response["Content-Disposition"] = 'attachment; filename="%s.csv"' % filename
+    return response
 
 
 def admin_profile(request):
@@ -1,46 +1,125 @@
+import threading
+import time
+from types import MappingProxyType
+
+from django.conf import settings
 from django.utils.deprecation import MiddlewareMixin
 from django.shortcuts import render, redirect
-from django.urls import reverse
+from django.urls import reverse, get_resolver, URLPattern, URLResolver
+
+
+# Which user types may open the views of each module
+ROLE_MODULES = {
+    "student_management_app.HodViews": "1",
+    "student_management_app.StaffViews": "2",
+    "student_management_app.StudentViews": "3",
+}
+# Views every logged in user may open
+SHARED_MODULES = ("student_management_app.views", "django.views.static")
+ALL_USER_TYPES = frozenset(("1", "2", "3"))
+
+# Where each user type is sent when it opens a view it is not allowed to see
+HOME_URL_NAMES = {"1": "admin_home", "2": "staff_home", "3": "student_home"}
+
+
+def allowed_user_types(view_func):
+    modulename = view_func.__module__
+    if modulename in SHARED_MODULES:
+        return ALL_USER_TYPES
+    if modulename in ROLE_MODULES:
+        return frozenset((ROLE_MODULES[modulename],))
+    return frozenset()
+
+
+def _iter_callbacks(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _iter_callbacks(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            yield pattern.callback
+
+
+def compile_routes(urlconf=None):
+    # Frozen {view function: allowed user types} for every view in the URLconf
+    return MappingProxyType({
+        callback: allowed_user_types(callback)
+        for callback in _iter_callbacks(get_resolver(urlconf).url_patterns)
+    })
+
+
+class MiddlewareTimings:
+    # Process-wide counters of the time spent in LoginCheckMiddleWare.process_view
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+
+    def record(self, elapsed):
+        with self.lock:
+            self.count += 1
+            self.total += elapsed
+            if elapsed > self.max:
+                self.max = elapsed
+
+    def snapshot(self):
+        with self.lock:
+            average = self.total / self.count if self.count else 0.0
+            return {"count": self.count, "total": self.total, "average": average, "max": self.max}
+
+
+timings = MiddlewareTimings()
 
 
 class LoginCheckMiddleWare(MiddlewareMixin):
-    
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        # Everything that does not depend on the request is resolved once here
+        self.routes = compile_routes()
+        self.public_paths = frozenset((reverse("login"), reverse("doLogin")))
+        self.home_urls = MappingProxyType({user_type: reverse(name) for user_type, name in HOME_URL_NAMES.items()})
+        self.login_url = reverse("login")
+        self.asset_prefixes = tuple(prefix for prefix in (settings.STATIC_URL, settings.MEDIA_URL) if prefix and prefix != "/")
+        self.timing_enabled = getattr(settings, "LOGIN_CHECK_TIMING", False)
+
     def process_view(self, request, view_func, view_args, view_kwargs):
-        modulename = view_func.__module__
-        # print(modulename)
+        if not self.timing_enabled:
+            return self.check_access(request, view_func)
+
+        start = time.perf_counter()
+        try:
+            return self.check_access(request, view_func)
+        finally:
+            elapsed = time.perf_counter() - start
+            request.login_check_time = elapsed
+            timings.record(elapsed)
+
+    def check_access(self, request, view_func):
+        # Static and media files never need the logged in user
+        if request.path.startswith(self.asset_prefixes):
+            return None
+
         user = request.user
 
         #Check whether the user is logged in or not
         if user.is_authenticated:
-            if user.user_type == "1":
-                if modulename == "student_management_app.HodViews":
-                    pass
-                elif modulename == "student_management_app.views" or modulename == "django.views.static":
-                    pass
-                else:
-                    return redirect("admin_home")
-            
-            elif user.user_type == "2":
-                if modulename == "student_management_app.StaffViews":
-                    pass
-                elif modulename == "student_management_app.views" or modulename == "django.views.static":
-                    pass
-                else:
-                    return redirect("staff_home")
-            
-            elif user.user_type == "3":
-                if modulename == "student_management_app.StudentViews":
-                    pass
-                elif modulename == "student_management_app.views" or modulename == "django.views.static":
-                    pass
-                else:
-                    return redirect("student_home")
-
-            else:
-                return redirect("login")
+            allowed = self.routes.get(view_func)
+            if allowed is None:
+                # View outside the URLconf (e.g. a test view), fall back to its module
+                allowed = allowed_user_types(view_func)
+
+            if user.user_type in allowed:
+                return None
+            if user.user_type in self.home_urls:
+                return redirect(self.home_urls[user.user_type])
+            return redirect(self.login_url)
 
         else:
-            if request.path == reverse("login") or request.path == reverse("doLogin"):
-                pass
-            else:
-                return redirect("login")
+            if request.path in self.public_paths:
+                return None
+            return redirect(self.login_url)
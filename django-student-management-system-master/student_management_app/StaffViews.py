@@ -5,26 +5,21 @@ from django.core.files.storage import FileSystemStorage #To upload Profile Pictu
 from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 from django.core import serializers
+from django.core.exceptions import ValidationError
+from django.db.models import Count
 import json
 
 
 from student_management_app.models import CustomUser, Staffs, Courses, Subjects, Students, SessionYearModel, Attendance, AttendanceReport, LeaveReportStaff, FeedBackStaffs, StudentResult
+from student_management_app import attendance_summary, attendance_ingest, results, json_stream
 
 
 def staff_home(request):
     # Fetching All Students under Staff
 
     subjects = Subjects.objects.filter(staff_id=request.user.id)
-    course_id_list = []
-    for subject in subjects:
-        course = Courses.objects.get(id=subject.course_id.id)
-        course_id_list.append(course.id)
-    
-    final_course = []
-    # Removing Duplicate Course Id
-    for course_id in course_id_list:
-        if course_id not in final_course:
-            final_course.append(course_id)
+    # Distinct Course Ids of the Staff's Subjects
+    final_course = list(subjects.values_list('course_id', flat=True).distinct())
     
     students_count = Students.objects.filter(course_id__in=final_course).count()
     subject_count = subjects.count()
@@ -35,21 +30,25 @@ def staff_home(request):
     staff = Staffs.objects.get(admin=request.user.id)
     leave_count = LeaveReportStaff.objects.filter(staff_id=staff.id, leave_status=1).count()
 
-    #Fetch Attendance Data by Subjects
+    #Fetch Attendance Data by Subjects (one grouped query)
+    attendance_per_subject = {
+        row['subject_id']: row['total']
+        for row in Attendance.objects.filter(subject_id__in=subjects).values('subject_id').annotate(total=Count('id')).order_by()
+    }
     subject_list = []
     attendance_list = []
     for subject in subjects:
-        attendance_count1 = Attendance.objects.filter(subject_id=subject.id).count()
         subject_list.append(subject.subject_name)
-        attendance_list.append(attendance_count1)
+        attendance_list.append(attendance_per_subject.get(subject.id, 0))
 
-    students_attendance = Students.objects.filter(course_id__in=final_course)
+    # Present/Absent counts come from the AttendanceSummary table
+    students_attendance = Students.objects.filter(course_id__in=final_course).select_related('admin')
+    attendance_per_student = attendance_summary.totals_by_student(student_id__course_id__in=final_course)
     student_list = []
     student_list_attendance_present = []
     student_list_attendance_absent = []
     for student in students_attendance:
-        attendance_present_count = AttendanceReport.objects.filter(status=True, student_id=student.id).count()
-        attendance_absent_count = AttendanceReport.objects.filter(status=False, student_id=student.id).count()
+        attendance_present_count, attendance_absent_count = attendance_per_student.get(student.id, (0, 0))
         student_list.append(student.admin.first_name+" "+ student.admin.last_name)
         student_list_attendance_present.append(attendance_present_count)
         student_list_attendance_absent.append(attendance_absent_count)
@@ -137,26 +136,21 @@ def staff_feedback_save(request):
 # WE don't need csrf_token when using Ajax
 @csrf_exempt
 def get_students(request):
-    # Getting Values from Ajax POST 'Fetch Student'
-    subject_id = request.POST.get("subject")
-    session_year = request.POST.get("session_year")
+    # Getting Values from Ajax 'Fetch Student'
+    data = json_stream.request_data(request)
+    subject_id = data.get("subject")
+    session_year = data.get("session_year")
 
     # Students enroll to Course, Course has Subjects
-    # Getting all data from subject model based on subject_id
     subject_model = Subjects.objects.get(id=subject_id)
 
-    session_model = SessionYearModel.objects.get(id=session_year)
-
-    students = Students.objects.filter(course_id=subject_model.course_id, session_year_id=session_model)
+    students = Students.objects.filter(course_id=subject_model.course_id_id, session_year_id=session_year)
 
     # Only Passing Student Id and Student Name Only
-    list_data = []
-
-    for student in students:
-        data_small={"id":student.admin.id, "name":student.admin.first_name+" "+student.admin.last_name}
-        list_data.append(data_small)
-
-    return JsonResponse(json.dumps(list_data), content_type="application/json", safe=False)
+    return json_stream.paginated_json_response(
+        request, students, ("admin", "admin__first_name", "admin__last_name"),
+        lambda row: {"id": row["admin"], "name": row["admin__first_name"]+" "+row["admin__last_name"]},
+    )
 
 
 
@@ -164,34 +158,50 @@ def get_students(request):
 @csrf_exempt
 def save_attendance_data(request):
     # Get Values from Staf Take Attendance form via AJAX (JavaScript)
-    # Use getlist to access HTML Array/List Input Data
     student_ids = request.POST.get("student_ids")
     subject_id = request.POST.get("subject_id")
     attendance_date = request.POST.get("attendance_date")
     session_year_id = request.POST.get("session_year_id")
 
-    subject_model = Subjects.objects.get(id=subject_id)
-    session_year_model = SessionYearModel.objects.get(id=session_year_id)
-
-    json_student = json.loads(student_ids)
-    # print(dict_student[0]['id'])
-
-    # print(student_ids)
     try:
-        # First Attendance Data is Saved on Attendance Model
-        attendance = Attendance(subject_id=subject_model, attendance_date=attendance_date, session_year_id=session_year_model)
-        attendance.save()
-
-        for stud in json_student:
-            # Attendance of Individual Student saved on AttendanceReport Model
-            student = Students.objects.get(admin=stud['id'])
-            attendance_report = AttendanceReport(student_id=student, attendance_id=attendance, status=stud['status'])
-            attendance_report.save()
+        json_student = json.loads(student_ids)
+        # Students are resolved in one query and the reports written in bulk inside one transaction
+        attendance_ingest.ingest_attendance([{
+            "subject_id": subject_id,
+            "session_year_id": session_year_id,
+            "attendance_date": attendance_date,
+            "students": json_student,
+        }])
         return HttpResponse("OK")
     except:
         return HttpResponse("Error")
 
 
+@csrf_exempt
+def save_attendance_batch(request):
+    # Back-filling: JSON body {"batches": [{"subject_id", "session_year_id", "attendance_date", "students": [...]}, ...]}
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid Method"}, status=405)
+
+    try:
+        batches = json.loads(request.body)["batches"]
+        if not isinstance(batches, list) or not all(isinstance(batch, dict) for batch in batches):
+            raise ValueError("batches must be a list of objects")
+        subject_ids = {int(batch["subject_id"]) for batch in batches}
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        return JsonResponse({"error": "Invalid attendance data."}, status=400)
+
+    # Staff can only take attendance for their own subjects
+    if Subjects.objects.filter(id__in=subject_ids, staff_id=request.user.id).count() != len(subject_ids):
+        return JsonResponse({"error": "Invalid Subject."}, status=400)
+
+    try:
+        attendances = attendance_ingest.ingest_attendance(batches)
+    except (KeyError, TypeError, ValueError, ValidationError):
+        return JsonResponse({"error": "Invalid attendance data."}, status=400)
+    return JsonResponse({"attendance_ids": [attendance.id for attendance in attendances]})
+
+
 
 
 def staff_update_attendance(request):
@@ -205,67 +215,40 @@ def staff_update_attendance(request):
 
 @csrf_exempt
 def get_attendance_dates(request):
-    
-
-    # Getting Values from Ajax POST 'Fetch Student'
-    subject_id = request.POST.get("subject")
-    session_year = request.POST.get("session_year_id")
-
-    # Students enroll to Course, Course has Subjects
-    # Getting all data from subject model based on subject_id
-    subject_model = Subjects.objects.get(id=subject_id)
+    # Getting Values from Ajax 'Fetch Attendance Date'
+    data = json_stream.request_data(request)
+    subject_id = data.get("subject")
+    session_year = data.get("session_year_id")
 
-    session_model = SessionYearModel.objects.get(id=session_year)
-
-    # students = Students.objects.filter(course_id=subject_model.course_id, session_year_id=session_model)
-    attendance = Attendance.objects.filter(subject_id=subject_model, session_year_id=session_model)
-
-    # Only Passing Student Id and Student Name Only
-    list_data = []
-
-    for attendance_single in attendance:
-        data_small={"id":attendance_single.id, "attendance_date":str(attendance_single.attendance_date), "session_year_id":attendance_single.session_year_id.id}
-        list_data.append(data_small)
-
-    return JsonResponse(json.dumps(list_data), content_type="application/json", safe=False)
+    attendance = Attendance.objects.filter(subject_id=subject_id, session_year_id=session_year)
+    return json_stream.paginated_json_response(
+        request, attendance, ("attendance_date", "session_year_id"),
+        lambda row: {"id": row["id"], "attendance_date": str(row["attendance_date"]), "session_year_id": row["session_year_id"]},
+    )
 
 
 @csrf_exempt
 def get_attendance_student(request):
-    # Getting Values from Ajax POST 'Fetch Student'
-    attendance_date = request.POST.get('attendance_date')
-    attendance = Attendance.objects.get(id=attendance_date)
+    # Getting Values from Ajax 'Fetch Student'
+    attendance_id = json_stream.request_data(request).get('attendance_date')
 
-    attendance_data = AttendanceReport.objects.filter(attendance_id=attendance)
-    # Only Passing Student Id and Student Name Only
-    list_data = []
-
-    for student in attendance_data:
-        data_small={"id":student.student_id.admin.id, "name":student.student_id.admin.first_name+" "+student.student_id.admin.last_name, "status":student.status}
-        list_data.append(data_small)
-
-    return JsonResponse(json.dumps(list_data), content_type="application/json", safe=False)
+    attendance_data = AttendanceReport.objects.filter(attendance_id=attendance_id)
+    # Only Passing Student Id, Student Name and Status
+    return json_stream.paginated_json_response(
+        request, attendance_data, ("student_id__admin", "student_id__admin__first_name", "student_id__admin__last_name", "status"),
+        lambda row: {"id": row["student_id__admin"], "name": row["student_id__admin__first_name"]+" "+row["student_id__admin__last_name"], "status": row["status"]},
+        updated_fields=("updated_at", "student_id__updated_at"),
+    )
 
 
 @csrf_exempt
 def update_attendance_data(request):
     student_ids = request.POST.get("student_ids")
-
     attendance_date = request.POST.get("attendance_date")
-    attendance = Attendance.objects.get(id=attendance_date)
-
-    json_student = json.loads(student_ids)
 
     try:
-        
-        for stud in json_student:
-            # Attendance of Individual Student saved on AttendanceReport Model
-            student = Students.objects.get(admin=stud['id'])
-
-            attendance_report = AttendanceReport.objects.get(student_id=student, attendance_id=attendance)
-            attendance_report.status=stud['status']
-
-            attendance_report.save()
+        json_student = json.loads(student_ids)
+        attendance_ingest.update_attendance(attendance_date, json_student)
         return HttpResponse("OK")
     except:
         return HttpResponse("Error")
@@ -353,3 +336,43 @@ def staff_add_result_save(request):
         except:
             messages.error(request, "Failed to Add Result!")
             return redirect('staff_add_result')
+
+
+@csrf_exempt
+def staff_add_result_bulk(request):
+    # Marks of a whole subject at once: JSON {"subject_id", "session_year_id", "results": [...]}
+    # or a CSV file (student_id, exam_marks, assignment_marks) with subject_id/session_year_id as form fields
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid Method"}, status=405)
+
+    try:
+        if request.FILES.get('results_file'):
+            subject_id = request.POST.get('subject_id')
+            session_year_id = request.POST.get('session_year_id')
+            rows = results.parse_csv_rows(request.FILES['results_file'].read().decode('utf-8-sig'))
+        else:
+            data = json.loads(request.body)
+            if not isinstance(data, dict):
+                raise ValueError("JSON body must be an object")
+            subject_id = data.get('subject_id')
+            session_year_id = data.get('session_year_id')
+            rows = data.get('results', [])
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({"error": "Invalid JSON or CSV data."}, status=400)
+    if not isinstance(rows, list):
+        return JsonResponse({"error": "results must be a list."}, status=400)
+    try:
+        subject_id = int(subject_id)
+        session_year_id = int(session_year_id) if session_year_id else None
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "Invalid Subject or Session Year."}, status=400)
+
+    # Staff can only enter results for their own subjects
+    if not Subjects.objects.filter(id=subject_id, staff_id=request.user.id).exists():
+        return JsonResponse({"error": "Invalid Subject."}, status=400)
+
+    saved, errors = results.upsert_results(subject_id, rows, session_year_id=session_year_id)
+    if errors:
+        return JsonResponse({"saved": 0, "errors": errors}, status=400)
+    return JsonResponse({"saved": saved, "errors": []})
+
@@ -6,28 +6,28 @@ from django.urls import reverse
 import datetime # To Parse input DateTime into Python Date Time Object
 
 from student_management_app.models import CustomUser, Staffs, Courses, Subjects, Students, Attendance, AttendanceReport, LeaveReportStudent, FeedBackStudent, StudentResult
+from student_management_app import attendance_summary
 
 
 def student_home(request):
     student_obj = Students.objects.get(admin=request.user.id)
-    total_attendance = AttendanceReport.objects.filter(student_id=student_obj).count()
-    attendance_present = AttendanceReport.objects.filter(student_id=student_obj, status=True).count()
-    attendance_absent = AttendanceReport.objects.filter(student_id=student_obj, status=False).count()
 
-    course_obj = Courses.objects.get(id=student_obj.course_id.id)
-    total_subjects = Subjects.objects.filter(course_id=course_obj).count()
+    # Present/Absent counts come from the AttendanceSummary table
+    attendance_per_subject = attendance_summary.totals_by_subject(student_id=student_obj.id)
+    attendance_present = sum(present for present, absent in attendance_per_subject.values())
+    attendance_absent = sum(absent for present, absent in attendance_per_subject.values())
+    total_attendance = attendance_present + attendance_absent
 
     subject_name = []
     data_present = []
     data_absent = []
-    subject_data = Subjects.objects.filter(course_id=student_obj.course_id)
+    subject_data = Subjects.objects.filter(course_id=student_obj.course_id_id)
     for subject in subject_data:
-        attendance = Attendance.objects.filter(subject_id=subject.id)
-        attendance_present_count = AttendanceReport.objects.filter(attendance_id__in=attendance, status=True, student_id=student_obj.id).count()
-        attendance_absent_count = AttendanceReport.objects.filter(attendance_id__in=attendance, status=False, student_id=student_obj.id).count()
+        attendance_present_count, attendance_absent_count = attendance_per_subject.get(subject.id, (0, 0))
         subject_name.append(subject.subject_name)
         data_present.append(attendance_present_count)
         data_absent.append(attendance_absent_count)
+    total_subjects = len(subject_name)
     
     context={
         "total_attendance": total_attendance,
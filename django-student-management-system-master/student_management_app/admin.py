@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, AdminHOD, Staffs, Courses, Subjects, Students, Attendance, AttendanceReport, LeaveReportStudent, LeaveReportStaff, FeedBackStudent, FeedBackStaffs, NotificationStudent, NotificationStaffs
+from .models import CustomUser, AdminHOD, Staffs, Courses, Subjects, Students, Attendance, AttendanceReport, LeaveReportStudent, LeaveReportStaff, FeedBackStudent, FeedBackStaffs, NotificationStudent, NotificationStaffs, DashboardSnapshot, AttendanceSummary
 
 # Register your models here.
 class UserModel(UserAdmin):
@@ -22,3 +22,21 @@ admin.site.register(FeedBackStudent)
 admin.site.register(FeedBackStaffs)
 admin.site.register(NotificationStudent)
 admin.site.register(NotificationStaffs)
+admin.site.register(DashboardSnapshot)
+
+
+class AttendanceSummaryAdmin(admin.ModelAdmin):
+    # Maintained from AttendanceReport (see attendance_summary.py), rebuilt with rebuild_attendance_summary
+    list_display = ('student_id', 'subject_id', 'session_year_id', 'present_count', 'absent_count', 'updated_at')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(AttendanceSummary, AttendanceSummaryAdmin)
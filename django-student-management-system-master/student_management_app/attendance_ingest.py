@@ -0,0 +1,149 @@
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from student_management_app.models import Subjects, Students, SessionYearModel, Attendance, AttendanceReport
+from student_management_app import attendance_summary
+
+
+def resolve_students(admin_ids):
+    # {CustomUser.id: Students.id} for all given users in one query
+    admin_ids = {int(admin_id) for admin_id in admin_ids}
+    student_map = dict(Students.objects.filter(admin__in=admin_ids).values_list('admin', 'id'))
+    missing = admin_ids - set(student_map)
+    if missing:
+        raise ValueError("Unknown students: %s" % sorted(missing))
+    return student_map
+
+
+def _statuses(students, student_map):
+    # [{"id": <CustomUser.id>, "status": 0/1}, ...] -> {Students.id: bool}
+    return {student_map[int(stud['id'])]: bool(int(stud['status'])) for stud in students}
+
+
+def _get_or_create_attendances(keys):
+    """
+    Return {(subject_id, session_year_id, date): Attendance} for the given keys.
+
+    Existing Attendance rows are reused, missing ones are inserted with a
+    single bulk_create. A row inserted by a concurrent save meanwhile is
+    skipped by the unique constraint and fetched instead.
+    """
+    subject_ids = {key[0] for key in keys}
+    session_year_ids = {key[1] for key in keys}
+    dates = {key[2] for key in keys}
+
+    if Subjects.objects.filter(id__in=subject_ids).count() != len(subject_ids):
+        raise ValueError("Unknown subject in %s" % sorted(subject_ids))
+    if SessionYearModel.objects.filter(id__in=session_year_ids).count() != len(session_year_ids):
+        raise ValueError("Unknown session year in %s" % sorted(session_year_ids))
+
+    def fetch():
+        found = {}
+        attendances = Attendance.objects.filter(
+            subject_id__in=subject_ids, session_year_id__in=session_year_ids, attendance_date__in=dates
+        ).order_by('-id')
+        for attendance in attendances:
+            key = (attendance.subject_id_id, attendance.session_year_id_id, attendance.attendance_date)
+            if key in keys:
+                found[key] = attendance
+        return found
+
+    found = fetch()
+    missing = [key for key in keys if key not in found]
+    if missing:
+        Attendance.objects.bulk_create([
+            Attendance(subject_id_id=subject_id, session_year_id_id=session_year_id, attendance_date=attendance_date)
+            for subject_id, session_year_id, attendance_date in missing
+        ], ignore_conflicts=True)
+        # Fetch again so primary keys are available on every database backend
+        found = fetch()
+    return found
+
+
+def _write_reports(statuses_by_attendance):
+    """
+    Upsert AttendanceReport rows and the attendance summary.
+
+    statuses_by_attendance maps Attendance -> {Students.id: status}. Existing
+    reports are loaded in one query, new ones are written with bulk_create and
+    changed ones with one UPDATE per status.
+    """
+    attendance_ids = [attendance.id for attendance in statuses_by_attendance]
+    student_ids = set()
+    for statuses in statuses_by_attendance.values():
+        student_ids.update(statuses)
+
+    existing = {
+        (report.attendance_id_id, report.student_id_id): report
+        for report in AttendanceReport.objects.filter(attendance_id__in=attendance_ids, student_id__in=student_ids).only('id', 'attendance_id', 'student_id', 'status')
+    }
+
+    to_create = []
+    now_present = []
+    now_absent = []
+    summary_changes = []
+    for attendance, statuses in statuses_by_attendance.items():
+        new_statuses = {}
+        changes = {}
+        for student_id, status in statuses.items():
+            report = existing.get((attendance.id, student_id))
+            if report is None:
+                to_create.append(AttendanceReport(student_id_id=student_id, attendance_id=attendance, status=status))
+                new_statuses[student_id] = status
+            elif report.status != status:
+                changes[student_id] = (report.status, status)
+                (now_present if status else now_absent).append(report.id)
+        summary_changes.append((attendance, new_statuses, changes))
+
+    AttendanceReport.objects.bulk_create(to_create, batch_size=500)
+    # Status is a boolean, so changed rows need at most two UPDATE statements
+    now = timezone.now()
+    if now_present:
+        AttendanceReport.objects.filter(id__in=now_present).update(status=True, updated_at=now)
+    if now_absent:
+        AttendanceReport.objects.filter(id__in=now_absent).update(status=False, updated_at=now)
+
+    # Keep the per-student attendance counters in sync
+    for attendance, new_statuses, changes in summary_changes:
+        attendance_summary.record_new_reports(attendance, new_statuses)
+        attendance_summary.record_status_changes(attendance, changes)
+
+    return len(to_create), len(now_present) + len(now_absent)
+
+
+def ingest_attendance(batches):
+    """
+    Save attendance for one or more (subject, session year, date) batches atomically.
+
+    Each batch is a dict with "subject_id", "session_year_id", "attendance_date"
+    and "students" (a list of {"id": <CustomUser.id>, "status": 0/1}), so a
+    single call can back-fill several days or subjects. Returns the list of
+    Attendance rows in the order of the batches.
+    """
+    parsed = []
+    for batch in batches:
+        attendance_date = parse_date(str(batch['attendance_date']))
+        if attendance_date is None:
+            raise ValueError("Invalid attendance date: %s" % batch['attendance_date'])
+        parsed.append(((int(batch['subject_id']), int(batch['session_year_id']), attendance_date), batch['students']))
+
+    with transaction.atomic():
+        student_map = resolve_students(stud['id'] for key, students in parsed for stud in students)
+        attendances = _get_or_create_attendances({key for key, students in parsed})
+
+        statuses_by_attendance = {}
+        for key, students in parsed:
+            statuses_by_attendance.setdefault(attendances[key], {}).update(_statuses(students, student_map))
+        _write_reports(statuses_by_attendance)
+
+    return [attendances[key] for key, students in parsed]
+
+
+def update_attendance(attendance_id, students):
+    # Change the stored status of students for an existing Attendance
+    with transaction.atomic():
+        attendance = Attendance.objects.get(id=attendance_id)
+        student_map = resolve_students(stud['id'] for stud in students)
+        _write_reports({attendance: _statuses(students, student_map)})
+    return attendance
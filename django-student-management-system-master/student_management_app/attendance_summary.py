@@ -0,0 +1,182 @@
+import threading
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+from student_management_app.models import Attendance, AttendanceReport, AttendanceSummary
+
+
+def _summary_rows(attendance, student_ids):
+    return AttendanceSummary.objects.filter(
+        student_id__in=student_ids,
+        subject_id=attendance.subject_id_id,
+        session_year_id=attendance.session_year_id_id,
+    )
+
+
+def record_new_reports(attendance, statuses):
+    """
+    Add freshly written AttendanceReport rows of one Attendance to the summary.
+
+    statuses maps Students.id -> status (True for present). Costs three
+    queries however many students are in the class.
+    """
+    if not statuses:
+        return
+    AttendanceSummary.objects.bulk_create([
+        AttendanceSummary(student_id_id=student_id, subject_id_id=attendance.subject_id_id, session_year_id_id=attendance.session_year_id_id)
+        for student_id in statuses
+    ], ignore_conflicts=True)
+
+    present_ids = [student_id for student_id, status in statuses.items() if status]
+    absent_ids = [student_id for student_id, status in statuses.items() if not status]
+    if present_ids:
+        _summary_rows(attendance, present_ids).update(present_count=F('present_count') + 1)
+    if absent_ids:
+        _summary_rows(attendance, absent_ids).update(absent_count=F('absent_count') + 1)
+
+
+def record_status_changes(attendance, changes):
+    """
+    Move counters for AttendanceReport rows whose status was changed.
+
+    changes maps Students.id -> (old_status, new_status); unchanged rows are ignored.
+    """
+    now_present = [student_id for student_id, (old, new) in changes.items() if new and not old]
+    now_absent = [student_id for student_id, (old, new) in changes.items() if old and not new]
+    if now_present:
+        _summary_rows(attendance, now_present).update(present_count=F('present_count') + 1, absent_count=F('absent_count') - 1)
+    if now_absent:
+        _summary_rows(attendance, now_absent).update(present_count=F('present_count') - 1, absent_count=F('absent_count') + 1)
+
+
+def _forget(attendance_id, student_id, status):
+    key = Attendance.objects.filter(id=attendance_id).values_list('subject_id', 'session_year_id').first()
+    if key is None:
+        return
+    rows = AttendanceSummary.objects.filter(student_id=student_id, subject_id=key[0], session_year_id=key[1])
+    # The __gt filter keeps a counter that is already off from going negative
+    if status:
+        rows.filter(present_count__gt=0).update(present_count=F('present_count') - 1)
+    else:
+        rows.filter(absent_count__gt=0).update(absent_count=F('absent_count') - 1)
+
+
+def record_saved_report(previous, report):
+    """
+    Count an AttendanceReport saved one row at a time (admin, shell).
+
+    previous is (attendance id, student id, status) as stored before the
+    save, None for a new report. The views write reports in bulk and call
+    record_new_reports / record_status_changes themselves.
+    """
+    current = (report.attendance_id_id, report.student_id_id, report.status)
+    if previous == current:
+        return
+    if previous is not None and previous[:2] == current[:2]:
+        record_status_changes(report.attendance_id, {report.student_id_id: (previous[2], report.status)})
+        return
+    if previous is not None:
+        _forget(*previous)
+    record_new_reports(report.attendance_id, {report.student_id_id: report.status})
+
+
+# Attendance ids being deleted by this thread, their reports are taken out in one go
+_deleting = threading.local()
+
+
+def record_deleted_report(report):
+    """Take an AttendanceReport deleted on its own (e.g. in the admin) out of the summary"""
+    if report.attendance_id_id in getattr(_deleting, 'ids', ()):
+        return
+    _forget(report.attendance_id_id, report.student_id_id, report.status)
+
+
+def deleting_attendance(attendance):
+    """
+    Take all reports of an Attendance about to be deleted out of the summary
+    with one UPDATE; record_deleted_report then skips the cascaded reports
+    until attendance_deleted() is called.
+    """
+    reports = AttendanceReport.objects.filter(attendance_id=attendance.id, student_id=OuterRef('student_id')).values('student_id')
+    present = reports.annotate(n=Count('id', filter=Q(status=True))).values('n')
+    absent = reports.annotate(n=Count('id', filter=Q(status=False))).values('n')
+    AttendanceSummary.objects.filter(
+        subject_id=attendance.subject_id_id,
+        session_year_id=attendance.session_year_id_id,
+        student_id__in=AttendanceReport.objects.filter(attendance_id=attendance.id).values('student_id'),
+    ).update(
+        present_count=Greatest(F('present_count') - Coalesce(Subquery(present), 0), 0),
+        absent_count=Greatest(F('absent_count') - Coalesce(Subquery(absent), 0), 0),
+    )
+    if not hasattr(_deleting, 'ids'):
+        _deleting.ids = set()
+    _deleting.ids.add(attendance.id)
+
+
+def attendance_deleted(attendance):
+    getattr(_deleting, 'ids', set()).discard(attendance.id)
+
+
+def compute_from_reports():
+    # Recount everything from the raw table: {(student, subject, session_year): (present, absent)}
+    rows = AttendanceReport.objects.values(
+        'student_id', 'attendance_id__subject_id', 'attendance_id__session_year_id'
+    ).annotate(
+        present=Count('id', filter=Q(status=True)),
+        absent=Count('id', filter=Q(status=False)),
+    ).order_by()
+    return {
+        (row['student_id'], row['attendance_id__subject_id'], row['attendance_id__session_year_id']): (row['present'], row['absent'])
+        for row in rows
+    }
+
+
+def rebuild():
+    # Replace the whole summary table with counts recomputed from AttendanceReport
+    counts = compute_from_reports()
+    with transaction.atomic():
+        AttendanceSummary.objects.all().delete()
+        AttendanceSummary.objects.bulk_create([
+            AttendanceSummary(student_id_id=student_id, subject_id_id=subject_id, session_year_id_id=session_year_id, present_count=present, absent_count=absent)
+            for (student_id, subject_id, session_year_id), (present, absent) in counts.items()
+        ], batch_size=1000)
+    return len(counts)
+
+
+def find_drift():
+    """
+    Compare the summary table with the raw reports.
+
+    Returns a list of (key, expected, stored) tuples for every mismatch, where
+    key is (student, subject, session_year) and the counts are (present, absent).
+    """
+    expected = compute_from_reports()
+    stored = {
+        (row[0], row[1], row[2]): (row[3], row[4])
+        for row in AttendanceSummary.objects.values_list('student_id', 'subject_id', 'session_year_id', 'present_count', 'absent_count')
+    }
+    drift = []
+    for key in set(expected) | set(stored):
+        expected_counts = expected.get(key, (0, 0))
+        stored_counts = stored.get(key, (0, 0))
+        if expected_counts != stored_counts:
+            drift.append((key, expected_counts, stored_counts))
+    return drift
+
+
+def totals_by_student(**filters):
+    # {student_id: (present, absent)} summed over subjects and session years
+    rows = AttendanceSummary.objects.filter(**filters).values('student_id').annotate(
+        present=Sum('present_count'), absent=Sum('absent_count')
+    ).order_by()
+    return {row['student_id']: (row['present'], row['absent']) for row in rows}
+
+
+def totals_by_subject(**filters):
+    # {subject_id: (present, absent)} summed over students and session years
+    rows = AttendanceSummary.objects.filter(**filters).values('subject_id').annotate(
+        present=Sum('present_count'), absent=Sum('absent_count')
+    ).order_by()
+    return {row['subject_id']: (row['present'], row['absent']) for row in rows}
@@ -0,0 +1,120 @@
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from student_management_app.models import Staffs, Courses, Subjects, Students, Attendance, LeaveReportStudent, LeaveReportStaff, DashboardSnapshot
+from student_management_app import attendance_summary
+
+
+ADMIN_HOME_SNAPSHOT = "admin_home"
+
+# How long (in seconds) a stored snapshot may be served before it is rebuilt
+DEFAULT_SNAPSHOT_MAX_AGE = 300
+
+
+def _grouped_counts(queryset, group_field):
+    # Turns "SELECT group_field, COUNT(*) ... GROUP BY group_field" into a dict
+    rows = queryset.values(group_field).annotate(total=Count('id')).order_by()
+    return {row[group_field]: row['total'] for row in rows}
+
+
+def build_admin_dashboard():
+    """
+    Compute every chart series shown on the HOD home page.
+
+    The number of queries is constant: each series is one grouped query
+    instead of one query per course, subject, staff member or student.
+    """
+    # Totals
+    all_student_count = Students.objects.count()
+    subject_count = Subjects.objects.count()
+    course_count = Courses.objects.count()
+    staff_count = Staffs.objects.count()
+
+    # Total Subjects and students in Each Course
+    subjects_per_course = _grouped_counts(Subjects.objects.all(), 'course_id')
+    students_per_course = _grouped_counts(Students.objects.all(), 'course_id')
+
+    course_name_list = []
+    subject_count_list = []
+    student_count_list_in_course = []
+    for course_id, course_name in Courses.objects.values_list('id', 'course_name'):
+        course_name_list.append(course_name)
+        subject_count_list.append(subjects_per_course.get(course_id, 0))
+        student_count_list_in_course.append(students_per_course.get(course_id, 0))
+
+    subject_list = []
+    student_count_list_in_subject = []
+    for subject_name, course_id in Subjects.objects.values_list('subject_name', 'course_id'):
+        subject_list.append(subject_name)
+        student_count_list_in_subject.append(students_per_course.get(course_id, 0))
+
+    # For Staffs
+    attendance_per_staff_user = _grouped_counts(Attendance.objects.all(), 'subject_id__staff_id')
+    leaves_per_staff = _grouped_counts(LeaveReportStaff.objects.filter(leave_status=1), 'staff_id')
+
+    staff_attendance_present_list = []
+    staff_attendance_leave_list = []
+    staff_name_list = []
+    for staff_id, admin_id, first_name in Staffs.objects.values_list('id', 'admin', 'admin__first_name'):
+        staff_attendance_present_list.append(attendance_per_staff_user.get(admin_id, 0))
+        staff_attendance_leave_list.append(leaves_per_staff.get(staff_id, 0))
+        staff_name_list.append(first_name)
+
+    # For Students
+    attendance_per_student = attendance_summary.totals_by_student()
+    leaves_per_student = _grouped_counts(LeaveReportStudent.objects.filter(leave_status=1), 'student_id')
+
+    student_attendance_present_list = []
+    student_attendance_leave_list = []
+    student_name_list = []
+    for student_id, first_name in Students.objects.values_list('id', 'admin__first_name'):
+        present, absent = attendance_per_student.get(student_id, (0, 0))
+        student_attendance_present_list.append(present)
+        student_attendance_leave_list.append(leaves_per_student.get(student_id, 0) + absent)
+        student_name_list.append(first_name)
+
+    return {
+        "all_student_count": all_student_count,
+        "subject_count": subject_count,
+        "course_count": course_count,
+        "staff_count": staff_count,
+        "course_name_list": course_name_list,
+        "subject_count_list": subject_count_list,
+        "student_count_list_in_course": student_count_list_in_course,
+        "subject_list": subject_list,
+        "student_count_list_in_subject": student_count_list_in_subject,
+        "staff_attendance_present_list": staff_attendance_present_list,
+        "staff_attendance_leave_list": staff_attendance_leave_list,
+        "staff_name_list": staff_name_list,
+        "student_attendance_present_list": student_attendance_present_list,
+        "student_attendance_leave_list": student_attendance_leave_list,
+        "student_name_list": student_name_list,
+    }
+
+
+def refresh_admin_dashboard_snapshot():
+    # Recompute the dashboard and store it in the snapshot table
+    data = build_admin_dashboard()
+    DashboardSnapshot.objects.update_or_create(name=ADMIN_HOME_SNAPSHOT, defaults={"data": json.dumps(data)})
+    return data
+
+
+def get_admin_dashboard():
+    """
+    Return the HOD home context, served from the snapshot table while it is
+    younger than DASHBOARD_SNAPSHOT_MAX_AGE seconds and rebuilt otherwise.
+    """
+    max_age = getattr(settings, "DASHBOARD_SNAPSHOT_MAX_AGE", DEFAULT_SNAPSHOT_MAX_AGE)
+    if max_age:
+        snapshot = DashboardSnapshot.objects.filter(
+            name=ADMIN_HOME_SNAPSHOT,
+            updated_at__gte=timezone.now() - timedelta(seconds=max_age),
+        ).first()
+        if snapshot is not None:
+            return json.loads(snapshot.data)
+        return refresh_admin_dashboard_snapshot()
+    return build_admin_dashboard()
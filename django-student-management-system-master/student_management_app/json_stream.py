@@ -0,0 +1,93 @@
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 5000
+
+
+def request_data(request):
+    # Lookup endpoints accept GET (cacheable) as well as the old AJAX POST
+    return request.GET if request.method == "GET" else request.POST
+
+
+def _page_params(data):
+    try:
+        cursor = int(data.get("cursor", 0))
+    except (TypeError, ValueError):
+        cursor = 0
+    try:
+        limit = min(int(data.get("limit", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+    except (TypeError, ValueError):
+        limit = DEFAULT_PAGE_SIZE
+    return cursor, max(limit, 1)
+
+
+def _validators(queryset, updated_fields, cursor, limit):
+    """
+    Build (etag, last_modified timestamp) for one page of a queryset from one aggregate query.
+
+    The row count is part of the ETag so deleted rows also change it, and so
+    are cursor and limit so different pages never share an ETag.
+    """
+    aggregates = {"rows": Count("id")}
+    for index, field in enumerate(updated_fields):
+        aggregates["updated_%d" % index] = Max(field)
+    values = queryset.order_by().aggregate(**aggregates)
+    timestamps = [values["updated_%d" % index] for index in range(len(updated_fields))]
+    timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+    last_modified = max(timestamps).timestamp() if timestamps else None
+    digest = hashlib.md5(("%s:%s:%s:%s" % (cursor, limit, values["rows"], [str(timestamp) for timestamp in timestamps])).encode()).hexdigest()
+    return '"%s"' % digest, last_modified
+
+
+def _stream(rows, serialize):
+    # Yields a JSON array row by row instead of building the whole document first
+    encoder = DjangoJSONEncoder()
+    yield "["
+    for index, row in enumerate(rows):
+        if index:
+            yield ","
+        yield encoder.encode(serialize(row))
+    yield "]"
+
+
+def paginated_json_response(request, queryset, fields, serialize, updated_fields=("updated_at",), cursor_field="id"):
+    """
+    Stream one page of queryset as a JSON array.
+
+    Only the given fields are read (values()), rows are ordered by cursor_field
+    and paging is keyset based: pass ?cursor=<last id>&limit=<n>. When more rows
+    exist, the response carries an X-Next-Cursor header (getAllPages() in
+    static/paged-json/paged-json.js follows it). GET requests get
+    ETag/Last-Modified headers and a 304 when the client copy is current.
+    """
+    data = request_data(request)
+    cursor, limit = _page_params(data)
+
+    etag = last_modified = None
+    if request.method == "GET":
+        etag, last_modified = _validators(queryset, updated_fields, cursor, limit)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+    page = list(queryset.filter(**{cursor_field + "__gt": cursor}).order_by(cursor_field).values(cursor_field, *fields)[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    response = StreamingHttpResponse(_stream(page, serialize), content_type="application/json")
+    if has_more:
+        response["X-Next-Cursor"] = str(page[-1][cursor_field])
+    if etag is not None:
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
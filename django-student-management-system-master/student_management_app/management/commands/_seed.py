@@ -0,0 +1,50 @@
+import datetime
+
+from student_management_app import attendance_summary
+from student_management_app.models import CustomUser, Staffs, Courses, Subjects, Students, SessionYearModel, Attendance, AttendanceReport
+
+
+def seed_school(prefix, students, subjects=4, attendance_days=5):
+    """
+    Bulk-insert a course with staff, subjects, students and attendance for benchmarks.
+
+    Users are inserted with bulk_create, so the CustomUser post_save signals do
+    not fire and the Staffs/Students rows are created here explicitly.
+    Returns (course, session_year, subject_list, student_list).
+    """
+    session_year = SessionYearModel.objects.create(session_start_year=datetime.date(2020, 1, 1), session_end_year=datetime.date(2020, 12, 31))
+    course = Courses.objects.create(course_name=prefix + " Course")
+
+    staff_user = CustomUser.objects.bulk_create([
+        CustomUser(username=prefix + "_staff", email=prefix + "_staff@example.com", first_name="Staff", password="!", user_type=2),
+    ])[0]
+    Staffs.objects.create(admin=staff_user, address="")
+
+    subject_list = Subjects.objects.bulk_create([
+        Subjects(subject_name="%s Subject %d" % (prefix, i), course_id=course, staff_id=staff_user)
+        for i in range(subjects)
+    ])
+
+    users = CustomUser.objects.bulk_create([
+        CustomUser(username="%s_student_%d" % (prefix, i), email="%s_student_%d@example.com" % (prefix, i), first_name="Student%d" % i, password="!", user_type=3)
+        for i in range(students)
+    ], batch_size=500)
+    student_list = Students.objects.bulk_create([
+        Students(admin=user, course_id=course, session_year_id=session_year, gender="", profile_pic="", address="")
+        for user in users
+    ], batch_size=500)
+
+    for subject in subject_list:
+        attendances = Attendance.objects.bulk_create([
+            Attendance(subject_id=subject, attendance_date=datetime.date(2020, 1, 1) + datetime.timedelta(days=day), session_year_id=session_year)
+            for day in range(attendance_days)
+        ])
+        for day, attendance in enumerate(attendances):
+            statuses = {student.id: (student.id + day) % 4 != 0 for student in student_list}
+            AttendanceReport.objects.bulk_create([
+                AttendanceReport(student_id_id=student_id, attendance_id=attendance, status=status)
+                for student_id, status in statuses.items()
+            ], batch_size=500)
+            attendance_summary.record_new_reports(attendance, statuses)
+
+    return course, session_year, subject_list, student_list
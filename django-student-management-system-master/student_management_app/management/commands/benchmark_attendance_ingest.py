@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from student_management_app.attendance_ingest import ingest_attendance, update_attendance
+from ._seed import seed_school
+
+
+class Command(BaseCommand):
+    help = 'Measures the query count of saving and updating one class attendance for growing class sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, nargs='+', default=[20, 200, 2000],
+                            help='Class sizes to benchmark (default: 20 200 2000)')
+
+    def handle(self, *args, **options):
+        results = []
+        for size in options['students']:
+            # Everything seeded for a run is rolled back afterwards
+            with transaction.atomic():
+                course, session_year, subjects, students = seed_school("ingest%d" % size, students=size, subjects=1, attendance_days=0)
+                payload = [{"id": student.admin_id, "status": student.id % 2} for student in students]
+                batch = {"subject_id": subjects[0].id, "session_year_id": session_year.id, "attendance_date": "2021-06-01", "students": payload}
+
+                start = time.perf_counter()
+                with CaptureQueriesContext(connection) as save_queries:
+                    attendance = ingest_attendance([batch])[0]
+                save_ms = (time.perf_counter() - start) * 1000
+
+                flipped = [{"id": stud["id"], "status": 1 - stud["status"]} for stud in payload]
+                start = time.perf_counter()
+                with CaptureQueriesContext(connection) as update_queries:
+                    update_attendance(attendance.id, flipped)
+                update_ms = (time.perf_counter() - start) * 1000
+
+                transaction.set_rollback(True)
+
+            # INSERTs are split into batches by the database parameter limit, everything else must stay flat
+            save_inserts = sum(1 for query in save_queries.captured_queries if query['sql'].startswith('INSERT'))
+            results.append((len(save_queries) - save_inserts, len(update_queries)))
+            self.stdout.write('%6d students: save %3d queries (%d INSERT batches) %8.1f ms | update %3d queries %8.1f ms'
+                              % (size, len(save_queries), save_inserts, save_ms, len(update_queries), update_ms))
+
+        if len(set(results)) > 1:
+            raise CommandError('Query count grows with the class size: %s' % results)
+        self.stdout.write(self.style.SUCCESS('Per-class query count is constant.'))
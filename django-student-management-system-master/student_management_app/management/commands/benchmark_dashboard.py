@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from student_management_app.dashboard import build_admin_dashboard
+from ._seed import seed_school
+
+
+class Command(BaseCommand):
+    help = 'Seeds N students and checks that the HOD dashboard query count stays flat as N grows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, nargs='+', default=[50, 500, 5000],
+                            help='Student counts to benchmark (default: 50 500 5000)')
+
+    def handle(self, *args, **options):
+        query_counts = []
+        for size in options['students']:
+            # Everything seeded for a run is rolled back afterwards
+            with transaction.atomic():
+                seed_school("bench%d" % size, students=size)
+
+                start = time.perf_counter()
+                with CaptureQueriesContext(connection) as queries:
+                    build_admin_dashboard()
+                elapsed = (time.perf_counter() - start) * 1000
+
+                transaction.set_rollback(True)
+
+            query_counts.append(len(queries))
+            self.stdout.write('%6d students: %3d queries, %8.1f ms' % (size, len(queries), elapsed))
+
+        if len(set(query_counts)) > 1:
+            raise CommandError('Query count grows with the number of students: %s' % query_counts)
+        self.stdout.write(self.style.SUCCESS('Query count is constant (%d).' % query_counts[0]))
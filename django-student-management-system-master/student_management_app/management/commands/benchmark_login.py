@@ -0,0 +1,55 @@
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from student_management_app.EmailBackEnd import EmailBackEnd
+from student_management_app.models import CustomUser
+
+
+HASHERS = {
+    'default': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'md5': 'django.contrib.auth.hashers.MD5PasswordHasher',
+}
+
+
+class Command(BaseCommand):
+    help = 'Measures EmailBackEnd login throughput, separating password hashing from the user lookup'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5000, help='Users to seed (default: 5000)')
+        parser.add_argument('--logins', type=int, default=2000, help='Logins per scenario (default: 2000)')
+        parser.add_argument('--hasher', default='md5',
+                            help='"md5" (cheap, isolates lookup cost), "default" (PBKDF2) or a dotted hasher path')
+
+    def handle(self, *args, **options):
+        hasher = HASHERS.get(options['hasher'], options['hasher'])
+        with override_settings(PASSWORD_HASHERS=[hasher]):
+            # Everything seeded is rolled back afterwards
+            with transaction.atomic():
+                password = make_password("secret")
+                CustomUser.objects.bulk_create([
+                    CustomUser(username="login_bench_%d" % i, email="login_bench_%d@example.com" % i, password=password, user_type=3)
+                    for i in range(options['users'])
+                ], batch_size=1000)
+                emails = ["login_bench_%d@example.com" % (i % options['users']) for i in range(options['logins'])]
+
+                self.run("login", emails)
+
+                start = time.perf_counter()
+                for email in emails:
+                    CustomUser.objects.get(email=email)
+                elapsed = time.perf_counter() - start
+                self.stdout.write('%-20s %8.0f lookups/s (no password check)' % ("email lookup only", len(emails) / elapsed))
+
+                transaction.set_rollback(True)
+
+    def run(self, name, emails):
+        backend = EmailBackEnd()
+        start = time.perf_counter()
+        for email in emails:
+            assert backend.authenticate(username=email, password="secret") is not None
+        elapsed = time.perf_counter() - start
+        self.stdout.write('%-20s %8.0f logins/s' % (name, len(emails) / elapsed))
@@ -0,0 +1,38 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from student_management_app import HodViews, StaffViews, views
+from student_management_app.LoginCheckMiddleWare import LoginCheckMiddleWare, timings
+from student_management_app.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Measures the per-request overhead of LoginCheckMiddleWare.process_view'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000, help='Requests per scenario (default: 20000)')
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        middleware = LoginCheckMiddleWare(lambda request: None)
+        middleware.timing_enabled = True
+
+        hod = CustomUser(username="bench_hod", user_type="1")
+        scenarios = [
+            ("media file", "/media/photo.jpg", AnonymousUser(), views.loginPage),
+            ("anonymous login page", "/", AnonymousUser(), views.loginPage),
+            ("anonymous redirect", "/admin_home/", AnonymousUser(), HodViews.admin_home),
+            ("hod allowed", "/admin_home/", hod, HodViews.admin_home),
+            ("hod redirected", "/staff_home/", hod, StaffViews.staff_home),
+        ]
+
+        for name, path, user, view_func in scenarios:
+            request = factory.get(path)
+            request.user = user
+            timings.reset()
+            for _ in range(options['requests']):
+                middleware.process_view(request, view_func, (), {})
+            stats = timings.snapshot()
+            self.stdout.write('%-22s avg %6.2f us  max %8.2f us  (%d requests)'
+                              % (name, stats['average'] * 1e6, stats['max'] * 1e6, stats['count']))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from student_management_app import attendance_summary
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the AttendanceSummary table from AttendanceReport and verifies it against the raw rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify-only', action='store_true',
+                            help='Only compare the summary table with the raw reports, do not rebuild it')
+
+    def handle(self, *args, **options):
+        if not options['verify_only']:
+            rows = attendance_summary.rebuild()
+            self.stdout.write('Rebuilt %d attendance summary rows.' % rows)
+
+        drift = attendance_summary.find_drift()
+        for (student_id, subject_id, session_year_id), expected, stored in drift[:20]:
+            self.stdout.write(
+                'student=%s subject=%s session_year=%s: expected present/absent %s, stored %s'
+                % (student_id, subject_id, session_year_id, expected, stored)
+            )
+        if drift:
+            raise CommandError('%d attendance summary rows do not match AttendanceReport.' % len(drift))
+        self.stdout.write(self.style.SUCCESS('Attendance summary matches AttendanceReport.'))
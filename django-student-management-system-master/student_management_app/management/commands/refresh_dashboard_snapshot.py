@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from student_management_app.dashboard import refresh_admin_dashboard_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the HOD home dashboard and stores it in the snapshot table'
+
+    def handle(self, *args, **options):
+        data = refresh_admin_dashboard_snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            'Dashboard snapshot refreshed (%d students, %d staffs).' % (data['all_student_count'], data['staff_count'])
+        ))
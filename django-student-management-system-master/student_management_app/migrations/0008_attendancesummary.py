@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-18 09:47
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+import django.db.models.deletion
+
+
+def fill_attendance_summary(apps, schema_editor):
+    # Count the attendance taken so far, the dashboards read only the summary
+    AttendanceReport = apps.get_model('student_management_app', 'AttendanceReport')
+    AttendanceSummary = apps.get_model('student_management_app', 'AttendanceSummary')
+    rows = AttendanceReport.objects.values(
+        'student_id', 'attendance_id__subject_id', 'attendance_id__session_year_id'
+    ).annotate(
+        present=Count('id', filter=Q(status=True)),
+        absent=Count('id', filter=Q(status=False)),
+    ).order_by()
+    AttendanceSummary.objects.bulk_create([
+        AttendanceSummary(
+            student_id_id=row['student_id'],
+            subject_id_id=row['attendance_id__subject_id'],
+            session_year_id_id=row['attendance_id__session_year_id'],
+            present_count=row['present'],
+            absent_count=row['absent'],
+        )
+        for row in rows.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management_app', '0007_dashboardsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceSummary',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('present_count', models.PositiveIntegerField(default=0)),
+                ('absent_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('session_year_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='student_management_app.SessionYearModel')),
+                ('student_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='student_management_app.Students')),
+                ('subject_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='student_management_app.Subjects')),
+            ],
+            options={
+                'unique_together': {('student_id', 'subject_id', 'session_year_id')},
+            },
+        ),
+        migrations.RunPython(fill_attendance_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2 on 2026-10-18 20:31
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Q
+
+
+def merge_duplicate_attendance(apps, schema_editor):
+    """
+    Fold attendance taken twice for the same subject and day into the oldest
+    Attendance row. Per student the newest report wins, as saving attendance
+    again does now.
+    """
+    Attendance = apps.get_model('student_management_app', 'Attendance')
+    AttendanceReport = apps.get_model('student_management_app', 'AttendanceReport')
+    AttendanceSummary = apps.get_model('student_management_app', 'AttendanceSummary')
+
+    duplicates = Attendance.objects.values('subject_id', 'session_year_id', 'attendance_date').annotate(
+        rows=Count('id'), keep=Min('id')
+    ).filter(rows__gt=1).order_by()
+    if not duplicates.exists():
+        return
+
+    for group in duplicates:
+        attendance_ids = list(Attendance.objects.filter(
+            subject_id=group['subject_id'], session_year_id=group['session_year_id'], attendance_date=group['attendance_date']
+        ).values_list('id', flat=True))
+        newest = {}
+        for report_id, student_id in AttendanceReport.objects.filter(attendance_id__in=attendance_ids).order_by('id').values_list('id', 'student_id'):
+            newest[student_id] = report_id
+        AttendanceReport.objects.filter(attendance_id__in=attendance_ids).exclude(id__in=newest.values()).delete()
+        AttendanceReport.objects.filter(id__in=newest.values()).update(attendance_id=group['keep'])
+        Attendance.objects.filter(id__in=attendance_ids).exclude(id=group['keep']).delete()
+
+    # Reports were dropped, recount the summary as 0008 did
+    AttendanceSummary.objects.all().delete()
+    rows = AttendanceReport.objects.values(
+        'student_id', 'attendance_id__subject_id', 'attendance_id__session_year_id'
+    ).annotate(
+        present=Count('id', filter=Q(status=True)),
+        absent=Count('id', filter=Q(status=False)),
+    ).order_by()
+    AttendanceSummary.objects.bulk_create([
+        AttendanceSummary(
+            student_id_id=row['student_id'],
+            subject_id_id=row['attendance_id__subject_id'],
+            session_year_id_id=row['attendance_id__session_year_id'],
+            present_count=row['present'],
+            absent_count=row['absent'],
+        )
+        for row in rows.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management_app', '0009_customuser_email_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_attendance, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 20:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management_app', '0010_merge_duplicate_attendance'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(fields=('subject_id', 'session_year_id', 'attendance_date'), name='unique_attendance_per_day'),
+        ),
+    ]
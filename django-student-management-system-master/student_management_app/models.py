@@ -1,6 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
 
 
@@ -17,6 +17,13 @@ class SessionYearModel(models.Model):
 class CustomUser(AbstractUser):
     user_type_data = ((1, "HOD"), (2, "Staff"), (3, "Student"))
     user_type = models.CharField(default=1, choices=user_type_data, max_length=10)
+    # Users log in with their email (EmailBackEnd), so it is indexed and unique when set
+    email = models.EmailField('email address', blank=True, db_index=True)
+
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            models.UniqueConstraint(fields=['email'], condition=~models.Q(email=''), name='unique_customuser_email'),
+        ]
 
 
 
@@ -84,6 +91,12 @@ class Attendance(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     objects = models.Manager()
 
+    class Meta:
+        # One attendance per subject and day, saving it again updates the reports (see attendance_ingest.py)
+        constraints = [
+            models.UniqueConstraint(fields=['subject_id', 'session_year_id', 'attendance_date'], name='unique_attendance_per_day'),
+        ]
+
 
 class AttendanceReport(models.Model):
     # Individual Student Attendance
@@ -96,6 +109,21 @@ class AttendanceReport(models.Model):
     objects = models.Manager()
 
 
+class AttendanceSummary(models.Model):
+    # Denormalized present/absent counters per (student, subject, session year), kept in sync with AttendanceReport
+    id = models.AutoField(primary_key=True)
+    student_id = models.ForeignKey(Students, on_delete=models.CASCADE)
+    subject_id = models.ForeignKey(Subjects, on_delete=models.CASCADE)
+    session_year_id = models.ForeignKey(SessionYearModel, on_delete=models.CASCADE)
+    present_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    objects = models.Manager()
+
+    class Meta:
+        unique_together = ('student_id', 'subject_id', 'session_year_id')
+
+
 class LeaveReportStudent(models.Model):
     id = models.AutoField(primary_key=True)
     student_id = models.ForeignKey(Students, on_delete=models.CASCADE)
@@ -168,6 +196,16 @@ class StudentResult(models.Model):
     objects = models.Manager()
 
 
+class DashboardSnapshot(models.Model):
+    # Precomputed dashboard data (JSON) so heavy pages can be served without recounting
+    id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=100, unique=True)
+    data = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    objects = models.Manager()
+
+
 #Creating Django Signals
 
 # It's like trigger in database. It will run only when Data is Added in CustomUser model
@@ -194,6 +232,40 @@ def save_user_profile(sender, instance, **kwargs):
         instance.staffs.save()
     if instance.user_type == 3:
         instance.students.save()
-    
 
 
+@receiver(pre_save, sender=AttendanceReport)
+def remember_attendance_report(sender, instance, raw=False, **kwargs):
+    # The stored row, so an edit in the admin can move the count from the old status to the new one
+    instance._previous_report = None
+    if instance.pk and not raw:
+        instance._previous_report = sender.objects.filter(pk=instance.pk).values_list('attendance_id', 'student_id', 'status').first()
+
+
+@receiver(post_save, sender=AttendanceReport)
+def count_attendance_report(sender, instance, raw=False, **kwargs):
+    # Reports saved one at a time (admin, shell); the views write in bulk and update AttendanceSummary themselves
+    if raw:
+        return
+    from student_management_app.attendance_summary import record_saved_report
+    record_saved_report(getattr(instance, '_previous_report', None), instance)
+
+
+@receiver(post_delete, sender=AttendanceReport)
+def forget_attendance_report(sender, instance, **kwargs):
+    # Deleting a report in the admin takes it out of AttendanceSummary
+    from student_management_app.attendance_summary import record_deleted_report
+    record_deleted_report(instance)
+
+
+@receiver(pre_delete, sender=Attendance)
+def forget_attendance(sender, instance, **kwargs):
+    # The reports deleted along with it are taken out of AttendanceSummary in one UPDATE
+    from student_management_app.attendance_summary import deleting_attendance
+    deleting_attendance(instance)
+
+
+@receiver(post_delete, sender=Attendance)
+def attendance_forgotten(sender, instance, **kwargs):
+    from student_management_app.attendance_summary import attendance_deleted
+    attendance_deleted(instance)
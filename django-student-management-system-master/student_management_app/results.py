@@ -0,0 +1,139 @@
+import csv
+import io
+import math
+import tempfile
+
+import openpyxl
+from django.db import transaction
+from django.utils import timezone
+
+from student_management_app.models import Subjects, Students, StudentResult
+
+
+RESULT_SHEET_HEADER = ["Student ID", "Student Name", "Subject", "Exam Marks", "Assignment Marks", "Total"]
+
+
+def parse_csv_rows(text):
+    # CSV with the columns student_id, exam_marks, assignment_marks (header row required)
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def _parse_marks(value):
+    marks = float(value)
+    # float() also accepts "nan" and "inf"
+    if not math.isfinite(marks):
+        raise ValueError("marks must be a finite number")
+    if marks < 0:
+        raise ValueError("marks cannot be negative")
+    return marks
+
+
+def upsert_results(subject_id, rows, session_year_id=None):
+    """
+    Save exam/assignment marks of many students for one subject.
+
+    rows is a list of {"student_id": <CustomUser.id>, "exam_marks", "assignment_marks"}.
+    Every row is validated first; if any row is invalid nothing is saved and
+    the list of {"row", "student_id", "error"} is returned. Otherwise all
+    results are created/updated in one transaction with bulk queries.
+    Returns (saved_count, errors).
+    """
+    subject = Subjects.objects.get(id=subject_id)
+
+    # Students who may get a result for this subject: {CustomUser.id: Students.id}
+    students = Students.objects.filter(course_id=subject.course_id_id)
+    if session_year_id:
+        students = students.filter(session_year_id=session_year_id)
+    student_map = dict(students.values_list('admin', 'id'))
+
+    errors = []
+    marks_by_student = {}
+    for index, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append({"row": index, "student_id": None, "error": "Row must be an object with student_id, exam_marks and assignment_marks."})
+            continue
+        admin_id = row.get('student_id')
+        try:
+            student_id = student_map[int(admin_id)]
+        except (KeyError, TypeError, ValueError):
+            errors.append({"row": index, "student_id": admin_id, "error": "Student is not enrolled in this subject's course."})
+            continue
+        try:
+            exam_marks = _parse_marks(row.get('exam_marks'))
+            assignment_marks = _parse_marks(row.get('assignment_marks'))
+        except (TypeError, ValueError):
+            errors.append({"row": index, "student_id": admin_id, "error": "Marks must be finite, non-negative numbers."})
+            continue
+        if student_id in marks_by_student:
+            errors.append({"row": index, "student_id": admin_id, "error": "Duplicate row for this student."})
+            continue
+        marks_by_student[student_id] = (exam_marks, assignment_marks)
+
+    if errors:
+        return 0, errors
+
+    with transaction.atomic():
+        existing = {
+            result.student_id_id: result
+            for result in StudentResult.objects.select_for_update().filter(subject_id=subject, student_id__in=marks_by_student)
+        }
+        now = timezone.now()
+        to_create = []
+        to_update = []
+        for student_id, (exam_marks, assignment_marks) in marks_by_student.items():
+            result = existing.get(student_id)
+            if result is None:
+                to_create.append(StudentResult(student_id_id=student_id, subject_id=subject, subject_exam_marks=exam_marks, subject_assignment_marks=assignment_marks))
+            else:
+                result.subject_exam_marks = exam_marks
+                result.subject_assignment_marks = assignment_marks
+                result.updated_at = now
+                to_update.append(result)
+        StudentResult.objects.bulk_create(to_create, batch_size=500)
+        StudentResult.objects.bulk_update(to_update, ['subject_exam_marks', 'subject_assignment_marks', 'updated_at'], batch_size=500)
+
+    return len(marks_by_student), []
+
+
+def result_sheet_rows(course_id):
+    # Result rows of a course, read in chunks straight from the database
+    results = StudentResult.objects.filter(subject_id__course_id=course_id).order_by(
+        'subject_id__subject_name', 'student_id__admin__first_name', 'student_id__admin__last_name'
+    ).values_list(
+        'student_id__admin', 'student_id__admin__first_name', 'student_id__admin__last_name',
+        'subject_id__subject_name', 'subject_exam_marks', 'subject_assignment_marks',
+    )
+    for admin_id, first_name, last_name, subject_name, exam_marks, assignment_marks in results.iterator(chunk_size=2000):
+        yield [admin_id, first_name + " " + last_name, subject_name, exam_marks, assignment_marks, exam_marks + assignment_marks]
+
+
+class _Echo:
+    # File-like object whose write() returns the value, so csv.writer can feed a generator
+    def write(self, value):
+        return value
+
+
+def stream_result_sheet_csv(course_id):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(RESULT_SHEET_HEADER)
+    for row in result_sheet_rows(course_id):
+        yield writer.writerow(row)
+
+
+def write_result_sheet_xlsx(course_id):
+    """
+    Write the result sheet of a course to a temporary XLSX file and return it.
+
+    Uses openpyxl's write-only mode so rows are not kept in memory. Unlike
+    the CSV export the XLSX one is not streamed: the whole file is written
+    before the first byte is sent, then read back in chunks by FileResponse.
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Results")
+    sheet.append(RESULT_SHEET_HEADER)
+    for row in result_sheet_rows(course_id):
+        sheet.append(row)
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
@@ -56,6 +56,7 @@ urlpatterns = [
     path('admin_view_attendance/', HodViews.admin_view_attendance, name="admin_view_attendance"),
     path('admin_get_attendance_dates/', HodViews.admin_get_attendance_dates, name="admin_get_attendance_dates"),
     path('admin_get_attendance_student/', HodViews.admin_get_attendance_student, name="admin_get_attendance_student"),
+    path('admin_export_results/<int:course_id>/', HodViews.admin_export_results, name="admin_export_results"),
     path('admin_profile/', HodViews.admin_profile, name="admin_profile"),
     path('admin_profile_update/', HodViews.admin_profile_update, name="admin_profile_update"),
     
@@ -66,6 +67,7 @@ urlpatterns = [
     path('staff_take_attendance/', StaffViews.staff_take_attendance, name="staff_take_attendance"),
     path('get_students/', StaffViews.get_students, name="get_students"),
     path('save_attendance_data/', StaffViews.save_attendance_data, name="save_attendance_data"),
+    path('save_attendance_batch/', StaffViews.save_attendance_batch, name="save_attendance_batch"),
     path('staff_update_attendance/', StaffViews.staff_update_attendance, name="staff_update_attendance"),
     path('get_attendance_dates/', StaffViews.get_attendance_dates, name="get_attendance_dates"),
     path('get_attendance_student/', StaffViews.get_attendance_student, name="get_attendance_student"),
@@ -78,6 +80,7 @@ urlpatterns = [
     path('staff_profile_update/', StaffViews.staff_profile_update, name="staff_profile_update"),
     path('staff_add_result/', StaffViews.staff_add_result, name="staff_add_result"),
     path('staff_add_result_save/', StaffViews.staff_add_result_save, name="staff_add_result_save"),
+    path('staff_add_result_bulk/', StaffViews.staff_add_result_bulk, name="staff_add_result_bulk"),
 
     # URSL for Student
     path('student_home/', StudentViews.student_home, name="student_home"),
@@ -0,0 +1,157 @@
+"""
+User activity logging for Rahul Portfolio Website
+
+log_activity() doesn't write to the database: it appends the UserActivity
+row to an in-memory ring buffer and a background thread bulk_creates the
+buffer in batches every ACTIVITY_FLUSH_INTERVAL seconds (or as soon as a
+batch is full). When the database can't keep up, the buffer keeps the
+newest ACTIVITY_BUFFER_SIZE rows and drops the oldest.
+
+Page visits are the bulk of the rows, so they can be thinned out:
+ACTIVITY_SAMPLE_RATES keeps only a fraction of an activity type (e.g.
+{'visit': 0.1}) and a user's visits within ACTIVITY_VISIT_DEDUP_SECONDS of
+their last logged visit are skipped (per process).
+
+Old rows are rolled up into UserActivityDaily by the
+compact_user_activity command.
+"""
+
+import atexit
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import UserActivity
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUFFER_SIZE = 10000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 2  # seconds, 0 writes every row right away
+DEFAULT_VISIT_DEDUP_SECONDS = 300
+
+# Last logged visit per user id are forgotten once there are more users than this
+MAX_TRACKED_USERS = 10000
+
+
+def get_client_ip(request):
+    """
+    Get client IP address from request
+    """
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        ip = x_forwarded_for.split(',')[0]
+    else:
+        ip = request.META.get('REMOTE_ADDR')
+    return ip
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class ActivityBuffer:
+    """
+    Ring buffer of UserActivity rows waiting to be written, and the thread
+    writing them
+    """
+
+    def __init__(self):
+        self._rows = deque(maxlen=_setting('ACTIVITY_BUFFER_SIZE', DEFAULT_BUFFER_SIZE))
+        self._wakeup = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._flusher_pid = None
+        self._last_visits = {}
+        self.dropped = 0
+        atexit.register(self.flush)
+
+    def add(self, row):
+        if _setting('ACTIVITY_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL) <= 0:
+            self._write([row])
+            return
+        if len(self._rows) == self._rows.maxlen:
+            self.dropped += 1
+        self._rows.append(row)
+        self._start_flusher()
+        if len(self._rows) >= _setting('ACTIVITY_BATCH_SIZE', DEFAULT_BATCH_SIZE):
+            self._wakeup.set()
+
+    def seen_recently(self, user_id):
+        """True if the user's last logged visit is within the dedup window, otherwise remembers this one"""
+        window = _setting('ACTIVITY_VISIT_DEDUP_SECONDS', DEFAULT_VISIT_DEDUP_SECONDS)
+        now = time.monotonic()
+        last = self._last_visits.get(user_id)
+        if last is not None and now - last < window:
+            return True
+        if len(self._last_visits) >= MAX_TRACKED_USERS:
+            self._last_visits = {uid: seen for uid, seen in self._last_visits.items() if now - seen < window}
+        self._last_visits[user_id] = now
+        return False
+
+    def _start_flusher(self):
+        # Checked by pid, as a forked worker process doesn't inherit the thread
+        if self._flusher_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._flusher_pid != os.getpid():
+                threading.Thread(target=self._run, name='activity-flusher', daemon=True).start()
+                self._flusher_pid = os.getpid()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(_setting('ACTIVITY_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL))
+            self._wakeup.clear()
+            self.flush()
+            connection.close_if_unusable_or_obsolete()
+
+    def flush(self):
+        """Write everything buffered so far, in batches; returns the number of rows written"""
+        batch_size = _setting('ACTIVITY_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+        written = 0
+        with self._flush_lock:
+            while self._rows:
+                batch = []
+                while self._rows and len(batch) < batch_size:
+                    batch.append(self._rows.popleft())
+                written += self._write(batch)
+        return written
+
+    def _write(self, rows):
+        try:
+            UserActivity.objects.bulk_create(rows)
+        except Exception:
+            # Activity logs are not worth retrying, the batch is dropped
+            logger.exception('Writing %d user activities failed', len(rows))
+            self.dropped += len(rows)
+            return 0
+        return len(rows)
+
+
+activity_buffer = ActivityBuffer()
+
+
+def log_activity(user, activity_type, description='', request=None):
+    """
+    Queue a UserActivity row (sampled and, for visits, deduplicated per user)
+    """
+    rate = _setting('ACTIVITY_SAMPLE_RATES', {}).get(activity_type, 1)
+    if rate < 1 and random.random() >= rate:
+        return
+    if activity_type == 'visit' and activity_buffer.seen_recently(user.pk):
+        return
+
+    row = UserActivity(user=user, activity_type=activity_type, description=description, created_at=timezone.now())
+    if request is not None:
+        row.ip_address = get_client_ip(request)
+        row.user_agent = request.META.get('HTTP_USER_AGENT', '')[:300]
+    # The flusher's connection can't see rows (e.g. a new user) of a transaction that isn't committed yet
+    transaction.on_commit(lambda: activity_buffer.add(row))
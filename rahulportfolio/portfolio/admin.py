@@ -6,7 +6,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from .models import (
     SiteInfo, SocialLink, Skill, Project, Experience, Education,
-    BlogPost, ContactMessage, VisitorCount, UserActivity, Testimonial, Service
+    BlogPost, BlogPostHourlyViews, Tag, ContactMessage, VisitorCount, UserActivity, UserActivityDaily, Testimonial, Service
 )
 
 
@@ -94,6 +94,29 @@ class BlogPostAdmin(admin.ModelAdmin):
     date_hierarchy = 'published_at'
 
 
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug']
+    search_fields = ['name', 'slug']
+    readonly_fields = ['slug']
+    
+    def has_add_permission(self, request):
+        # Tags come from BlogPost.tags and Project.technology_used (see portfolio.tag_index)
+        return False
+
+
+@admin.register(BlogPostHourlyViews)
+class BlogPostHourlyViewsAdmin(admin.ModelAdmin):
+    list_display = ['post', 'hour', 'views']
+    list_filter = ['hour']
+    search_fields = ['post__title']
+    readonly_fields = ['post', 'hour', 'views']
+    
+    def has_add_permission(self, request):
+        # Only written by the blog view counter
+        return False
+
+
 @admin.register(ContactMessage)
 class ContactMessageAdmin(admin.ModelAdmin):
     list_display = ['name', 'email', 'subject', 'is_read', 'is_replied', 'created_at']
@@ -122,6 +145,18 @@ class UserActivityAdmin(admin.ModelAdmin):
     readonly_fields = ['user', 'activity_type', 'description', 'ip_address', 'user_agent', 'created_at']
 
 
+@admin.register(UserActivityDaily)
+class UserActivityDailyAdmin(admin.ModelAdmin):
+    list_display = ['user', 'date', 'activity_type', 'count']
+    list_filter = ['activity_type', 'date']
+    search_fields = ['user__username']
+    readonly_fields = ['user', 'date', 'activity_type', 'count']
+    
+    def has_add_permission(self, request):
+        # Only written by the compact_user_activity command
+        return False
+
+
 @admin.register(Testimonial)
 class TestimonialAdmin(admin.ModelAdmin):
     list_display = ['client_name', 'client_title', 'rating', 'is_active', 'order']
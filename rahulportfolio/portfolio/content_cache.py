@@ -0,0 +1,53 @@
+"""
+Content cache for Rahul Portfolio Website
+
+The public pages show content that only changes when it is edited in the
+admin or the dashboard. Everything cached from it (rendered page sections,
+see the {% cache %} tags in home.html and about.html, and the site info and
+social links of every page) is stored under a key containing the current
+"content generation". Saving or deleting any of CONTENT_MODELS starts a new
+generation (see portfolio.signals), so the old entries are simply never
+read again and expire on their own.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+GENERATION_KEY = 'portfolio:content:generation'
+DEFAULT_TIMEOUT = 60 * 60 * 24
+
+_missing = object()
+
+
+def content_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = new_generation()
+    return generation
+
+
+def new_generation():
+    # A timestamp rather than cache.incr(): not every cache backend increments atomically
+    # across processes, and two concurrent bumps must not end up with the same generation
+    generation = str(time.time_ns())
+    cache.set(GENERATION_KEY, generation, None)
+    return generation
+
+
+def bump_content_generation():
+    """Start a new generation once the current transaction commits"""
+    transaction.on_commit(new_generation)
+
+
+def get_content(name, build):
+    """build()'s value, cached for the current generation"""
+    key = f'portfolio:content:{content_generation()}:{name}'
+    value = cache.get(key, _missing)
+    if value is _missing:
+        value = build()
+        cache.set(key, value, getattr(settings, 'CONTENT_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+    return value
@@ -0,0 +1,251 @@
+"""
+Write-behind counters for Rahul Portfolio Website
+
+Hits are added to an in-process counter split into shards (one lock per
+shard, picked by thread) so request threads rarely wait for each other and
+never touch the database. Every few seconds one request flushes everything
+counted so far with a single UPDATE ... SET count = count + n per key, which
+is exact however many threads and worker processes add to the same row.
+
+Hits not yet flushed when a process is killed are lost; a normal shutdown
+flushes them (atexit).
+
+Blog post views are counted the same way, per post and hour: a flush adds
+them to BlogPost.views and to the post's BlogPostHourlyViews bucket, which
+trending_posts() sums over the last few hours.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import VisitorCount, BlogPost, BlogPostHourlyViews
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARDS = 8
+
+
+class WriteBehindCounter:
+    """
+    Counts per key in memory; write() (defined by subclasses) stores a batch
+    of counts, flush() hands it everything counted since the last flush
+    """
+    interval_setting = None
+    default_interval = 10  # seconds
+
+    def __init__(self, shards=DEFAULT_SHARDS):
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._shards = [Counter() for _ in range(shards)]
+        self._flush_lock = threading.Lock()
+        self._next_flush = time.monotonic() + self.interval
+        atexit.register(self.flush)
+
+    @property
+    def interval(self):
+        return getattr(settings, self.interval_setting, self.default_interval) if self.interval_setting else self.default_interval
+
+    def add(self, key, n=1):
+        index = threading.get_ident() % len(self._shards)
+        with self._locks[index]:
+            self._shards[index][key] += n
+
+    def pending(self, key):
+        """Hits of key counted in this process and not flushed yet"""
+        total = 0
+        for index, lock in enumerate(self._locks):
+            with lock:
+                total += self._shards[index].get(key, 0)
+        return total
+
+    def _drain(self):
+        drained = Counter()
+        for index, lock in enumerate(self._locks):
+            with lock:
+                counts, self._shards[index] = self._shards[index], Counter()
+            drained.update(counts)
+        return +drained
+
+    def flush(self):
+        """Write everything counted so far; returns the number of hits written"""
+        with self._flush_lock:
+            return self._flush()
+
+    def maybe_flush(self):
+        """Flush if the interval has passed, unless another thread is flushing already"""
+        if time.monotonic() < self._next_flush or not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self._flush()
+        finally:
+            self._flush_lock.release()
+
+    def _flush(self):
+        self._next_flush = time.monotonic() + self.interval
+        counts = self._drain()
+        if not counts:
+            return 0
+        try:
+            self.write(counts)
+        except Exception:
+            # Keep the hits for the next flush instead of losing them
+            logger.exception('Flushing %s failed', type(self).__name__)
+            for key, n in counts.items():
+                self.add(key, n)
+            return 0
+        return sum(counts.values())
+
+    def write(self, counts):
+        raise NotImplementedError
+
+
+class VisitorCounter(WriteBehindCounter):
+    """
+    The site-wide visitor count (VisitorCount row 1): the total last read
+    from the database plus the hits this process has not flushed yet
+    """
+    interval_setting = 'VISITOR_COUNT_FLUSH_INTERVAL'
+    key = 1
+
+    def __init__(self, shards=DEFAULT_SHARDS):
+        super().__init__(shards)
+        self._stored = None
+        self._in_flight = 0
+
+    def hit(self):
+        self.add(self.key)
+        self.maybe_flush()
+
+    def total(self):
+        if self._stored is None:
+            self._stored = self._read()
+        return self._stored + self._in_flight + self.pending(self.key)
+
+    def write(self, counts):
+        n = counts[self.key]
+        self._in_flight = n
+        try:
+            updated = VisitorCount.objects.filter(id=self.key).update(count=F('count') + n, last_visitor=timezone.now())
+            if not updated:
+                VisitorCount.objects.get_or_create(id=self.key, defaults={'count': 0})
+                VisitorCount.objects.filter(id=self.key).update(count=F('count') + n, last_visitor=timezone.now())
+        except Exception:
+            self._in_flight = 0
+            raise
+
+        # The hits are stored now, raising would make _flush add them back and count them twice
+        try:
+            # Picks up the hits flushed by other processes as well
+            self._stored = self._read()
+        except Exception:
+            logger.exception('Reading the visitor count failed')
+            if self._stored is not None:
+                self._stored += n
+        finally:
+            self._in_flight = 0
+
+    def _read(self):
+        return VisitorCount.objects.filter(id=self.key).values_list('count', flat=True).first() or 0
+
+
+visitor_counter = VisitorCounter()
+
+
+DEFAULT_TRENDING_HOURS = 24
+DEFAULT_RETENTION_HOURS = 7 * 24
+
+
+def current_hour():
+    return timezone.now().replace(minute=0, second=0, microsecond=0)
+
+
+class BlogViewCounter(WriteBehindCounter):
+    """
+    Views per (post id, hour). A flush runs one UPDATE per post for
+    BlogPost.views (update() leaves updated_at alone) and one per hourly
+    bucket, and now and then deletes buckets older than
+    BLOG_VIEW_RETENTION_HOURS.
+    """
+    interval_setting = 'BLOG_VIEW_FLUSH_INTERVAL'
+
+    def __init__(self, shards=DEFAULT_SHARDS):
+        super().__init__(shards)
+        self._next_prune = 0
+
+    def hit(self, post_id):
+        self.add((post_id, current_hour()))
+        self.maybe_flush()
+
+    def pending_views(self, post_id):
+        """Views of the post counted in this process and not flushed yet"""
+        total = 0
+        for index, lock in enumerate(self._locks):
+            with lock:
+                total += sum(n for (key_post_id, _), n in self._shards[index].items() if key_post_id == post_id)
+        return total
+
+    def write(self, counts):
+        per_post = Counter()
+        for (post_id, _), n in counts.items():
+            per_post[post_id] += n
+
+        with transaction.atomic():
+            # Sorted, so concurrent flushes of other processes update the rows in the same order
+            existing = {
+                post_id for post_id in sorted(per_post)
+                if BlogPost.objects.filter(pk=post_id).update(views=F('views') + per_post[post_id])
+            }
+            # Views of posts deleted in the meantime are dropped
+            for post_id, hour in sorted(key for key in counts if key[0] in existing):
+                self._bump_bucket(post_id, hour, counts[post_id, hour])
+
+        # The views are committed, raising would make _flush add them back and count them twice
+        try:
+            self._prune()
+        except Exception:
+            logger.exception('Pruning the hourly blog views failed')
+
+    def _bump_bucket(self, post_id, hour, n):
+        buckets = BlogPostHourlyViews.objects.filter(post_id=post_id, hour=hour)
+        if buckets.update(views=F('views') + n):
+            return
+        try:
+            with transaction.atomic():
+                BlogPostHourlyViews.objects.create(post_id=post_id, hour=hour, views=n)
+        except IntegrityError:
+            # Another process created the bucket first
+            buckets.update(views=F('views') + n)
+
+    def _prune(self):
+        if time.monotonic() < self._next_prune:
+            return
+        self._next_prune = time.monotonic() + 60 * 60
+        hours = getattr(settings, 'BLOG_VIEW_RETENTION_HOURS', DEFAULT_RETENTION_HOURS)
+        BlogPostHourlyViews.objects.filter(hour__lt=current_hour() - timedelta(hours=hours)).delete()
+
+
+blog_view_counter = BlogViewCounter()
+
+
+def trending_posts(hours=None, limit=5):
+    """
+    Published posts with the most views in the last `hours` hours
+    (TRENDING_POSTS_HOURS by default), counting the current hour
+    """
+    if hours is None:
+        hours = getattr(settings, 'TRENDING_POSTS_HOURS', DEFAULT_TRENDING_HOURS)
+    since = current_hour() - timedelta(hours=hours - 1)
+    return (
+        BlogPost.objects.filter(is_published=True, hourly_views__hour__gte=since)
+        .annotate(recent_views=Sum('hourly_views__views'))
+        .order_by('-recent_views', '-published_at')[:limit]
+    )
@@ -0,0 +1,72 @@
+"""
+Retention for UserActivity
+"""
+
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from portfolio.models import UserActivity, UserActivityDaily
+
+
+class Command(BaseCommand):
+    help = 'Rolls UserActivity rows older than --days up into daily per-user counts (UserActivityDaily) and deletes them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90, help='Keep the rows of the last N days (default: 90)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be compacted')
+
+    def handle(self, *args, **options):
+        cutoff_date = timezone.localdate() - datetime.timedelta(days=options['days'])
+        cutoff = timezone.make_aware(datetime.datetime.combine(cutoff_date, datetime.time()))
+        old = UserActivity.objects.filter(created_at__lt=cutoff)
+
+        first = old.order_by('created_at').values_list('created_at', flat=True).first()
+        if first is None:
+            self.stdout.write('Nothing older than %s.' % cutoff_date)
+            return
+        if options['dry_run']:
+            self.stdout.write('Would compact %d rows from %s to %s.' % (old.count(), timezone.localdate(first), cutoff_date))
+            return
+
+        # One day per transaction, so a long backlog doesn't hold one huge transaction
+        rows = days = 0
+        day = timezone.localdate(first)
+        while day < cutoff_date:
+            start = timezone.make_aware(datetime.datetime.combine(day, datetime.time()))
+            end = timezone.make_aware(datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time()))
+            compacted = self.compact(old.filter(created_at__gte=start, created_at__lt=end), day)
+            rows += compacted
+            days += compacted > 0
+            day += datetime.timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS('Compacted %d rows of %d days into daily counts.' % (rows, days)))
+
+    @transaction.atomic
+    def compact(self, activities, day):
+        counts = {
+            (row['user_id'], row['activity_type']): row['count']
+            for row in activities.values('user_id', 'activity_type').annotate(count=Count('id'))
+        }
+        if not counts:
+            return 0
+
+        # Add to the counts of the day already compacted (e.g. rows written late)
+        existing = {
+            (daily.user_id, daily.activity_type): daily
+            for daily in UserActivityDaily.objects.filter(date=day).select_for_update()
+        }
+        new, changed = [], []
+        for (user_id, activity_type), count in counts.items():
+            daily = existing.get((user_id, activity_type))
+            if daily is None:
+                new.append(UserActivityDaily(user_id=user_id, date=day, activity_type=activity_type, count=count))
+            else:
+                daily.count += count
+                changed.append(daily)
+        UserActivityDaily.objects.bulk_update(changed, ['count'])
+        UserActivityDaily.objects.bulk_create(new)
+        deleted, _ = activities.delete()
+        return deleted
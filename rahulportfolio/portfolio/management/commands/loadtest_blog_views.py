@@ -0,0 +1,82 @@
+"""
+Load test for the blog view counter
+"""
+
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.test import override_settings
+
+from portfolio.counters import blog_view_counter, trending_posts
+from portfolio.models import BlogPost, BlogPostHourlyViews
+
+
+class Command(BaseCommand):
+    help = 'Counts parallel blog post views and checks BlogPost.views and the hourly buckets are exact'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Parallel reader threads (default: 16)')
+        parser.add_argument('--views', type=int, default=2000, help='Views per thread, spread over the posts (default: 2000)')
+        parser.add_argument('--posts', type=int, default=5, help='Published posts to read (default: 5)')
+        parser.add_argument('--interval', type=float, default=0.05, help='Flush interval during the test in seconds (default: 0.05)')
+
+    def handle(self, *args, **options):
+        threads, per_thread = options['threads'], options['views']
+        posts = list(BlogPost.objects.filter(is_published=True).order_by('pk')[:options['posts']])
+        if not posts:
+            raise CommandError('There are no published blog posts to read')
+
+        def state():
+            rows = BlogPost.objects.filter(pk__in=[post.pk for post in posts]).values_list('pk', 'views', 'updated_at')
+            buckets = dict(
+                BlogPostHourlyViews.objects.filter(post__in=posts).values('post').annotate(total=Sum('views')).values_list('post', 'total')
+            )
+            return {pk: views for pk, views, _ in rows}, buckets, {pk: updated for pk, _, updated in rows}
+
+        def read_post(thread, i):
+            # Every third view goes to the first post, so it trends
+            return posts[(thread + i) % len(posts)] if i % 3 else posts[0]
+
+        def reader(thread):
+            for i in range(per_thread):
+                blog_view_counter.hit(read_post(thread, i).pk)
+            connection.close()
+
+        with override_settings(BLOG_VIEW_FLUSH_INTERVAL=options['interval']):
+            # Also restarts the flush interval
+            blog_view_counter.flush()
+            views_before, buckets_before, updated_before = state()
+
+            workers = [threading.Thread(target=reader, args=(n,)) for n in range(threads)]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - start
+        blog_view_counter.flush()
+        views_after, buckets_after, updated_after = state()
+
+        expected = dict.fromkeys(views_before, 0)
+        for thread in range(threads):
+            for i in range(per_thread):
+                expected[read_post(thread, i).pk] += 1
+
+        total = threads * per_thread
+        self.stdout.write(f'{total} views of {len(posts)} posts from {threads} threads in {elapsed:.2f}s ({total / elapsed:.0f}/s)')
+        errors = []
+        for post in posts:
+            added = views_after[post.pk] - views_before[post.pk]
+            bucketed = (buckets_after.get(post.pk) or 0) - (buckets_before.get(post.pk) or 0)
+            self.stdout.write(f'  {post.title}: +{added} views, +{bucketed} in the hourly buckets (expected +{expected[post.pk]})')
+            if added != expected[post.pk] or bucketed != expected[post.pk]:
+                errors.append(post.title)
+            if updated_after[post.pk] != updated_before[post.pk]:
+                errors.append(f'{post.title} (updated_at changed)')
+        self.stdout.write('Trending: ' + ', '.join(f'{post.title} ({post.recent_views})' for post in trending_posts(limit=len(posts))))
+        if errors:
+            raise CommandError('Counts are off for ' + ', '.join(errors))
+        self.stdout.write(self.style.SUCCESS('Exact.'))
@@ -0,0 +1,74 @@
+"""
+Load test for VisitorCountMiddleware
+"""
+
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from portfolio.counters import visitor_counter
+from portfolio.models import VisitorCount
+from rahulportfolio.middleware import VisitorCountMiddleware
+
+
+class Command(BaseCommand):
+    help = 'Sends parallel requests through VisitorCountMiddleware and checks the stored visitor count is exact'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Parallel request threads (default: 16)')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per thread, every other one to the home page (default: 2000)')
+        parser.add_argument('--interval', type=float, default=0.05, help='Flush interval during the test in seconds (default: 0.05)')
+
+    def handle(self, *args, **options):
+        threads, per_thread = options['threads'], options['requests']
+        middleware = VisitorCountMiddleware(lambda request: HttpResponse())
+        factory = RequestFactory()
+        results = []
+
+        def client():
+            queries = 0
+
+            def count_query(execute, sql, params, many, context):
+                nonlocal queries
+                queries += 1
+                return execute(sql, params, many, context)
+
+            requests_with_queries = 0
+            with connection.execute_wrapper(count_query):
+                for i in range(per_thread):
+                    before = queries
+                    middleware(factory.get('/' if i % 2 == 0 else '/about/'))
+                    requests_with_queries += queries > before
+            connection.close()
+            results.append((queries, requests_with_queries))
+
+        with override_settings(VISITOR_COUNT_FLUSH_INTERVAL=options['interval']):
+            # Also restarts the flush interval
+            visitor_counter.flush()
+            stored_before = VisitorCount.objects.filter(id=1).values_list('count', flat=True).first() or 0
+
+            workers = [threading.Thread(target=client) for _ in range(threads)]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - start
+        visitor_counter.flush()
+
+        stored_after = VisitorCount.objects.get(id=1).count
+        total_requests = threads * per_thread
+        home_hits = threads * ((per_thread + 1) // 2)
+        queries = sum(query_count for query_count, _ in results)
+        requests_with_queries = sum(with_queries for _, with_queries in results)
+
+        self.stdout.write(f'{total_requests} requests ({home_hits} home page hits) from {threads} threads in {elapsed:.2f}s ({total_requests / elapsed:.0f}/s)')
+        self.stdout.write(f'{queries} queries, all from {requests_with_queries} requests that flushed; {total_requests - requests_with_queries} requests made none')
+        self.stdout.write(f'Stored count {stored_before} -> {stored_after} (+{stored_after - stored_before})')
+        if stored_after - stored_before != home_hits:
+            raise CommandError(f'Expected +{home_hits}, the count is off by {stored_after - stored_before - home_hits}')
+        self.stdout.write(self.style.SUCCESS('Exact.'))
@@ -0,0 +1,26 @@
+"""
+Back-fill of the tag index
+"""
+
+from django.core.management.base import BaseCommand
+
+from portfolio.models import BlogPost, Project
+from portfolio.tag_index import delete_unused_tags, sync_tags
+
+
+class Command(BaseCommand):
+    help = 'Syncs the tag index with BlogPost.tags and Project.technology_used of every post and project, then deletes unused tags'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows read per query (default: 500)')
+
+    def handle(self, *args, **options):
+        for model, field in ((BlogPost, 'tags'), (Project, 'technology_used')):
+            rows = changed = 0
+            for instance in model.objects.only('pk', field).order_by('pk').iterator(chunk_size=options['chunk_size']):
+                rows += 1
+                changed += sync_tags(instance)
+            self.stdout.write('%s: %d of %d rows re-indexed.' % (model._meta.verbose_name_plural, changed, rows))
+
+        deleted = delete_unused_tags()
+        self.stdout.write(self.style.SUCCESS('Done, %d unused tags deleted.' % deleted))
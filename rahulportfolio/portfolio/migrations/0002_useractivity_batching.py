@@ -0,0 +1,53 @@
+# Generated by Django 6.0 on 2026-10-18 22:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserActivityDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('activity_type', models.CharField(choices=[('login', 'Login'), ('logout', 'Logout'), ('visit', 'Page Visit'), ('contact', 'Contact Form Submission'), ('register', 'Registration')], max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily User Activity',
+                'verbose_name_plural': 'Daily User Activities',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='useractivity',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='useractivity',
+            index=models.Index(fields=['user', '-created_at'], name='portfolio_u_user_id_a9a7bd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='useractivity',
+            index=models.Index(fields=['created_at'], name='portfolio_u_created_cfa3d6_idx'),
+        ),
+        migrations.AddField(
+            model_name='useractivitydaily',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='useractivitydaily',
+            unique_together={('user', 'date', 'activity_type')},
+        ),
+    ]
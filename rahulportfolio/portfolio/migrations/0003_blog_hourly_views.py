@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-18 23:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0002_useractivity_batching'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlogPostHourlyViews',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_views', to='portfolio.blogpost')),
+            ],
+            options={
+                'verbose_name': 'Hourly Blog Post Views',
+                'verbose_name_plural': 'Hourly Blog Post Views',
+                'ordering': ['-hour'],
+                'indexes': [models.Index(fields=['hour'], name='portfolio_b_hour_2cf49d_idx')],
+                'unique_together': {('post', 'hour')},
+            },
+        ),
+    ]
@@ -0,0 +1,129 @@
+# Generated by Django 6.0 on 2026-10-18 23:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+# Tag splitting as portfolio.models did it when this migration was written,
+# kept here so later changes to the models do not change what it creates
+TAG_NAME_LENGTH = 50
+
+
+def _tag_slug(name):
+    # Keeps C, C++ and C# apart
+    return slugify(name.replace('+', ' plus').replace('#', ' sharp'))
+
+
+def _split_tags(value):
+    # (slug, name) of each tag in a comma separated string, without blanks and duplicates
+    tags = {}
+    for name in (value or '').split(','):
+        name = name.strip()[:TAG_NAME_LENGTH]
+        slug = _tag_slug(name)
+        if slug and slug not in tags:
+            tags[slug] = name
+    return list(tags.items())
+
+
+def fill_tag_index(apps, schema_editor):
+    """Tags and links of the posts and projects saved before the index existed (as sync_tags would create them)"""
+    Tag = apps.get_model('portfolio', 'Tag')
+    names = {}
+    links = []
+    for model_name, link_name, owner, field in (
+        ('BlogPost', 'BlogPostTag', 'post', 'tags'),
+        ('Project', 'ProjectTag', 'project', 'technology_used'),
+    ):
+        rows = apps.get_model('portfolio', model_name).objects.values_list('pk', field)
+        tags = [(pk, _split_tags(value)) for pk, value in rows.iterator()]
+        for _, instance_tags in tags:
+            for slug, name in instance_tags:
+                names.setdefault(slug, name)
+        links.append((apps.get_model('portfolio', link_name), owner, tags))
+
+    Tag.objects.bulk_create([Tag(slug=slug, name=name) for slug, name in names.items()], batch_size=500)
+    tag_ids = dict(Tag.objects.values_list('slug', 'id'))
+    for link_model, owner, tags in links:
+        link_model.objects.bulk_create(
+            (
+                link_model(**{f'{owner}_id': pk}, tag_id=tag_ids[slug], position=position)
+                for pk, instance_tags in tags
+                for position, (slug, _) in enumerate(instance_tags)
+            ),
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0003_blog_hourly_views'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('slug', models.SlugField(max_length=80, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Tag',
+                'verbose_name_plural': 'Tags',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProjectTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='technology_links', to='portfolio.project')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='project_links', to='portfolio.tag')),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BlogPostTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='portfolio.blogpost')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_links', to='portfolio.tag')),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='tag_index',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='blog_posts', through='portfolio.BlogPostTag', to='portfolio.tag'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='technologies',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='projects', through='portfolio.ProjectTag', to='portfolio.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='projecttag',
+            index=models.Index(fields=['tag', 'project'], name='portfolio_p_tag_id_bb9487_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='projecttag',
+            unique_together={('project', 'tag')},
+        ),
+        migrations.AddIndex(
+            model_name='blogposttag',
+            index=models.Index(fields=['tag', 'post'], name='portfolio_b_tag_id_226e16_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='blogposttag',
+            unique_together={('post', 'tag')},
+        ),
+        migrations.RunPython(fill_tag_index, migrations.RunPython.noop),
+    ]
@@ -6,6 +6,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.urls import reverse
+from django.utils.text import slugify
 
 
 class SiteInfo(models.Model):
@@ -93,6 +94,58 @@ class Skill(models.Model):
         return self.name
 
 
+def tag_slug(name):
+    """Slug identifying a tag, so "Django", "django " and "DJANGO" are the same tag"""
+    # Keeps C, C++ and C# apart
+    return slugify(name.replace('+', ' plus').replace('#', ' sharp'))
+
+
+def split_tags(value):
+    """(slug, name) of each tag in a comma separated string, without blanks and duplicates"""
+    tags = {}
+    for name in (value or '').split(','):
+        name = name.strip()[:Tag.NAME_LENGTH]
+        slug = tag_slug(name)
+        if slug and slug not in tags:
+            tags[slug] = name
+    return list(tags.items())
+
+
+def indexed_names(instance, links, value):
+    """
+    Tag names of instance: from its links if they were prefetched (see
+    portfolio.tag_index), otherwise split from value. No prefetched links
+    but a non-empty value means the row has not been indexed yet.
+    """
+    prefetched = getattr(instance, '_prefetched_objects_cache', {}).get(links)
+    if prefetched:
+        return [link.tag.name for link in prefetched]
+    return [name for _, name in split_tags(value)]
+
+
+class Tag(models.Model):
+    """
+    Normalized tags of blog posts and technologies of projects, kept in
+    sync with BlogPost.tags and Project.technology_used (see
+    portfolio.tag_index)
+    """
+    NAME_LENGTH = 50
+
+    name = models.CharField(max_length=NAME_LENGTH)
+    slug = models.SlugField(max_length=80, unique=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Tag'
+        verbose_name_plural = 'Tags'
+
+    def __str__(self):
+        return self.name
+
+    def get_absolute_url(self):
+        return reverse('portfolio:tag', args=[self.slug])
+
+
 class Project(models.Model):
     """
     Store portfolio projects
@@ -105,6 +158,7 @@ class Project(models.Model):
     project_url = models.URLField(blank=True)
     source_code_url = models.URLField(blank=True)
     technology_used = models.CharField(max_length=500, help_text="Comma separated technologies")
+    technologies = models.ManyToManyField(Tag, through='ProjectTag', related_name='projects', blank=True, editable=False)
     featured = models.BooleanField(default=False)
     is_published = models.BooleanField(default=True)
     order = models.IntegerField(default=0)
@@ -120,7 +174,23 @@ class Project(models.Model):
         return self.title
     
     def get_technology_list(self):
-        return [tech.strip() for tech in self.technology_used.split(',')]
+        return indexed_names(self, 'technology_links', self.technology_used)
+
+
+class ProjectTag(models.Model):
+    """
+    Technology of a project, in the order of Project.technology_used
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='technology_links')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='project_links')
+    position = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ['position']
+        unique_together = ('project', 'tag')
+        indexes = [
+            models.Index(fields=['tag', 'project']),
+        ]
 
 
 class Experience(models.Model):
@@ -184,6 +254,7 @@ class BlogPost(models.Model):
     is_featured = models.BooleanField(default=False)
     category = models.CharField(max_length=100, default='General')
     tags = models.CharField(max_length=300, blank=True, help_text="Comma separated tags")
+    tag_index = models.ManyToManyField(Tag, through='BlogPostTag', related_name='blog_posts', blank=True, editable=False)
     views = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -198,7 +269,45 @@ class BlogPost(models.Model):
         return self.title
     
     def get_tags_list(self):
-        return [tag.strip() for tag in self.tags.split(',')]
+        return indexed_names(self, 'tag_links', self.tags)
+
+
+class BlogPostTag(models.Model):
+    """
+    Tag of a blog post, in the order of BlogPost.tags
+    """
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='tag_links')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='post_links')
+    position = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ['position']
+        unique_together = ('post', 'tag')
+        indexes = [
+            models.Index(fields=['tag', 'post']),
+        ]
+
+
+class BlogPostHourlyViews(models.Model):
+    """
+    Views of a blog post per hour, written with BlogPost.views by the blog
+    view counter (see portfolio.counters) and read for trending posts
+    """
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='hourly_views')
+    hour = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-hour']
+        unique_together = ('post', 'hour')
+        indexes = [
+            models.Index(fields=['hour']),
+        ]
+        verbose_name = 'Hourly Blog Post Views'
+        verbose_name_plural = 'Hourly Blog Post Views'
+
+    def __str__(self):
+        return f"{self.post.title} - {self.views} views at {self.hour}"
 
 
 class ContactMessage(models.Model):
@@ -255,17 +364,42 @@ class UserActivity(models.Model):
     description = models.TextField()
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.CharField(max_length=300, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the activity happens, rows are written later in batches (see portfolio.activity)
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'User Activity'
         verbose_name_plural = 'User Activities'
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['created_at']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.activity_type}"
 
 
+class UserActivityDaily(models.Model):
+    """
+    Daily activity counts per user, rolled up from old UserActivity rows
+    by the compact_user_activity command
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    date = models.DateField()
+    activity_type = models.CharField(max_length=20, choices=UserActivity.ACTIVITY_TYPES)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-date']
+        unique_together = ('user', 'date', 'activity_type')
+        verbose_name = 'Daily User Activity'
+        verbose_name_plural = 'Daily User Activities'
+
+    def __str__(self):
+        return f"{self.user.username} - {self.activity_type} x {self.count} on {self.date}"
+
+
 class Testimonial(models.Model):
     """
     Store client testimonials
@@ -4,9 +4,20 @@ Django Signals for Portfolio Website
 
 from django.db.models.signals import post_save, post_delete, pre_save
 from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in, user_logged_out
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import UserActivity, VisitorCount, ContactMessage
+from .models import (
+    VisitorCount, ContactMessage, SiteInfo, SocialLink, Skill, Project,
+    Service, Testimonial, Experience, Education, BlogPost
+)
+from .activity import log_activity
+from .content_cache import bump_content_generation
+from .tag_index import sync_tags
+
+
+# Models shown on the cached public pages (see portfolio.content_cache)
+CONTENT_MODELS = [SiteInfo, SocialLink, Skill, Project, Service, Testimonial, Experience, Education]
 
 
 @receiver(post_save, sender=User)
@@ -15,10 +26,10 @@ def create_user_activity_on_registration(sender, instance, created, **kwargs):
     Create user activity when a new user is registered
     """
     if created:
-        UserActivity.objects.create(
-            user=instance,
-            activity_type='register',
-            description=f'New user registered: {instance.username}'
+        log_activity(
+            instance,
+            'register',
+            f'New user registered: {instance.username}'
         )
 
 
@@ -38,42 +49,21 @@ def create_contact_activity(sender, instance, created, **kwargs):
         pass
 
 
+@receiver(user_logged_in)
 def log_user_login(sender, request, user, **kwargs):
     """
     Log user login activity
     """
-    UserActivity.objects.create(
-        user=user,
-        activity_type='login',
-        description=f'User logged in',
-        ip_address=get_client_ip(request),
-        user_agent=request.META.get('HTTP_USER_AGENT', '')[:300]
-    )
+    log_activity(user, 'login', 'User logged in', request=request)
 
 
+@receiver(user_logged_out)
 def log_user_logout(sender, request, user, **kwargs):
     """
     Log user logout activity
     """
-    UserActivity.objects.create(
-        user=user,
-        activity_type='logout',
-        description=f'User logged out',
-        ip_address=get_client_ip(request),
-        user_agent=request.META.get('HTTP_USER_AGENT', '')[:300]
-    )
-
-
-def get_client_ip(request):
-    """
-    Get client IP address from request
-    """
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
+    if user is not None:
+        log_activity(user, 'logout', 'User logged out', request=request)
 
 
 @receiver(post_save, sender=VisitorCount)
@@ -95,3 +85,26 @@ def sanitize_contact_message(sender, instance, **kwargs):
     instance.email = instance.email.strip().lower()
     instance.subject = instance.subject.strip()
     instance.message = instance.message.strip()
+
+
+def invalidate_content(sender, **kwargs):
+    """
+    Start a new content generation when public page content is saved or deleted
+    """
+    bump_content_generation()
+
+
+for model in CONTENT_MODELS:
+    post_save.connect(invalidate_content, sender=model, dispatch_uid=f'invalidate_content_{model.__name__}')
+    post_delete.connect(invalidate_content, sender=model, dispatch_uid=f'delete_content_{model.__name__}')
+
+
+@receiver(post_save, sender=BlogPost)
+@receiver(post_save, sender=Project)
+def update_tag_index(sender, instance, raw=False, **kwargs):
+    """
+    Sync the tag index with BlogPost.tags / Project.technology_used
+    """
+    # Fixtures are loaded as they are, run rebuild_tag_index afterwards
+    if not raw:
+        sync_tags(instance)
@@ -0,0 +1,102 @@
+"""
+Tag index for Rahul Portfolio Website
+
+BlogPost.tags and Project.technology_used stay the comma separated fields
+that are edited in the forms and the admin. Every save syncs them into Tag
+and the BlogPostTag / ProjectTag link tables (see portfolio.signals).
+Migration 0004 indexed the rows saved before; the rebuild_tag_index command
+repairs rows changed without signals (queryset updates, raw fixtures).
+
+Tag pages, the tag cloud and related posts query the link tables, and list
+views prefetch them with with_tags() so get_tags_list() and
+get_technology_list() don't split the strings again.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, Prefetch, Q
+
+from .models import BlogPost, BlogPostTag, Project, ProjectTag, Tag, split_tags
+
+
+# Per indexed model: link model, link field pointing to it, its related name, indexed field
+INDEXES = {
+    BlogPost: (BlogPostTag, 'post', 'tag_links', 'tags'),
+    Project: (ProjectTag, 'project', 'technology_links', 'technology_used'),
+}
+
+
+def with_tags(queryset):
+    """queryset with the tags (or technologies) of each row prefetched, in order"""
+    link_model, _, links, _ = INDEXES[queryset.model]
+    return queryset.prefetch_related(Prefetch(links, queryset=link_model.objects.select_related('tag')))
+
+
+def get_tags(tags):
+    """Tag per slug for a list of (slug, name), creating the missing ones"""
+    slugs = [slug for slug, _ in tags]
+    found = Tag.objects.in_bulk(slugs, field_name='slug')
+    missing = [Tag(slug=slug, name=name) for slug, name in tags if slug not in found]
+    if missing:
+        # Another save may create the same tags meanwhile
+        Tag.objects.bulk_create(missing, ignore_conflicts=True)
+        found.update(Tag.objects.in_bulk([tag.slug for tag in missing], field_name='slug'))
+    return found
+
+
+def sync_tags(instance):
+    """Make the links of a BlogPost or Project match its field; returns True if they changed"""
+    link_model, owner, _, field = INDEXES[type(instance)]
+    tags = split_tags(getattr(instance, field))
+    links = link_model.objects.filter(**{owner: instance})
+    if list(links.values_list('tag__slug', flat=True)) == [slug for slug, _ in tags]:
+        return False
+
+    found = get_tags(tags)
+    with transaction.atomic():
+        links.delete()
+        link_model.objects.bulk_create(
+            link_model(**{owner: instance}, tag=found[slug], position=position)
+            for position, (slug, _) in enumerate(tags)
+        )
+    return True
+
+
+def delete_unused_tags():
+    return Tag.objects.filter(post_links__isnull=True, project_links__isnull=True).delete()[0]
+
+
+def tag_cloud(limit=None):
+    """Tags of published posts and projects with their counts, most used first"""
+    tags = Tag.objects.annotate(
+        post_count=Count('post_links', filter=Q(post_links__post__is_published=True), distinct=True),
+        project_count=Count('project_links', filter=Q(project_links__project__is_published=True), distinct=True),
+    ).annotate(
+        total=F('post_count') + F('project_count')
+    ).filter(total__gt=0).order_by('-total', 'name')
+    return tags[:limit] if limit else tags
+
+
+def _tag_ids(instance):
+    link_model, owner, links, _ = INDEXES[type(instance)]
+    prefetched = getattr(instance, '_prefetched_objects_cache', {}).get(links)
+    if prefetched is not None:
+        return [link.tag_id for link in prefetched]
+    return list(link_model.objects.filter(**{owner: instance}).values_list('tag_id', flat=True))
+
+
+def related(instance, limit=3):
+    """
+    Published posts (or projects) sharing the most tags with instance, in
+    the model's usual order among equals; empty if it has no tags
+    """
+    model = type(instance)
+    _, _, links, _ = INDEXES[model]
+    tag_ids = _tag_ids(instance)
+    if not tag_ids:
+        return model.objects.none()
+    return (
+        model.objects.filter(is_published=True, **{f'{links}__tag__in': tag_ids})
+        .exclude(pk=instance.pk)
+        .annotate(shared_tags=Count(links))
+        .order_by('-shared_tags', *model._meta.ordering)[:limit]
+    )
@@ -7,6 +7,8 @@ from django.utils.safestring import mark_safe
 from django.template.defaultfilters import stringfilter
 import re
 
+from portfolio.models import tag_slug as make_tag_slug
+
 register = template.Library()
 
 
@@ -102,14 +104,25 @@ def add_class(field, css_class):
 
 
 @register.filter
-def format_technology(tech_string):
+def tag_slug(name):
+    """
+    Slug of a tag name, for links to its tag page
+    """
+    return make_tag_slug(name)
+
+
+@register.filter
+def format_technology(value):
     """
-    Format technology string as badges
+    Format technologies as badges: a project (its prefetched technologies)
+    or a comma separated string
     """
-    if not tech_string:
+    if hasattr(value, 'get_technology_list'):
+        technologies = value.get_technology_list()
+    elif value:
+        technologies = [t.strip() for t in value.split(',')]
+    else:
         return ''
-    
-    technologies = [t.strip() for t in tech_string.split(',')]
     badges = []
     
     tech_colors = {
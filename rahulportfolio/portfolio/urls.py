@@ -16,6 +16,7 @@ urlpatterns = [
     path('skills/', views.SkillsView.as_view(), name='skills'),
     path('blog/', views.BlogView.as_view(), name='blog'),
     path('blog/<slug:slug>/', views.BlogDetailView.as_view(), name='blog_detail'),
+    path('tags/<slug:slug>/', views.TagView.as_view(), name='tag'),
     path('contact/', views.ContactView.as_view(), name='contact'),
     path('services/', views.ServicesView.as_view(), name='services'),
     
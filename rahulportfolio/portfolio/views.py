@@ -16,13 +16,15 @@ from django.utils import timezone
 
 from .models import (
     Project, Skill, Experience, Education, BlogPost, ContactMessage,
-    Testimonial, Service, SocialLink, SiteInfo, VisitorCount, UserActivity
+    Testimonial, Service, SocialLink, SiteInfo, VisitorCount, UserActivity, Tag
 )
 from .forms import (
     ContactForm, RegistrationForm, LoginForm, ProjectForm, SkillForm,
     ExperienceForm, EducationForm, BlogPostForm, TestimonialForm,
     ServiceForm, SocialLinkForm
 )
+from .counters import blog_view_counter, trending_posts
+from .tag_index import related, tag_cloud, with_tags
 
 
 # ==================== Public Views ====================
@@ -30,21 +32,20 @@ from .forms import (
 class HomeView(TemplateView):
     """
     Home page view with hero section and overview
+    
+    The querysets are lazy and only evaluated by the template sections
+    that are not cached yet (site_info comes from the context processor).
     """
     template_name = 'portfolio/home.html'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Get site info
-        from portfolio.models import SiteInfo
-        context['site_info'] = SiteInfo.objects.first()
-        
         # Get featured projects
-        context['featured_projects'] = Project.objects.filter(
+        context['featured_projects'] = with_tags(Project.objects.filter(
             is_published=True, 
             featured=True
-        ).order_by('-created_at')[:6]
+        ).order_by('-created_at'))[:6]
         
         # Get skills grouped by category
         skills = Skill.objects.filter(is_active=True).order_by('-proficiency')
@@ -71,25 +72,21 @@ class HomeView(TemplateView):
 class AboutView(TemplateView):
     """
     About page with biography and experience
+    
+    Like HomeView, the querysets are only evaluated by uncached template
+    sections (site_info comes from the context processor).
     """
     template_name = 'portfolio/about.html'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Get site info
-        from portfolio.models import SiteInfo
-        context['site_info'] = SiteInfo.objects.first()
-        
         # Get all experiences
         context['experiences'] = Experience.objects.order_by('-start_date')
         
         # Get all education
         context['educations'] = Education.objects.order_by('-start_date')
         
-        # Get site info
-        context['site_info'] = SiteInfo.objects.first()
-        
         return context
 
 
@@ -103,9 +100,9 @@ class ProjectsView(ListView):
     paginate_by = 9
     
     def get_queryset(self):
-        return Project.objects.filter(
+        return with_tags(Project.objects.filter(
             is_published=True
-        ).order_by('-featured', '-created_at')
+        ).order_by('-featured', '-created_at'))
 
 
 class ProjectDetailView(DetailView):
@@ -117,11 +114,12 @@ class ProjectDetailView(DetailView):
     context_object_name = 'project'
     
     def get_queryset(self):
-        return Project.objects.filter(is_published=True)
+        return with_tags(Project.objects.filter(is_published=True))
     
     def get_context_data(self, **context):
         context = super().get_context_data(**context)
-        context['related_projects'] = Project.objects.filter(
+        # Projects using the same technologies first
+        context['related_projects'] = related(self.object) or Project.objects.filter(
             is_published=True
         ).exclude(pk=self.object.pk)[:3]
         return context
@@ -157,9 +155,15 @@ class BlogView(ListView):
     paginate_by = 6
     
     def get_queryset(self):
-        return BlogPost.objects.filter(
+        return with_tags(BlogPost.objects.filter(
             is_published=True
-        ).order_by('-published_at')
+        ).order_by('-published_at'))
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['trending_posts'] = trending_posts()
+        context['tag_cloud'] = tag_cloud(limit=30)
+        return context
 
 
 class BlogDetailView(DetailView):
@@ -171,24 +175,41 @@ class BlogDetailView(DetailView):
     context_object_name = 'post'
     
     def get_queryset(self):
-        return BlogPost.objects.filter(is_published=True)
+        return with_tags(BlogPost.objects.filter(is_published=True))
     
     def get_object(self, queryset=None):
         post = super().get_object(queryset)
-        # Increment views
-        post.views += 1
-        post.save()
+        # Count the view in memory, it is written later with the other views (see portfolio.counters)
+        blog_view_counter.hit(post.pk)
+        post.views += blog_view_counter.pending_views(post.pk)
         return post
     
     def get_context_data(self, **context):
         context = super().get_context_data(**context)
-        context['related_posts'] = BlogPost.objects.filter(
+        # Posts sharing the most tags, or else posts of the same category
+        context['related_posts'] = related(self.object) or BlogPost.objects.filter(
             is_published=True,
             category=self.object.category
         ).exclude(pk=self.object.pk)[:3]
         return context
 
 
+class TagView(TemplateView):
+    """
+    Blog posts and projects with a tag
+    """
+    template_name = 'portfolio/tag.html'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        tag = get_object_or_404(Tag, slug=kwargs['slug'])
+        context['tag'] = tag
+        context['posts'] = with_tags(tag.blog_posts.filter(is_published=True).order_by('-published_at'))
+        context['projects'] = with_tags(tag.projects.filter(is_published=True).order_by('-featured', '-created_at'))
+        context['tag_cloud'] = tag_cloud(limit=30)
+        return context
+
+
 class ContactView(TemplateView):
     """
     Contact page with form
@@ -270,15 +291,9 @@ def login_view(request):
             password = form.cleaned_data.get('password')
             user = authenticate(username=username, password=password)
             if user is not None:
+                # Logs the activity (portfolio.signals.log_user_login)
                 login(request, user)
                 
-                # Log activity
-                UserActivity.objects.create(
-                    user=user,
-                    activity_type='login',
-                    description=f'User logged in'
-                )
-                
                 messages.success(
                     request, 
                     f'Welcome back, {username}!',
@@ -312,13 +327,7 @@ def logout_view(request):
     User logout view
     """
     if request.user.is_authenticated:
-        # Log activity
-        UserActivity.objects.create(
-            user=request.user,
-            activity_type='logout',
-            description=f'User logged out'
-        )
-        
+        # Logs the activity (portfolio.signals.log_user_logout)
         logout(request)
         messages.success(
             request, 
@@ -460,7 +469,7 @@ def api_projects(request):
     """
     API endpoint to get all published projects
     """
-    projects = Project.objects.filter(is_published=True).order_by('-created_at')
+    projects = with_tags(Project.objects.filter(is_published=True).order_by('-created_at'))
     data = [
         {
             'id': project.id,
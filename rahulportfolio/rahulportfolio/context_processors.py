@@ -2,18 +2,18 @@
 Custom Context Processors for Rahul Portfolio Website
 """
 
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from portfolio.models import SiteInfo, SocialLink, Skill, Project
+from portfolio.content_cache import DEFAULT_TIMEOUT, content_generation, get_content
 
 
 def site_info(request):
     """
     Context processor to make site information available globally
+    (cached until the content changes)
     """
-    try:
-        site_info = SiteInfo.objects.first()
-    except SiteInfo.DoesNotExist:
-        site_info = None
+    site_info = get_content('site_info', SiteInfo.objects.first)
     
     return {
         'site_info': site_info,
@@ -23,32 +23,33 @@ def site_info(request):
 def social_links(request):
     """
     Context processor to make social links available globally
+    (cached until the content changes)
     """
-    try:
-        social_links = SocialLink.objects.filter(is_active=True)
-    except SocialLink.DoesNotExist:
-        social_links = []
+    social_links = get_content('social_links', lambda: list(SocialLink.objects.filter(is_active=True)))
     
     return {
         'social_links': social_links,
     }
 
 
+def content_cache(request):
+    """
+    Context processor for the {% cache %} tags of the public pages: the
+    current content generation is part of every fragment's key
+    """
+    return {
+        'content_generation': content_generation(),
+        'content_cache_timeout': getattr(settings, 'CONTENT_CACHE_TIMEOUT', DEFAULT_TIMEOUT),
+    }
+
+
 def visitor_count(request):
     """
     Context processor to make visitor count available globally
+    (set by VisitorCountMiddleware, no query needed)
     """
-    try:
-        from portfolio.models import VisitorCount
-        visitor = VisitorCount.objects.get(id=1)
-        visitor_count = visitor.count
-    except VisitorCount.DoesNotExist:
-        visitor_count = 0
-    except Exception:
-        visitor_count = 0
-    
     return {
-        'visitor_count': visitor_count,
+        'visitor_count': getattr(request, 'visitor_count', 0),
     }
 
 
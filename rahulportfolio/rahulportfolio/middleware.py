@@ -2,35 +2,38 @@
 Custom Middleware for Rahul Portfolio Website
 """
 
+from datetime import datetime, timedelta
+
 from django.utils.deprecation import MiddlewareMixin
 from django.contrib.auth.models import User
 from django.utils import timezone
-from portfolio.models import VisitorCount, UserActivity
+from portfolio.counters import visitor_counter
+from portfolio.activity import log_activity
 
 
 class VisitorCountMiddleware(MiddlewareMixin):
     """
     Middleware to track visitor count
+
+    Hits are counted in memory and written to VisitorCount in batches
+    (see portfolio.counters), so requests don't query the database.
     """
     
     def process_request(self, request):
-        # Get or create visitor count
-        visitor_count, created = VisitorCount.objects.get_or_create(
-            id=1,
-            defaults={'count': 0}
-        )
-        
         # Only count unique page views (home page)
         if request.path == '/' or request.path == '':
-            visitor_count.count += 1
-            visitor_count.save()
+            visitor_counter.hit()
         
         # Store visitor count in request for access in views
-        request.visitor_count = visitor_count.count
+        request.visitor_count = visitor_counter.total()
         
         return None
 
 
+# How often the last visit stored in the session is refreshed
+LAST_VISIT_REFRESH_MINUTES = 5
+
+
 class LastVisitMiddleware(MiddlewareMixin):
     """
     Middleware to track user's last visit using cookies and sessions
@@ -42,19 +45,28 @@ class LastVisitMiddleware(MiddlewareMixin):
             # Get last visit from session
             last_visit = request.session.get('last_visit')
             
-            # Update last visit time
-            request.session['last_visit'] = str(timezone.now())
+            # Update last visit time (not on every request, that would save the session every time)
+            if not last_visit or self.is_stale(last_visit):
+                request.session['last_visit'] = str(timezone.now())
             
-            # Log user activity
+            # Log user activity (buffered, see portfolio.activity)
             if last_visit:
-                UserActivity.objects.create(
-                    user=request.user,
-                    activity_type='visit',
-                    description=f'User visited at {timezone.now()}'
+                log_activity(
+                    request.user,
+                    'visit',
+                    f'User visited at {timezone.now()}',
+                    request=request
                 )
         
         return None
     
+    def is_stale(self, last_visit):
+        try:
+            last_visit = datetime.fromisoformat(last_visit)
+        except ValueError:
+            return True
+        return timezone.now() - last_visit >= timedelta(minutes=LAST_VISIT_REFRESH_MINUTES)
+    
     def process_response(self, request, response):
         # Set a cookie to remember the visitor
         if not request.user.is_authenticated:
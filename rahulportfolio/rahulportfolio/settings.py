@@ -4,6 +4,7 @@ Production-ready configuration for Render deployment.
 """
 
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -86,6 +87,7 @@ TEMPLATES = [
                 'rahulportfolio.context_processors.site_info',
                 'rahulportfolio.context_processors.social_links',
                 'rahulportfolio.context_processors.visitor_count',
+                'rahulportfolio.context_processors.content_cache',
             ],
             'libraries': {
                 'portfolio_tags': 'portfolio.templatetags.portfolio_tags',
@@ -119,6 +121,31 @@ else:
         }
     }
 
+# =============================================================================
+# Cache
+# =============================================================================
+# File based, so all gunicorn workers share it: a content change seen by one
+# worker invalidates the cached pages of the others (see portfolio.content_cache)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'rahulportfolio_cache')),
+    }
+}
+
+# Cached page sections are kept for a day at most
+CONTENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# =============================================================================
+# Blog view counts
+# =============================================================================
+# Views are counted in memory and written every BLOG_VIEW_FLUSH_INTERVAL seconds
+BLOG_VIEW_FLUSH_INTERVAL = 10
+# The blog page lists the posts with the most views in the last TRENDING_POSTS_HOURS hours
+TRENDING_POSTS_HOURS = 24
+# Hourly view counts older than this are deleted (keep it above TRENDING_POSTS_HOURS)
+BLOG_VIEW_RETENTION_HOURS = 7 * 24
+
 # =============================================================================
 # Password validation
 # =============================================================================